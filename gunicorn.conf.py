@@ -0,0 +1,37 @@
+"""
+Gunicorn settings; gunicorn reads this file from the working directory.
+
+With GUNICORN_PRELOAD on (the default) the app is imported once in the
+master and warmed up (URLconf, YouTube client stack, templates) before the
+worker forks, so it starts with that already in memory.
+
+WEB_CONCURRENCY (which Heroku sets to suit the dyno size) picks the number of
+workers. Workers share state through the default db cache, and progress
+events reach streams in any worker through the database (progress.events).
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+accesslog = '-'
+errorlog = '-'
+
+
+def _warm(log):
+    from learning_tracker.startup import warm
+    timings = warm()
+    log.info('Warmed up: %s', ', '.join(f'{name} {ms}ms' for name, ms in timings.items()))
+
+
+def when_ready(server):
+    # The app is already loaded in the master when preloading
+    if preload_app:
+        _warm(server.log)
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warm(worker.log)
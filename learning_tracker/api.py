@@ -0,0 +1,91 @@
+"""
+Shared pieces of the versioned REST API under /api/<version>/.
+
+Every endpoint pages with a cursor, so deep pages cost the same as the first
+one and rows inserted meanwhile don't shift pages, and accepts ``?fields=a,b``
+to return only some fields. Viewsets read the requested fields before building
+their queryset, so joins and annotations for fields nobody asked for are
+skipped too. Safe requests read from the replica like the HTML views.
+
+Clients log in with the site session or with a token from ``auth-token/``.
+"""
+from django.contrib.auth import authenticate
+from rest_framework import serializers, viewsets
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import ScopedRateThrottle
+from learning_tracker.db.replicas import replica_reads
+
+
+def requested_fields(request):
+    """The set of fields named by ?fields=, or None when all are wanted"""
+    value = request.query_params.get('fields') if request is not None else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """ModelSerializer that drops the fields ?fields= leaves out"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted is None:
+            return
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class Seconds(serializers.ReadOnlyField):
+    """A timedelta as whole seconds, which clients can add up"""
+
+    def to_representation(self, value):
+        return int(value.total_seconds()) if value is not None else 0
+
+
+class Cursor(CursorPagination):
+    """Cursor pages in the view's ``ordering``, which must be unique within the listed rows"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        return view.ordering
+
+
+class APIViewSet(viewsets.GenericViewSet):
+    """Base for API viewsets: cursor pages, one throttle scope per endpoint"""
+    pagination_class = Cursor
+    throttle_classes = [ScopedRateThrottle]
+
+    def wants(self, field):
+        """Whether the response includes ``field``, for trimming the queryset"""
+        wanted = requested_fields(self.request)
+        return wanted is None or field in wanted
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return replica_reads(super().dispatch)(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class TokenLoginSerializer(serializers.Serializer):
+    """The email and password users log in to the site with"""
+    email = serializers.EmailField()
+    password = serializers.CharField(trim_whitespace=False, write_only=True)
+
+    def validate(self, attrs):
+        user = authenticate(self.context['request'], email=attrs['email'], password=attrs['password'])
+        if user is None:
+            raise serializers.ValidationError('Unable to log in with provided credentials.', code='authorization')
+        attrs['user'] = user
+        return attrs
+
+
+class ObtainToken(ObtainAuthToken):
+    """Trade an email and password for the user's API token, throttled per client"""
+    serializer_class = TokenLoginSerializer
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'api-token'
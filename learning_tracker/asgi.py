@@ -3,6 +3,9 @@ ASGI config for learning_tracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Server-Sent Events for live progress updates are served here directly;
+everything else goes through Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -13,4 +16,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_tracker.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from progress.streams import EVENTS_PATH, progress_events_app  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        return await progress_events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,79 @@
+"""
+Database configuration for learning_tracker.
+
+``DATABASE_URL`` selects the database (PostgreSQL in production). Without it
+the project falls back to a tuned SQLite database in BASE_DIR.
+``REPLICA_DATABASE_URL`` adds a ``replica`` alias that views decorated with
+``learning_tracker.db.replicas.replica_reads`` read from.
+"""
+
+import os
+
+import dj_database_url
+
+SQLITE_ENGINE = 'learning_tracker.db.sqlite3'
+
+# Applied to every new SQLite connection by learning_tracker.db.sqlite3
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,  # KiB, negative means size rather than pages
+    'mmap_size': 134217728,
+}
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_config(base_dir, env='DATABASE_URL'):
+    """Build the ``default`` database settings from the environment.
+
+    DATABASE_URL           database URL, defaults to sqlite in base_dir
+    DB_CONN_MAX_AGE        seconds to keep connections open (default 0)
+    DB_CONN_HEALTH_CHECKS  check persistent connections before reuse (default on)
+    DB_POOLER              set to ``pgbouncer`` when PostgreSQL sits behind
+                           PgBouncer in transaction mode
+    SQLITE_BUSY_TIMEOUT    seconds a SQLite writer waits for the lock (default 20)
+
+    Persistent connections are opt-in. The app is served through ASGI, where
+    Django 4.2 runs each sync view in a new thread. Every request would then
+    leave its own persistent connection behind (Django ticket #33497) until
+    the server runs out of connections. Only set DB_CONN_MAX_AGE for WSGI
+    deployments or management commands.
+    """
+    pooler = os.getenv('DB_POOLER', '').lower()
+
+    config = dj_database_url.config(
+        env=env,
+        default=f"sqlite:///{base_dir / 'db.sqlite3'}",
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        conn_health_checks=_env_bool('DB_CONN_HEALTH_CHECKS', True),
+    )
+
+    if config['ENGINE'] == 'django.db.backends.sqlite3':
+        config['ENGINE'] = SQLITE_ENGINE
+        config.setdefault('OPTIONS', {}).update({
+            'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': dict(SQLITE_PRAGMAS),
+        })
+    elif pooler == 'pgbouncer':
+        # Transaction pooling can't keep named cursors across statements; the
+        # pooler is the connection pool, so Django should not hold connections
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+    return config
+
+
+def replica_config(base_dir):
+    """Build the ``replica`` database settings from REPLICA_DATABASE_URL.
+
+    The connection options match ``default``. Pointing it at the same SQLite
+    file (``sqlite:///db.sqlite3``) gives a replica with no lag for local
+    testing. Tests use the ``default`` connection for it.
+    """
+    config = database_config(base_dir, env='REPLICA_DATABASE_URL')
+    config['TEST'] = {'MIRROR': 'default'}
+    return config
@@ -0,0 +1,133 @@
+"""
+Read replica routing with read-your-writes pinning.
+
+Only views decorated with ``replica_reads`` read from the ``replica`` alias.
+Everything else, including background tasks and management commands, keeps
+using ``default``. ``ReplicaPinningMiddleware`` watches the SQL each
+request runs on ``default``. After a request that wrote, it sets a
+short-lived cookie that keeps that client's reads on the primary for
+REPLICA_PIN_SECONDS, which should exceed the replica lag you expect. Reads that follow a write in the
+same request also go to the primary, as do reads inside a transaction.
+
+Replica reads may lag behind writes that pinned no client, e.g. from another
+device, the nightly planner or the reminder scheduler. Shared caches that
+primary-only views read as well must not be filled from them; check
+``reading_from_replica()`` before caching.
+
+Without a ``replica`` entry in DATABASES, the router and the decorator do
+nothing.
+"""
+
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from functools import wraps
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'primary_pin'
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+# Session saves happen on most requests and don't make progress data stale
+UNTRACKED_TABLES = ('django_session',)
+
+_state = ContextVar('replica_state', default=None)
+
+
+class _RequestState:
+    __slots__ = ('pinned', 'use_replica', 'wrote')
+
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.use_replica = False
+        self.wrote = False
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+class ReplicaRouter:
+    """Send reads of replica_reads views to the replica; all writes to default"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None:
+            return None
+        if state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.use_replica:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+def reading_from_replica():
+    """Whether reads made now, in this request, go to the replica"""
+    return ReplicaRouter().db_for_read(None) == REPLICA_ALIAS
+
+
+def _is_write(sql):
+    statement = sql.lstrip()[:6].upper()
+    return statement in WRITE_STATEMENTS and not any(table in sql for table in UNTRACKED_TABLES)
+
+
+class ReplicaPinningMiddleware:
+    """Track writes per request and pin the client to the primary after one"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState(pinned=PIN_COOKIE in request.COOKIES)
+
+        def track_writes(execute, sql, params, many, context):
+            # get_or_create() and friends ask the router for the write alias
+            # even when they only read, so look at the statements instead
+            if not state.wrote and _is_write(sql):
+                state.wrote = True
+            return execute(sql, params, many, context)
+
+        token = _state.set(state)
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(track_writes):
+                response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True,
+                samesite='Lax', secure=request.is_secure(),
+            )
+        return response
+
+
+def replica_reads(view):
+    """Let a read-only view read from the replica unless its client wrote recently"""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is None or state.pinned or not replica_configured():
+            return view(request, *args, **kwargs)
+        state.use_replica = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.use_replica = False
+
+    return wrapper
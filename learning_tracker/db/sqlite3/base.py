@@ -0,0 +1,43 @@
+"""
+SQLite backend with the pragmas and locking behaviour needed for concurrent
+completion writes.
+
+Two extra OPTIONS are understood on top of Django's sqlite3 backend:
+
+``pragmas``
+    mapping of PRAGMA name to value, applied to every new connection.
+``transaction_mode``
+    ``DEFERRED`` (SQLite's default) or ``IMMEDIATE``. Immediate transactions
+    take the write lock up front, so a read-then-write ``atomic`` block waits
+    on the busy timeout instead of failing with "database is locked".
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        saved = {name: options.pop(name) for name in ('pragmas', 'transaction_mode') if name in options}
+        try:
+            return super().get_connection_params()
+        finally:
+            options.update(saved)
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        # Python's sqlite3 timeout already installs a busy handler; mirror it
+        # as a pragma so it also covers checkpoints and schema locks
+        timeout = conn_params.get('timeout')
+        if timeout is not None:
+            conn.execute(f'PRAGMA busy_timeout = {int(timeout * 1000)}')
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED').upper()
+        if mode == 'DEFERRED':
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {mode}')
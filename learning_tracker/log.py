@@ -0,0 +1,134 @@
+"""
+Logging that keeps I/O off the request thread.
+
+QueueListenerHandler is configured in LOGGING like any other handler. It
+only puts records on a queue; a QueueListener thread hands them to the real
+handlers (file, console). JSONFormatter writes one JSON object per line and
+includes anything passed through ``extra=``. SamplingFilter keeps a fixed
+fraction of DEBUG/INFO records per logger; warnings and errors are never
+dropped.
+"""
+
+from logging.config import ConvertingList
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+
+# LogRecord attributes that aren't user supplied ``extra`` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc_info'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep ``rate`` of the records below WARNING from each configured logger
+
+    ``rates`` maps logger names to a fraction between 0 and 1 and applies to
+    child loggers too; loggers without a rate are not sampled.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: a full queue must still be drained and stopped, not raise
+        self.queue.put(self._sentinel)
+
+
+class QueueListenerHandler(QueueHandler):
+    """Queue records for a background thread that writes them to ``handlers``
+
+    ``handlers`` takes ``cfg://handlers.<name>`` references in LOGGING. The
+    listener thread is restarted in forked children (e.g. gunicorn workers
+    with preload), since threads don't survive a fork.
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        if isinstance(handlers, ConvertingList):
+            handlers = [handlers[i] for i in range(len(handlers))]
+        self.handlers = handlers
+        self.maxsize = maxsize
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self.stopped = False
+        self._start()
+        atexit.register(self.stop)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _start(self):
+        self.listener = _Listener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def _restart_in_child(self):
+        if self.stopped:
+            return
+        self.queue = queue.Queue(self.maxsize)
+        self._start()
+
+    def prepare(self, record):
+        # Render the message now, but leave the formatting to the real handlers
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Shed log lines rather than block the request when the disk can't keep up
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued record has been written"""
+        listener = self.listener
+        if listener._thread is not None:
+            listener.stop()
+            listener.start()
+
+    def stop(self):
+        self.stopped = True
+        if self.listener._thread is not None:
+            self.listener.stop()
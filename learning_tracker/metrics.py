@@ -0,0 +1,193 @@
+"""
+In-process request metrics exposed in the Prometheus text format.
+
+MetricsMiddleware records, per resolved view, the request latency, the
+number and duration of database queries, cache hits and misses and YouTube
+API calls. Everything is kept in plain dicts behind one lock, so the
+overhead per request is a few dictionary updates. Counters are per process.
+"""
+
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+import hmac
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} counter'
+        for label_values, value in sorted(self.values.items()):
+            yield f'{self.name}{_labels(self.labels, label_values)} {_number(value)}'
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, label_values, value):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * len(self.buckets), 0, 0]
+        counts = entry[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        for label_values, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{_labels(self.labels + ("le",), label_values + (_number(bound),))} {cumulative}'
+            yield f'{self.name}_bucket{_labels(self.labels + ("le",), label_values + ("+Inf",))} {count}'
+            yield f'{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}'
+            yield f'{self.name}_count{_labels(self.labels, label_values)} {count}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_lock = threading.Lock()
+
+REQUESTS = Counter('http_requests_total', 'Requests by view, method and status.', ('view', 'method', 'status'))
+LATENCY = Histogram('http_request_duration_seconds', 'Request latency.', ('view', 'method'), LATENCY_BUCKETS)
+DB_QUERIES = Histogram('db_queries_per_request', 'Database queries per request.', ('view',), QUERY_COUNT_BUCKETS)
+DB_TIME = Counter('db_query_duration_seconds_total', 'Time spent in database queries.', ('view',))
+CACHE = Counter('cache_requests_total', 'Cache lookups by result.', ('view', 'cache', 'result'))
+YOUTUBE_CALLS = Counter('youtube_api_calls_total', 'YouTube Data API requests.', ('view', 'method', 'status'))
+YOUTUBE_LATENCY = Histogram('youtube_api_duration_seconds', 'YouTube Data API latency.', ('view', 'method'), LATENCY_BUCKETS)
+
+METRICS = [REQUESTS, LATENCY, DB_QUERIES, DB_TIME, CACHE, YOUTUBE_CALLS, YOUTUBE_LATENCY]
+
+
+class RequestMetrics:
+    """Numbers gathered while one request is handled"""
+    __slots__ = ('view', 'queries', 'db_seconds')
+
+    def __init__(self):
+        self.view = 'unresolved'
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+def _current_view():
+    current = _current.get()
+    return current.view if current is not None else 'background'
+
+
+def record_cache_lookup(cache_name, hit):
+    """Count a cache hit or miss against the current view"""
+    with _lock:
+        CACHE.inc((_current_view(), cache_name, 'hit' if hit else 'miss'))
+
+
+def record_youtube_call(method, status, seconds):
+    """Count a YouTube API request against the current view"""
+    view = _current_view()
+    with _lock:
+        YOUTUBE_CALLS.inc((view, method, status))
+        YOUTUBE_LATENCY.observe((view, method), seconds)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+
+        view = metrics.view
+        with _lock:
+            REQUESTS.inc((view, request.method, response.status_code))
+            LATENCY.observe((view, request.method), elapsed)
+            DB_QUERIES.observe((view,), metrics.queries)
+            DB_TIME.inc((view,), metrics.db_seconds)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None and request.resolver_match is not None:
+            metrics.view = request.resolver_match.view_name
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    """Clear every metric; used by tests"""
+    with _lock:
+        for metric in METRICS:
+            metric.values.clear()
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for staff users or holders of METRICS_TOKEN"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    allowed = request.user.is_authenticated and request.user.is_staff
+    if token and authorization.startswith('Bearer '):
+        allowed = allowed or hmac.compare_digest(authorization[len('Bearer '):], token)
+    if not allowed:
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,176 @@
+"""
+On-demand request profiling.
+
+A request is profiled when a staff user sends the ``X-Profile: 1`` header or
+the ``?_profile=1`` query flag, or when it falls into the random sample set
+by PROFILING_SAMPLE_RATE (percent of all requests). The cProfile stats and
+the SQL the request ran are written to PROFILING_DIR. Only the SQL text with
+its placeholders is kept; the parameters are user data. The oldest dumps
+are removed once the directory grows past PROFILING_MAX_BYTES. Staff can
+browse the slowest recent requests at /profiles/.
+"""
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from contextlib import ExitStack
+from pathlib import Path
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_FLAG = '_profile'
+SQL_TEXT_LIMIT = 2000
+STATS_LINES = 60
+
+# cProfile hooks are per thread but only one profile is dumped at a time so
+# a burst of sampled requests can't pile up profiler overhead
+_profile_lock = threading.Lock()
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+class _SQLRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql[:SQL_TEXT_LIMIT],
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request) or not _profile_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            recorder = _SQLRecorder()
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            elapsed = time.perf_counter() - started
+            try:
+                save_profile(request, response, profiler, recorder.queries, elapsed)
+            except OSError as e:
+                logger.error(f"Could not save request profile: {str(e)}")
+            return response
+        finally:
+            _profile_lock.release()
+
+    def should_profile(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.is_staff:
+            if request.META.get(PROFILE_HEADER) == '1' or request.GET.get(PROFILE_QUERY_FLAG) == '1':
+                return True
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        return rate > 0 and random.random() * 100 < rate
+
+
+def save_profile(request, response, profiler, queries, elapsed):
+    """Write the stats dump and metadata for one profiled request"""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = f'{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}'
+
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+
+    stats_text = io.StringIO()
+    pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(STATS_LINES)
+
+    resolver_match = getattr(request, 'resolver_match', None)
+    user = getattr(request, 'user', None)
+    metadata = {
+        'id': profile_id,
+        'created': time.time(),
+        'method': request.method,
+        'path': request.get_full_path()[:500],
+        'view': resolver_match.view_name if resolver_match else None,
+        'user': user.pk if user is not None and user.is_authenticated else None,
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 3),
+        'query_count': len(queries),
+        'query_ms': round(sum(query['ms'] for query in queries), 3),
+        'queries': queries,
+        'stats': stats_text.getvalue(),
+    }
+    (directory / f'{profile_id}.json').write_text(json.dumps(metadata))
+    rotate_profiles(directory)
+    return profile_id
+
+
+def rotate_profiles(directory):
+    """Delete the oldest dumps until the directory fits PROFILING_MAX_BYTES"""
+    limit = getattr(settings, 'PROFILING_MAX_BYTES', 50 * 1024 * 1024)
+    files = sorted(directory.glob('*.*'), key=lambda path: path.name)
+    total = sum(path.stat().st_size for path in files)
+    for path in files:
+        if total <= limit:
+            break
+        total -= path.stat().st_size
+        path.unlink(missing_ok=True)
+
+
+def load_profiles():
+    """Metadata for every stored profile, newest first"""
+    profiles = []
+    for path in sorted(profile_dir().glob('*.json'), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+@staff_member_required
+def profile_list(request):
+    """Slowest recent profiled requests"""
+    profiles = sorted(load_profiles()[:200], key=lambda p: p['duration_ms'], reverse=True)
+    return render(request, 'profiling/profile_list.html', {'profiles': profiles})
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    """Stats, SQL and .prof download for one profiled request"""
+    directory = profile_dir()
+    metadata_path = directory / f'{profile_id}.json'
+    if not metadata_path.is_file():
+        raise Http404('Profile not found')
+
+    if request.GET.get('download') == '1':
+        prof_path = directory / f'{profile_id}.prof'
+        if not prof_path.is_file():
+            raise Http404('Profile not found')
+        return FileResponse(open(prof_path, 'rb'), as_attachment=True, filename=prof_path.name)
+
+    profile = json.loads(metadata_path.read_text())
+    return render(request, 'profiling/profile_detail.html', {'profile': profile})
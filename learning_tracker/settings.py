@@ -12,8 +12,9 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
-import dj_database_url
+import sys
 from dotenv import load_dotenv
+from learning_tracker.db import database_config, replica_config
 
 # Load environment variables
 load_dotenv()
@@ -31,8 +32,10 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '*').split(',')
 
 # YouTube API settings
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
-if not YOUTUBE_API_KEY:
-    raise ValueError("YouTube API key not found in environment variables. Please set YOUTUBE_API_KEY.")
+# Concurrent YouTube API requests one playlist preview may have in flight
+YOUTUBE_PREVIEW_CONCURRENCY = int(os.getenv('YOUTUBE_PREVIEW_CONCURRENCY', 4))
+# A missing key is reported by the playlists.W001 system check; only the
+# views that call the API need it
 
 # Application definition
 INSTALLED_APPS = [
@@ -52,6 +55,7 @@ INSTALLED_APPS = [
     'allauth.socialaccount',
     'corsheaders',
     'rest_framework',
+    'rest_framework.authtoken',
     
     # Local apps
     'users.apps.UsersConfig',
@@ -60,13 +64,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'learning_tracker.metrics.MetricsMiddleware',  # First, so latency covers the whole stack
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Added for static files
+    'learning_tracker.db.replicas.ReplicaPinningMiddleware',  # Before anything that reads or writes
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Added for CORS
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.auth.CachedAuthenticationMiddleware',  # request.user from the cache; see users/auth.py
+    'learning_tracker.profiling.ProfilingMiddleware',  # After auth, to recognise staff users
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -93,12 +100,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'learning_tracker.wsgi.application'
 
 # Database
+# DATABASE_URL selects the database; see learning_tracker/db for the other
+# connection settings read from the environment
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
+# REPLICA_DATABASE_URL adds a read replica for views marked with replica_reads
+if os.getenv('REPLICA_DATABASE_URL'):
+    DATABASES['replica'] = replica_config(BASE_DIR)
+DATABASE_ROUTERS = ['learning_tracker.db.replicas.ReplicaRouter']
+# Seconds a client keeps reading from the primary after it writes
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+# Cache
+# CACHE_BACKEND selects db (default), file or locmem. The db backend needs
+# `python manage.py createcachetable` to be run once; the Procfile's release
+# phase does it.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'db')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', BASE_DIR / 'cache'),
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'learning_tracker_cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'learning-tracker',
+        }
+    }
+
+# The file and db caches are seen by every process (web workers, the
+# reminder scheduler, management commands); locmem only by its own, so it
+# only suits a single process, e.g. runserver. Cached state that other
+# processes invalidate needs a shared cache.
+SHARED_CACHE = CACHE_BACKEND in ('file', 'db')
+
+# Sessions live in signed cookies, so reading one costs no query. The db
+# cache would cost one, which is what cached_db would save; the cache and
+# cached_db engines also need a shared cache (see users/checks.py)
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.signed_cookies')
+
+# Seconds a request user stays cached; saving the user invalidates it early.
+# 0 turns the user cache off, the default without a shared cache
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 300 if SHARED_CACHE else 0))
+
+# Seconds between each web process's checks for progress events to stream
+PROGRESS_POLL_SECONDS = float(os.getenv('PROGRESS_POLL_SECONDS', 1))
+
+# Seconds a per-user dashboard summary stays cached; signals invalidate it early
+DASHBOARD_SUMMARY_TIMEOUT = int(os.getenv('DASHBOARD_SUMMARY_TIMEOUT', 300))
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -141,6 +201,43 @@ else:
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Local WebP copies of YouTube thumbnails, served from THUMBNAIL_URL
+THUMBNAIL_ROOT = Path(os.getenv('THUMBNAIL_ROOT', MEDIA_ROOT / 'thumbnails'))
+THUMBNAIL_URL = '/thumbnails/'
+THUMBNAIL_WIDTHS = (120, 240, 320, 480)
+THUMBNAIL_FETCH_TIMEOUT = 5
+
+# Uploaded profile photos are checked against these limits and turned into
+# square WebP variants of these sizes in the background. Raw uploads wait in
+# PROFILE_PHOTO_UPLOAD_ROOT, which is never served, until then.
+PROFILE_PHOTO_UPLOAD_ROOT = Path(os.getenv('PROFILE_PHOTO_UPLOAD_ROOT', BASE_DIR / 'uploads'))
+PROFILE_PHOTO_SIZES = (48, 128, 256)
+PROFILE_PHOTO_MAX_BYTES = 15 * 1024 * 1024
+PROFILE_PHOTO_MAX_PIXELS = 40_000_000
+
+# Threads per process for work queued with learning_tracker.tasks; EAGER runs it inline
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', 2))
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'False').lower() == 'true'
+
+# Videos removed per DELETE when purging a deleted playlist in the background
+PLAYLIST_PURGE_BATCH_SIZE = int(os.getenv('PLAYLIST_PURGE_BATCH_SIZE', 500))
+
+# Hits returned by a video search
+SEARCH_RESULTS_LIMIT = 50
+
+# Rows fetched per database round trip when streaming a history export
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+# Learning reminders: dotted path of the delivery backend (users.reminders)
+# and users sent per backend call
+REMINDER_BACKEND = os.getenv('REMINDER_BACKEND', 'users.reminders.EmailBackend')
+REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 500))
+
+# Daily goal planning (progress.planning): users planned per batch, and the
+# worker processes plan_daily_goals uses by default
+GOAL_PLANNING_BATCH_SIZE = int(os.getenv('GOAL_PLANNING_BATCH_SIZE', 200))
+GOAL_PLANNING_WORKERS = int(os.getenv('GOAL_PLANNING_WORKERS', 1))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -210,18 +307,52 @@ CORS_ALLOW_CREDENTIALS = True
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        # Mobile clients send "Authorization: Token <key>" from /api/v1/auth-token/
+        'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
+    # Requests per user for each API endpoint's throttle_scope, counted in the default cache
+    'DEFAULT_THROTTLE_RATES': {
+        'api-playlists': os.getenv('API_PLAYLISTS_RATE', '120/min'),
+        'api-videos': os.getenv('API_VIDEOS_RATE', '300/min'),
+        'api-progress': os.getenv('API_PROGRESS_RATE', '120/min'),
+        # Per client IP, since these requests guess passwords
+        'api-token': os.getenv('API_TOKEN_RATE', '10/min'),
+    },
 }
 
+# Bearer token Prometheus uses to scrape /metrics; staff users can always view it
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Request profiling: percent of requests to sample, where dumps go and how
+# much disk they may use before the oldest are deleted
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = Path(os.getenv('PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_MAX_BYTES = int(os.getenv('PROFILING_MAX_BYTES', 50 * 1024 * 1024))
+
 # Email settings for development
 EMAIL_BACKEND = 'django.core.mail.backends.dummy.EmailBackend'  # This will discard all emails
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 DEFAULT_FROM_EMAIL = 'noreply@yourdomain.com'
 
 # Logging Configuration
+# Records go through a queue to a background thread that does the file and
+# console writes. LOG_FORMAT is json (default) or text. LOG_SAMPLE_RATES
+# keeps a fraction of DEBUG/INFO records per logger,
+# e.g. "playlists=0.1,learning_tracker=0.5".
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (
+        part.partition('=') for part in os.getenv('LOG_SAMPLE_RATES', '').split(',') if part.strip()
+    )
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -230,25 +361,55 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'learning_tracker.log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'learning_tracker.log.SamplingFilter',
+            'rates': LOG_SAMPLE_RATES,
+        },
     },
     'handlers': {
         'file': {
             'level': 'DEBUG',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'debug.log',
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+        },
+        'queue': {
+            '()': 'learning_tracker.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'filters': ['sampling'],
         },
     },
     'loggers': {
         'playlists': {
-            'handlers': ['file', 'console'],
-            'level': 'DEBUG',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': True,
+        },
+        'learning_tracker': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
             'propagate': True,
         },
     },
 }
+
+# `manage.py test` neither prints nor writes app log records; tests that
+# expect one check it with assertLogs
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    LOGGING['handlers'] = {'null': {'class': 'logging.NullHandler'}}
+    for logger in LOGGING['loggers'].values():
+        logger['handlers'] = ['null']
+    # The test run is one process, so locmem shares as well as the db cache
+    # would; it keeps cache round trips out of the tests' query counts
+    if CACHE_BACKEND == 'db':
+        CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
@@ -0,0 +1,86 @@
+"""
+Worker startup: what gets imported, how long it takes, and warm-up.
+
+``measure_boot()`` starts a fresh interpreter that boots the app the way a
+worker does (settings, apps, middleware, URLconf) and reports the elapsed
+time, which modules were loaded and, with ``importtime=True``, the
+``-X importtime`` cost of each one. ``warm()`` does the one-off work a
+worker would otherwise do on its first requests; gunicorn.conf.py runs it in
+the master before forking when preload is on.
+"""
+
+from pathlib import Path
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Compiled once into the cached template loader, then shared by forked workers
+WARM_TEMPLATES = [
+    'base.html',
+    'users/dashboard.html',
+    'playlists/playlist_detail.html',
+    'playlists/playlist_list.html',
+]
+
+BOOT_SCRIPT = '''
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'learning_tracker.settings')
+from learning_tracker.asgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))
+'''
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from ``-X importtime`` output"""
+    costs = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        costs[name.strip()] = (int(self_us), int(cumulative_us))
+    return costs
+
+
+def measure_boot(importtime=False, env=None):
+    """Boot the app in a new interpreter and report what it cost"""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', BOOT_SCRIPT]
+    result = subprocess.run(
+        command, cwd=BASE_DIR, env={**os.environ, **(env or {})},
+        capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['imports'] = parse_importtime(result.stderr) if importtime else {}
+    return report
+
+
+def warm():
+    """Load what every worker needs before the first request; returns timings in ms"""
+    from django.db import connections
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+    from playlists import youtube
+
+    timings = {}
+
+    def step(name, func):
+        started = time.perf_counter()
+        func()
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    step('urlconf', lambda: get_resolver().url_patterns)
+    step('youtube', youtube.warm)
+    step('templates', lambda: [get_template(name) for name in WARM_TEMPLATES])
+    # Connections must not be shared with forked workers
+    connections.close_all()
+    return timings
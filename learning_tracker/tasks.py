@@ -0,0 +1,63 @@
+"""
+Background work that shouldn't hold up a request.
+
+``run_in_background`` queues a function on a small thread pool in the web
+process once the current transaction commits, so the task sees the rows the
+request wrote. Each task closes its own database connections when it
+finishes. With BACKGROUND_TASKS_EAGER the function runs inline instead,
+which is what tests and management commands want.
+
+Tasks are lost if the process exits, so every task here must be safe to
+re-run from a management command.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+                thread_name_prefix='background-task',
+            )
+        return _executor
+
+
+def _reset_after_fork():
+    # Pool threads don't survive fork; children start their own on first use
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {func.__module__}.{func.__qualname__} failed")
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` off the request thread after commit"""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        return func(*args, **kwargs)
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
@@ -0,0 +1,153 @@
+"""
+Query-count and latency budgets for views.
+
+ViewBudgetTestCase seeds two users, one with a handful of videos and one
+with a few hundred, and runs a view once as each. The view must stay within
+its declared number of queries, must issue the same number for both users
+(a count that grows with the data is an N+1), and must answer within
+VIEW_LATENCY_BUDGET_MS. The cache is cleared before each measured request,
+so the counts are for a cold cache.
+"""
+
+from datetime import timedelta
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from playlists.models import Playlist, Video, VideoDetails, VideoMetadata
+from progress.models import DailyGoal, LearningSession, LearningStreak
+import os
+import time
+
+# (playlists, videos per playlist, days of history)
+DATA_SIZES = {
+    'small': (1, 5, 3),
+    'large': (6, 120, 60),
+}
+
+# Generous: the test database is tiny; this catches pathological regressions
+LATENCY_BUDGET_MS = float(os.getenv('VIEW_LATENCY_BUDGET_MS', 750))
+
+
+# Client tests pass whatever DEBUG is: no HTTPS redirect, and static files
+# served from the finders without the STATIC_ROOT collectstatic writes
+CLIENT_TEST_SETTINGS = {
+    'SECURE_SSL_REDIRECT': False,
+    'STATICFILES_STORAGE': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    'WHITENOISE_AUTOREFRESH': True,
+}
+
+METADATA_FIELDS = ('youtube_id', 'title', 'thumbnail_url', 'duration')
+
+
+def create_videos(playlist, videos):
+    """bulk_create a playlist's videos, like the importer, from dicts of fields
+
+    Each dict mixes VideoMetadata fields with Video ones (position,
+    is_completed, ...); a ``description`` also creates the VideoDetails row.
+    Known YouTube ids reuse their existing metadata, as imports do.
+    """
+    known = VideoMetadata.objects.in_bulk([video['youtube_id'] for video in videos], field_name='youtube_id')
+    fresh = [video for video in videos if video['youtube_id'] not in known]
+    created = VideoMetadata.objects.bulk_create([
+        VideoMetadata(**{field: video[field] for field in METADATA_FIELDS}) for video in fresh
+    ])
+    VideoDetails.objects.bulk_create([
+        VideoDetails(metadata=row, description=video['description'])
+        for row, video in zip(created, fresh) if 'description' in video
+    ])
+    known.update((row.youtube_id, row) for row in created)
+    metadata = [known[video['youtube_id']] for video in videos]
+    return Video.objects.bulk_create([
+        Video(playlist=playlist, metadata=row, **{
+            field: value for field, value in video.items() if field not in METADATA_FIELDS + ('description',)
+        })
+        for row, video in zip(metadata, videos)
+    ])
+
+
+def seed_learner(name, playlist_count, videos_per_playlist, history_days):
+    """Create a user with playlists, part-completed videos and goal history"""
+    now = timezone.now()
+    today = now.date()
+    user = get_user_model().objects.create_user(
+        username=f'budget-{name}', email=f'budget-{name}@example.com', password='pass12345'
+    )
+    playlists = []
+    for p in range(playlist_count):
+        playlist = Playlist.objects.create(
+            user=user,
+            youtube_id=f'PL-budget-{name}-{p}',
+            title=f'{name.title()} course {p}',
+            thumbnail_url='https://example.com/p.jpg',
+            video_count=videos_per_playlist,
+            start_date=today - timedelta(days=history_days),
+        )
+        completed = videos_per_playlist // 2
+        playlist.next_position = completed
+        playlist.save(update_fields=['next_position'])
+        create_videos(playlist, [
+            dict(
+                youtube_id=f'budget-{name}-{p}-{i}',
+                title=f'Video {i}',
+                thumbnail_url='https://example.com/v.jpg',
+                duration=timedelta(minutes=5 + i % 20),
+                position=i,
+                is_completed=i < completed,
+                completed_at=now - timedelta(days=i % history_days) if i < completed else None,
+            )
+            for i in range(videos_per_playlist)
+        ])
+        playlists.append(playlist)
+
+    DailyGoal.objects.bulk_create([
+        DailyGoal(user=user, date=today - timedelta(days=d), videos_planned=3, videos_completed=d % 4)
+        for d in range(history_days)
+    ])
+    LearningSession.objects.bulk_create([
+        LearningSession(user=user, date=today - timedelta(days=d), videos_completed=2)
+        for d in range(history_days)
+    ])
+    LearningStreak.objects.create(user=user, current_streak=2, longest_streak=5, last_activity_date=today)
+
+    playlist = playlists[0]
+    return SimpleNamespace(
+        user=user,
+        playlist=playlist,
+        video=playlist.video_set.filter(is_completed=False).order_by('position').first(),
+    )
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class ViewBudgetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.learners = {
+            name: seed_learner(name, *size) for name, size in DATA_SIZES.items()
+        }
+
+    def measure(self, learner, method, url, data=None):
+        self.client.force_login(learner.user)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        return response, len(queries), elapsed_ms
+
+    def assertViewBudget(self, url, max_queries, method='get', data=None, status=200):
+        """Check a view at every data size; ``url`` is a callable taking the learner"""
+        counts = {}
+        for name, learner in self.learners.items():
+            response, count, elapsed_ms = self.measure(learner, method, url(learner), data)
+            self.assertEqual(response.status_code, status, f'{name}: unexpected status')
+            self.assertLessEqual(count, max_queries, f'{name}: {count} queries, budget is {max_queries}')
+            self.assertLessEqual(
+                elapsed_ms, LATENCY_BUDGET_MS,
+                f'{name}: {elapsed_ms:.0f} ms, budget is {LATENCY_BUDGET_MS:.0f} ms',
+            )
+            counts[name] = count
+        self.assertEqual(len(set(counts.values())), 1, f'Query count grows with the data: {counts}')
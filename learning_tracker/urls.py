@@ -19,6 +19,19 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from learning_tracker.api import ObtainToken
+from learning_tracker.metrics import metrics_view
+from rest_framework.routers import DefaultRouter
+from playlists.api import PlaylistViewSet, VideoViewSet
+from progress.api import DailyGoalViewSet, StreakViewSet
+from learning_tracker.profiling import profile_detail, profile_list
+from playlists.thumbnails import thumbnail_view
+
+api = DefaultRouter()
+api.register('playlists', PlaylistViewSet, basename='playlist')
+api.register(r'playlists/(?P<playlist_pk>\d+)/videos', VideoViewSet, basename='video')
+api.register('goals', DailyGoalViewSet, basename='goal')
+api.register('streak', StreakViewSet, basename='streak')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,6 +39,13 @@ urlpatterns = [
     path('', include('users.urls')),
     path('playlists/', include('playlists.urls')),
     path('progress/', include('progress.urls')),
+    # Versioned REST API; see learning_tracker/api.py
+    path('api/<str:version>/auth-token/', ObtainToken.as_view(), name='api_auth_token'),
+    path('api/<str:version>/', include((api.urls, 'api'))),
+    path('metrics', metrics_view, name='metrics'),
+    path('profiles/', profile_list, name='profile_list'),
+    path('profiles/<slug:profile_id>/', profile_detail, name='profile_detail'),
+    path('thumbnails/<str:name>', thumbnail_view, name='thumbnail'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,76 @@
+from django.db.models import Count, Q, Sum
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, serializers
+from learning_tracker.api import APIViewSet, Seconds, SparseFieldsetSerializer
+from .models import Playlist, Video
+
+METADATA_FIELDS = ('youtube_id', 'title', 'thumbnail_url', 'duration')
+
+
+class PlaylistSerializer(SparseFieldsetSerializer):
+    completed_count = serializers.IntegerField(read_only=True)
+    progress = serializers.SerializerMethodField()
+    total_duration = Seconds()
+
+    class Meta:
+        model = Playlist
+        fields = [
+            'id', 'youtube_id', 'title', 'description', 'thumbnail_url', 'video_count',
+            'completed_count', 'progress', 'total_duration', 'target_completion_days',
+            'start_date', 'next_position', 'created_at',
+        ]
+
+    def get_progress(self, playlist):
+        return round(playlist.get_progress_percentage(playlist.completed_count), 1)
+
+
+class VideoSerializer(SparseFieldsetSerializer):
+    # Read through Video's properties from the shared metadata
+    youtube_id = serializers.CharField(read_only=True)
+    title = serializers.CharField(read_only=True)
+    thumbnail_url = serializers.CharField(read_only=True)
+    duration = Seconds()
+    description = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Video
+        fields = [
+            'id', 'playlist', 'position', 'youtube_id', 'title', 'thumbnail_url',
+            'duration', 'description', 'is_completed', 'completed_at',
+        ]
+
+
+class PlaylistViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, APIViewSet):
+    """The user's playlists, newest first, with completion counts and total duration"""
+    serializer_class = PlaylistSerializer
+    throttle_scope = 'api-playlists'
+    ordering = ('-id',)
+
+    def get_queryset(self):
+        playlists = Playlist.objects.visible().filter(user=self.request.user)
+        if not self.wants('description'):
+            playlists = playlists.defer('description')
+        if self.wants('completed_count') or self.wants('progress'):
+            playlists = playlists.annotate(completed_count=Count('video', filter=Q(video__is_completed=True)))
+        if self.wants('total_duration'):
+            playlists = playlists.annotate(total_duration=Sum('video__metadata__duration'))
+        return playlists
+
+
+class VideoViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, APIViewSet):
+    """A playlist's videos in position order"""
+    serializer_class = VideoSerializer
+    throttle_scope = 'api-videos'
+    ordering = ('position',)
+
+    def get_queryset(self):
+        # Another user's or a deleted playlist is a 404, not an empty page
+        playlist = get_object_or_404(
+            Playlist.objects.visible(), pk=self.kwargs['playlist_pk'], user=self.request.user
+        )
+        videos = Video.objects.filter(playlist=playlist)
+        if self.wants('description'):
+            videos = videos.select_related('metadata__details')
+        elif any(self.wants(field) for field in METADATA_FIELDS):
+            videos = videos.with_metadata()
+        return videos
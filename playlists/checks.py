@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def youtube_api_key_check(app_configs, **kwargs):
+    if getattr(settings, 'YOUTUBE_API_KEY', None):
+        return []
+    return [Warning(
+        'YOUTUBE_API_KEY is not set.',
+        hint='Importing and previewing playlists will fail until it is set in the environment.',
+        id='playlists.W001',
+    )]
@@ -0,0 +1,67 @@
+"""
+Deleting playlists without one long cascade.
+
+``Playlist.delete()`` makes Django's collector load every video before
+deleting them in a single transaction, which holds the SQLite write lock for
+seconds on a large course. Instead, the view hides the playlist
+(``Playlist.hide()``) and queues ``purge_playlist``, which removes the videos
+in batches of PLAYLIST_PURGE_BATCH_SIZE, each one a single DELETE in its
+own transaction, and deletes the empty playlist at the end. Other writers get
+the lock between batches. Progress is logged as ``playlist_purge_progress``
+events and completion as ``playlist_purged``.
+"""
+
+from django.conf import settings
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def purge_batch_size():
+    return getattr(settings, 'PLAYLIST_PURGE_BATCH_SIZE', 500)
+
+
+def purge_playlist(playlist_id, batch_size=None):
+    """Background task: delete a hidden playlist's videos in batches, then the playlist
+
+    Returns the number of videos deleted, or None when the playlist is gone
+    or wasn't hidden. Safe to re-run after an interruption.
+    """
+    from .models import Playlist, Video
+
+    playlist = Playlist.objects.filter(pk=playlist_id, deleted_at__isnull=False).first()
+    if playlist is None:
+        return None
+
+    batch_size = batch_size or purge_batch_size()
+    started = time.perf_counter()
+    videos = Video.objects.filter(playlist_id=playlist_id)
+    total = videos.count()
+    deleted = batches = 0
+    while True:
+        ids = list(videos.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Nothing cascades from videos and no delete signals listen to them, so
+        # the collector fast-deletes the batch with one DELETE and loads no rows.
+        # Their shared VideoMetadata stays for other playlists and re-imports
+        deleted += Video.objects.filter(pk__in=ids).delete()[0]
+        batches += 1
+        logger.info("Purging playlist", extra={
+            'event': 'playlist_purge_progress',
+            'playlist': playlist_id,
+            'deleted': deleted,
+            'total': total,
+        })
+
+    playlist.delete()
+    logger.info("Playlist purged", extra={
+        'event': 'playlist_purged',
+        'playlist': playlist_id,
+        'user': playlist.user_id,
+        'videos': deleted,
+        'batches': batches,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000),
+    })
+    return deleted
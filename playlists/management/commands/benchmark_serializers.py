@@ -0,0 +1,79 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from playlists.api import VideoSerializer
+from playlists.models import Video, VideoDetails, VideoMetadata
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = 'Measure how long the API spends serializing and rendering large video lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--videos', type=int, default=500, help='Videos per list; the largest API page is 500')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        # Unsaved rows with their metadata attached, so only serializing is timed
+        videos = self.make_videos(options['videos'])
+        factory = APIRequestFactory()
+        modes = [
+            ('hand-built dicts', lambda: [self.as_dict(video) for video in videos]),
+            ('VideoSerializer', self.serializer(videos, factory.get('/'))),
+            ('?fields=id,position,is_completed', self.serializer(videos, factory.get('/?fields=id,position,is_completed'))),
+            ('?fields=id,title,duration', self.serializer(videos, factory.get('/?fields=id,title,duration'))),
+        ]
+        renderer = JSONRenderer()
+        for label, serialize in modes:
+            times = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                renderer.render(serialize())
+                times.append(time.perf_counter() - started)
+            elapsed = statistics.median(times)
+            self.stdout.write(
+                f'{label:<34} {elapsed * 1000:8.2f} ms per {len(videos)} videos  '
+                f'{elapsed / len(videos) * 1e6:6.1f} us per video'
+            )
+
+    def make_videos(self, count):
+        now = timezone.now()
+        videos = []
+        for position in range(count):
+            metadata = VideoMetadata(
+                pk=position + 1,
+                youtube_id=f'bench{position}',
+                title=f'Lecture {position + 1}',
+                thumbnail_url=f'https://i.ytimg.com/vi/bench{position}/hqdefault.jpg',
+                duration=timedelta(seconds=600 + position),
+            )
+            metadata.details = VideoDetails(metadata=metadata, description='Lecture notes. ' * 20)
+            completed = position % 3 == 0
+            videos.append(Video(
+                pk=position + 1, playlist_id=1, metadata=metadata, position=position,
+                is_completed=completed, completed_at=now if completed else None,
+            ))
+        return videos
+
+    def serializer(self, videos, request):
+        context = {'request': Request(request)}
+        return lambda: VideoSerializer(videos, many=True, context=context).data
+
+    def as_dict(self, video):
+        """The shape the hand-built JsonResponse views would produce"""
+        return {
+            'id': video.pk,
+            'playlist': video.playlist_id,
+            'position': video.position,
+            'youtube_id': video.youtube_id,
+            'title': video.title,
+            'thumbnail_url': video.thumbnail_url,
+            'duration': int(video.duration.total_seconds()),
+            'description': video.description,
+            'is_completed': video.is_completed,
+            'completed_at': video.completed_at.isoformat() if video.completed_at else None,
+        }
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from playlists.models import Playlist, VideoMetadata
+from playlists.thumbnails import cache_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Download and resize every playlist and video thumbnail that is not cached locally yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many source URLs')
+
+    def handle(self, *args, **options):
+        urls = list(Playlist.objects.values_list('thumbnail_url', flat=True).distinct())
+        urls += VideoMetadata.objects.values_list('thumbnail_url', flat=True).distinct()
+        urls = list(dict.fromkeys(urls))[:options['limit']]
+        cached, failed = cache_thumbnails(urls)
+        self.stdout.write(self.style.SUCCESS(f'{cached} thumbnails cached, {failed} failed'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from playlists.deletion import purge_playlist
+from playlists.models import Playlist
+
+
+class Command(BaseCommand):
+    help = 'Finish deleting playlists that were hidden but whose background purge never completed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Videos per DELETE')
+
+    def handle(self, *args, **options):
+        pending = list(Playlist.objects.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+        videos = 0
+        for playlist_id in pending:
+            videos += purge_playlist(playlist_id, batch_size=options['batch_size']) or 0
+        self.stdout.write(self.style.SUCCESS(f'{len(pending)} playlists purged ({videos} videos)'))
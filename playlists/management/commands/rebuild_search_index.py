@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from playlists.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Re-create the video full-text index and re-index every video'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not rebuild_index(connection):
+            raise CommandError(f'No full-text index for {connection.vendor}')
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt on {connection.vendor}'))
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['playlist', 'position'], name='video_playlist_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['playlist', 'is_completed', 'position'], name='video_playlist_done_pos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['playlist', 'completed_at'], name='video_completed_at_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0002_video_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# The SQL is copied rather than imported from playlists.search so that this
+# migration keeps creating the index for the schema it was written against
+
+SQLITE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS playlists_video_fts USING fts5(
+        title, description, owner,
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_insert AFTER INSERT ON playlists_video BEGIN
+        INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT new.id, new.title, new.description, 'u' || user_id FROM playlists_playlist WHERE id = new.playlist_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_delete AFTER DELETE ON playlists_video BEGIN
+        DELETE FROM playlists_video_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_update AFTER UPDATE OF title, description ON playlists_video BEGIN
+        UPDATE playlists_video_fts SET title = new.title, description = new.description WHERE rowid = new.id;
+    END""",
+    "DELETE FROM playlists_video_fts",
+    """INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT v.id, v.title, v.description, 'u' || p.user_id
+        FROM playlists_video v JOIN playlists_playlist p ON p.id = v.playlist_id""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS playlists_video_fts_insert",
+    "DROP TRIGGER IF EXISTS playlists_video_fts_delete",
+    "DROP TRIGGER IF EXISTS playlists_video_fts_update",
+    "DROP TABLE IF EXISTS playlists_video_fts",
+]
+
+POSTGRES = [
+    """ALTER TABLE playlists_video ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS video_search_vector_idx ON playlists_video USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS video_search_vector_idx",
+    "ALTER TABLE playlists_video DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement, params=None)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0003_playlist_deleted_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE, 'postgresql': POSTGRES}),
+            run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
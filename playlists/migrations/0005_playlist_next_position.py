@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:23
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_next_position(apps, schema_editor):
+    Playlist = apps.get_model('playlists', 'Playlist')
+    Video = apps.get_model('playlists', 'Video')
+    first_incomplete = Video.objects.filter(
+        playlist=OuterRef('pk'), is_completed=False,
+    ).order_by('position').values('position')[:1]
+    Playlist.objects.update(next_position=Subquery(first_incomplete))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0004_video_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='next_position',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_next_position, migrations.RunPython.noop),
+    ]
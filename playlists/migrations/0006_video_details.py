@@ -0,0 +1,154 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The SQL is copied rather than imported from playlists.search so that this
+# migration keeps creating the index for the schema it was written against
+
+COPY_DESCRIPTIONS = """INSERT INTO playlists_videodetails (video_id, description)
+    SELECT id, description FROM playlists_video"""
+
+RESTORE_DESCRIPTIONS = """UPDATE playlists_video SET description = coalesce(
+    (SELECT description FROM playlists_videodetails WHERE video_id = playlists_video.id), '')"""
+
+# The index of 0004 reads playlists_video.description, which SQLite and
+# PostgreSQL won't drop while a trigger or generated column refers to it
+OLD_SQLITE = [
+    "DROP TRIGGER IF EXISTS playlists_video_fts_insert",
+    "DROP TRIGGER IF EXISTS playlists_video_fts_delete",
+    "DROP TRIGGER IF EXISTS playlists_video_fts_update",
+]
+
+OLD_SQLITE_REVERSE = [
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_insert AFTER INSERT ON playlists_video BEGIN
+        INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT new.id, new.title, new.description, 'u' || user_id FROM playlists_playlist WHERE id = new.playlist_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_delete AFTER DELETE ON playlists_video BEGIN
+        DELETE FROM playlists_video_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_update AFTER UPDATE OF title, description ON playlists_video BEGIN
+        UPDATE playlists_video_fts SET title = new.title, description = new.description WHERE rowid = new.id;
+    END""",
+]
+
+OLD_POSTGRES = [
+    "DROP INDEX IF EXISTS video_search_vector_idx",
+    "ALTER TABLE playlists_video DROP COLUMN IF EXISTS search_vector",
+]
+
+OLD_POSTGRES_REVERSE = [
+    """ALTER TABLE playlists_video ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS video_search_vector_idx ON playlists_video USING GIN (search_vector)",
+]
+
+# The FTS rows keep their rowids and text, so only the triggers change
+SQLITE = [
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_insert AFTER INSERT ON playlists_videodetails BEGIN
+        INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT v.id, v.title, new.description, 'u' || p.user_id
+        FROM playlists_video v JOIN playlists_playlist p ON p.id = v.playlist_id WHERE v.id = new.video_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_update AFTER UPDATE OF description ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = new.description WHERE rowid = new.video_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_delete AFTER DELETE ON playlists_videodetails BEGIN
+        DELETE FROM playlists_video_fts WHERE rowid = old.video_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_update AFTER UPDATE OF title ON playlists_video BEGIN
+        UPDATE playlists_video_fts SET title = new.title WHERE rowid = new.id;
+    END""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_insert",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_update",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_delete",
+    "DROP TRIGGER IF EXISTS playlists_video_fts_update",
+]
+
+POSTGRES = [
+    "ALTER TABLE playlists_videodetails ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION playlists_video_search_vector(title text, description text)
+        RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+            SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                   setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        $$""",
+    """CREATE OR REPLACE FUNCTION playlists_videodetails_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := playlists_video_search_vector(
+                (SELECT title FROM playlists_video WHERE id = NEW.video_id), NEW.description
+            );
+            RETURN NEW;
+        END
+        $$""",
+    """CREATE OR REPLACE FUNCTION playlists_video_title_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE playlists_videodetails SET search_vector = playlists_video_search_vector(NEW.title, description)
+            WHERE video_id = NEW.id;
+            RETURN NULL;
+        END
+        $$""",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_search ON playlists_videodetails",
+    """CREATE TRIGGER playlists_videodetails_search BEFORE INSERT OR UPDATE OF description ON playlists_videodetails
+        FOR EACH ROW EXECUTE FUNCTION playlists_videodetails_search_trigger()""",
+    "DROP TRIGGER IF EXISTS playlists_video_title_search ON playlists_video",
+    """CREATE TRIGGER playlists_video_title_search AFTER UPDATE OF title ON playlists_video
+        FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+        EXECUTE FUNCTION playlists_video_title_search_trigger()""",
+    """UPDATE playlists_videodetails d SET search_vector = playlists_video_search_vector(v.title, d.description)
+        FROM playlists_video v WHERE v.id = d.video_id""",
+    "CREATE INDEX IF NOT EXISTS video_search_vector_idx ON playlists_videodetails USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS video_search_vector_idx",
+    "DROP TRIGGER IF EXISTS playlists_video_title_search ON playlists_video",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_search ON playlists_videodetails",
+    "DROP FUNCTION IF EXISTS playlists_video_title_search_trigger()",
+    "DROP FUNCTION IF EXISTS playlists_videodetails_search_trigger()",
+    "DROP FUNCTION IF EXISTS playlists_video_search_vector(text, text)",
+    "ALTER TABLE playlists_videodetails DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement, params=None)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0005_playlist_next_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoDetails',
+            fields=[
+                ('video', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='details', serialize=False, to='playlists.video')),
+                ('description', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunSQL(COPY_DESCRIPTIONS, RESTORE_DESCRIPTIONS),
+        migrations.RunPython(
+            run({'sqlite': OLD_SQLITE, 'postgresql': OLD_POSTGRES}),
+            run({'sqlite': OLD_SQLITE_REVERSE, 'postgresql': OLD_POSTGRES_REVERSE}),
+        ),
+        migrations.RemoveField(
+            model_name='video',
+            name='description',
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE, 'postgresql': POSTGRES}),
+            run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,273 @@
+# Generated by Django 4.2.16 on 2026-10-19 08:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The SQL is copied rather than imported from playlists.search so that this
+# migration keeps creating the index for the schema it was written against
+
+# The most recent copy of each video's metadata becomes the shared row
+FILL_METADATA = [
+    """INSERT INTO playlists_videometadata (youtube_id, title, thumbnail_url, duration)
+        SELECT youtube_id, title, thumbnail_url, duration FROM playlists_video
+        WHERE id IN (SELECT max(id) FROM playlists_video GROUP BY youtube_id)""",
+    """UPDATE playlists_video SET metadata_id = (
+        SELECT id FROM playlists_videometadata m WHERE m.youtube_id = playlists_video.youtube_id)""",
+]
+
+RESTORE_METADATA = [
+    """UPDATE playlists_video SET
+        youtube_id = (SELECT youtube_id FROM playlists_videometadata m WHERE m.id = playlists_video.metadata_id),
+        title = (SELECT title FROM playlists_videometadata m WHERE m.id = playlists_video.metadata_id),
+        thumbnail_url = (SELECT thumbnail_url FROM playlists_videometadata m WHERE m.id = playlists_video.metadata_id),
+        duration = (SELECT duration FROM playlists_videometadata m WHERE m.id = playlists_video.metadata_id)""",
+]
+
+FILL_DETAILS = """INSERT INTO playlists_videodetails (metadata_id, description)
+    SELECT v.metadata_id, d.description FROM playlists_oldvideodetails d
+    JOIN playlists_video v ON v.id = d.video_id
+    WHERE v.id IN (
+        SELECT max(v2.id) FROM playlists_video v2
+        JOIN playlists_oldvideodetails d2 ON d2.video_id = v2.id
+        GROUP BY v2.metadata_id
+    )"""
+
+RESTORE_DETAILS = """INSERT INTO playlists_oldvideodetails (video_id, description)
+    SELECT v.id, d.description FROM playlists_videodetails d
+    JOIN playlists_video v ON v.metadata_id = d.metadata_id"""
+
+# The index of 0006 reads the columns and tables replaced here
+OLD_SQLITE = [
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_insert",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_update",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_delete",
+    "DROP TRIGGER IF EXISTS playlists_video_fts_update",
+]
+
+OLD_SQLITE_REVERSE = [
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_insert AFTER INSERT ON playlists_videodetails BEGIN
+        INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT v.id, v.title, new.description, 'u' || p.user_id
+        FROM playlists_video v JOIN playlists_playlist p ON p.id = v.playlist_id WHERE v.id = new.video_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_update AFTER UPDATE OF description ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = new.description WHERE rowid = new.video_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_delete AFTER DELETE ON playlists_videodetails BEGIN
+        DELETE FROM playlists_video_fts WHERE rowid = old.video_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_update AFTER UPDATE OF title ON playlists_video BEGIN
+        UPDATE playlists_video_fts SET title = new.title WHERE rowid = new.id;
+    END""",
+    "DELETE FROM playlists_video_fts",
+    """INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT v.id, v.title, d.description, 'u' || p.user_id
+        FROM playlists_videodetails d
+        JOIN playlists_video v ON v.id = d.video_id
+        JOIN playlists_playlist p ON p.id = v.playlist_id""",
+]
+
+OLD_POSTGRES = [
+    "DROP INDEX IF EXISTS video_search_vector_idx",
+    "DROP TRIGGER IF EXISTS playlists_video_title_search ON playlists_video",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_search ON playlists_videodetails",
+    "DROP FUNCTION IF EXISTS playlists_video_title_search_trigger()",
+    "DROP FUNCTION IF EXISTS playlists_videodetails_search_trigger()",
+    "ALTER TABLE playlists_videodetails DROP COLUMN IF EXISTS search_vector",
+]
+
+OLD_POSTGRES_REVERSE = [
+    "ALTER TABLE playlists_videodetails ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION playlists_videodetails_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := playlists_video_search_vector(
+                (SELECT title FROM playlists_video WHERE id = NEW.video_id), NEW.description
+            );
+            RETURN NEW;
+        END
+        $$""",
+    """CREATE OR REPLACE FUNCTION playlists_video_title_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE playlists_videodetails SET search_vector = playlists_video_search_vector(NEW.title, description)
+            WHERE video_id = NEW.id;
+            RETURN NULL;
+        END
+        $$""",
+    """CREATE TRIGGER playlists_videodetails_search BEFORE INSERT OR UPDATE OF description ON playlists_videodetails
+        FOR EACH ROW EXECUTE FUNCTION playlists_videodetails_search_trigger()""",
+    """CREATE TRIGGER playlists_video_title_search AFTER UPDATE OF title ON playlists_video
+        FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+        EXECUTE FUNCTION playlists_video_title_search_trigger()""",
+    """UPDATE playlists_videodetails d SET search_vector = playlists_video_search_vector(v.title, d.description)
+        FROM playlists_video v WHERE v.id = d.video_id""",
+    "CREATE INDEX IF NOT EXISTS video_search_vector_idx ON playlists_videodetails USING GIN (search_vector)",
+]
+
+# Each playlist position keeps its own FTS row, with the owner token, so a
+# search still only walks the searching user's part of the index
+SQLITE = [
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_insert AFTER INSERT ON playlists_video BEGIN
+        INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT new.id, m.title, coalesce(d.description, ''), 'u' || p.user_id
+        FROM playlists_videometadata m
+        JOIN playlists_playlist p ON p.id = new.playlist_id
+        LEFT JOIN playlists_videodetails d ON d.metadata_id = m.id
+        WHERE m.id = new.metadata_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_delete AFTER DELETE ON playlists_video BEGIN
+        DELETE FROM playlists_video_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videometadata_fts_update AFTER UPDATE OF title ON playlists_videometadata BEGIN
+        UPDATE playlists_video_fts SET title = new.title
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_insert AFTER INSERT ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = new.description
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = new.metadata_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_update AFTER UPDATE OF description ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = new.description
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = new.metadata_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_delete AFTER DELETE ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = ''
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = old.metadata_id);
+    END""",
+    "DELETE FROM playlists_video_fts",
+    """INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT v.id, m.title, coalesce(d.description, ''), 'u' || p.user_id
+        FROM playlists_video v
+        JOIN playlists_videometadata m ON m.id = v.metadata_id
+        JOIN playlists_playlist p ON p.id = v.playlist_id
+        LEFT JOIN playlists_videodetails d ON d.metadata_id = m.id""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS playlists_video_fts_insert",
+    "DROP TRIGGER IF EXISTS playlists_video_fts_delete",
+    "DROP TRIGGER IF EXISTS playlists_videometadata_fts_update",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_insert",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_update",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_fts_delete",
+]
+
+# The vector lives with the description, once per YouTube video
+POSTGRES = [
+    "ALTER TABLE playlists_videodetails ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION playlists_videodetails_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := playlists_video_search_vector(
+                (SELECT title FROM playlists_videometadata WHERE id = NEW.metadata_id), NEW.description
+            );
+            RETURN NEW;
+        END
+        $$""",
+    """CREATE OR REPLACE FUNCTION playlists_videometadata_title_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE playlists_videodetails SET search_vector = playlists_video_search_vector(NEW.title, description)
+            WHERE metadata_id = NEW.id;
+            RETURN NULL;
+        END
+        $$""",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_search ON playlists_videodetails",
+    """CREATE TRIGGER playlists_videodetails_search BEFORE INSERT OR UPDATE OF description ON playlists_videodetails
+        FOR EACH ROW EXECUTE FUNCTION playlists_videodetails_search_trigger()""",
+    "DROP TRIGGER IF EXISTS playlists_videometadata_title_search ON playlists_videometadata",
+    """CREATE TRIGGER playlists_videometadata_title_search AFTER UPDATE OF title ON playlists_videometadata
+        FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+        EXECUTE FUNCTION playlists_videometadata_title_search_trigger()""",
+    """UPDATE playlists_videodetails d SET search_vector = playlists_video_search_vector(m.title, d.description)
+        FROM playlists_videometadata m WHERE m.id = d.metadata_id""",
+    "CREATE INDEX IF NOT EXISTS video_search_vector_idx ON playlists_videodetails USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS video_search_vector_idx",
+    "DROP TRIGGER IF EXISTS playlists_videometadata_title_search ON playlists_videometadata",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_search ON playlists_videodetails",
+    "DROP FUNCTION IF EXISTS playlists_videometadata_title_search_trigger()",
+    "DROP FUNCTION IF EXISTS playlists_videodetails_search_trigger()",
+    "ALTER TABLE playlists_videodetails DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement, params=None)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0006_video_details'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': OLD_SQLITE, 'postgresql': OLD_POSTGRES}),
+            run({'sqlite': OLD_SQLITE_REVERSE, 'postgresql': OLD_POSTGRES_REVERSE}),
+        ),
+        migrations.CreateModel(
+            name='VideoMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('youtube_id', models.CharField(max_length=100, unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('thumbnail_url', models.URLField()),
+                ('duration', models.DurationField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='metadata',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='playlists.videometadata'),
+        ),
+        # Nullable while the columns are removed, so the reverse can re-add
+        # them to a filled table before RESTORE_METADATA runs
+        migrations.AlterField(
+            model_name='video',
+            name='youtube_id',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='title',
+            field=models.CharField(max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='thumbnail_url',
+            field=models.URLField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='duration',
+            field=models.DurationField(null=True),
+        ),
+        migrations.RunSQL(FILL_METADATA, RESTORE_METADATA),
+        migrations.RenameModel('VideoDetails', 'OldVideoDetails'),
+        migrations.CreateModel(
+            name='VideoDetails',
+            fields=[
+                ('metadata', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='details', serialize=False, to='playlists.videometadata')),
+                ('description', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunSQL(FILL_DETAILS, RESTORE_DETAILS),
+        migrations.DeleteModel('OldVideoDetails'),
+        migrations.RemoveField(model_name='video', name='youtube_id'),
+        migrations.RemoveField(model_name='video', name='title'),
+        migrations.RemoveField(model_name='video', name='thumbnail_url'),
+        migrations.RemoveField(model_name='video', name='duration'),
+        migrations.AlterField(
+            model_name='video',
+            name='metadata',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='playlists.videometadata'),
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE, 'postgresql': POSTGRES}),
+            run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# video_playlist_position_idx and video_playlist_done_pos_idx both lead with
+# playlist_id, so the foreign key's own index only costs writes. On SQLite an
+# AlterField rebuilds the table and drops the search triggers, so the index
+# is dropped directly and only the state goes through AlterField.
+
+
+def playlist_indexes(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        constraints = schema_editor.connection.introspection.get_constraints(cursor, 'playlists_video')
+    return [
+        name for name, info in constraints.items()
+        if info['index'] and info['columns'] == ['playlist_id'] and not (info['unique'] or info['primary_key'])
+    ]
+
+
+def drop_playlist_index(apps, schema_editor):
+    for name in playlist_indexes(schema_editor):
+        schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(name)}')
+
+
+def restore_playlist_index(apps, schema_editor):
+    if not playlist_indexes(schema_editor):
+        schema_editor.execute('CREATE INDEX playlists_video_playlist_id_idx ON playlists_video (playlist_id)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0007_video_metadata'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_playlist_index, restore_playlist_index),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='video',
+                    name='playlist',
+                    field=models.ForeignKey(
+                        db_index=False, on_delete=django.db.models.deletion.CASCADE, to='playlists.playlist'
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,7 +1,13 @@
 from django.db import models
 from django.conf import settings
+from django.db.models import F, OuterRef, Q, Subquery, Sum
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+
+class PlaylistQuerySet(models.QuerySet):
+    def visible(self):
+        """Playlists that haven't been deleted; hidden ones wait for purge_playlist"""
+        return self.filter(deleted_at__isnull=True)
 
 class Playlist(models.Model):
     """Model to store YouTube playlist information"""
@@ -14,42 +20,105 @@ class Playlist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     target_completion_days = models.IntegerField(default=30)
     start_date = models.DateField(default=timezone.now)
+    # Set when the user deletes the playlist; its videos are purged in the background
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    # Position of the first incomplete video, None once every video is done
+    next_position = models.IntegerField(null=True, blank=True)
+    
+    objects = PlaylistQuerySet.as_manager()
     
     def __str__(self):
         return self.title
     
-    def get_progress_percentage(self):
+    def hide(self):
+        """Hide the playlist until purge_playlist removes it
+        
+        The YouTube id is released so the playlist can be imported again
+        while the old copy is being purged.
+        """
+        self.deleted_at = timezone.now()
+        self.youtube_id = f'deleted-{self.pk}-{self.youtube_id}'[:100]
+        self.save(update_fields=['deleted_at', 'youtube_id'])
+    
+    def refresh_next_position(self):
+        """Recompute next_position from the videos, e.g. after bulk-creating them"""
+        self.next_position = self.video_set.filter(is_completed=False).order_by(
+            'position'
+        ).values_list('position', flat=True).first()
+        Playlist.objects.filter(pk=self.pk).update(next_position=self.next_position)
+    
+    def video_completed(self, position):
+        """Move next_position past a video that was just completed
+        
+        One conditional UPDATE recomputes the pointer from the videos whenever
+        the stored pointer is at or before ``position``. The stored value is
+        compared, not the one loaded with this instance, so two videos
+        completed at about the same time (e.g. from two tabs) can't leave
+        the pointer on a completed video. Finding the first incomplete video
+        is one seek on the (playlist, is_completed, position) index.
+        """
+        first_incomplete = Video.objects.filter(playlist=OuterRef('pk'), is_completed=False).order_by(
+            'position'
+        ).values('position')[:1]
+        Playlist.objects.filter(pk=self.pk, next_position__lte=position).update(
+            next_position=Subquery(first_incomplete)
+        )
+        # Reloaded from the row if it is read again
+        self.__dict__.pop('next_position', None)
+    
+    def video_uncompleted(self, position):
+        """Move next_position back if an earlier video was marked incomplete"""
+        if self.next_position is not None and self.next_position <= position:
+            return
+        Playlist.objects.filter(pk=self.pk).filter(
+            Q(next_position__isnull=True) | Q(next_position__gt=position)
+        ).update(next_position=position)
+        self.next_position = position
+    
+    def get_progress_percentage(self, completed_count=None):
         """Calculate the percentage of completed videos"""
-        completed_count = self.video_set.filter(is_completed=True).count()
+        if completed_count is None:
+            completed_count = self.video_set.filter(is_completed=True).count()
         if self.video_count == 0:
             return 0
         return (completed_count / self.video_count) * 100
     
-    def get_total_duration(self):
+    def get_total_duration(self, videos=None):
         """Get total duration of all videos in the playlist"""
-        return sum((video.duration for video in self.video_set.all()), timedelta())
+        if videos is None:
+            return self.video_set.aggregate(total=Sum('metadata__duration'))['total'] or timedelta()
+        return sum((video.duration for video in videos), timedelta())
     
-    def get_completed_duration(self):
+    def get_completed_duration(self, videos=None):
         """Get total duration of completed videos"""
-        return sum((video.duration for video in self.video_set.filter(is_completed=True)), timedelta())
+        if videos is None:
+            return self.video_set.filter(is_completed=True).aggregate(
+                total=Sum('metadata__duration')
+            )['total'] or timedelta()
+        return sum((video.duration for video in videos if video.is_completed), timedelta())
     
-    def get_videos_for_day(self, target_date):
-        """Get the list of videos scheduled for a specific date"""
+    def _ordered_videos(self, videos):
+        if videos is None:
+            return list(self.video_set.with_metadata().order_by('position'))
+        return list(videos)
+    
+    def get_videos_for_day(self, target_date, videos=None):
+        """Get the list of videos scheduled for a specific date
+        
+        Pass ``videos`` (ordered by position) to reuse rows already loaded.
+        """
         if not self.video_count:
             return []
             
         # Get all videos ordered by position
-        all_videos = list(self.video_set.all().order_by('position'))
+        all_videos = self._ordered_videos(videos)
         if not all_videos:
             return []
             
         # Calculate total duration and average duration per day
-        total_duration = self.get_total_duration()
+        total_duration = self.get_total_duration(all_videos)
         avg_duration_per_day = total_duration / self.target_completion_days
         
-        # Get completed videos
-        completed_videos = set(self.video_set.filter(is_completed=True).values_list('id', flat=True))
-        
         # Calculate which day we're on
         days_from_start = (target_date - self.start_date).days
         if days_from_start < 0:
@@ -63,7 +132,7 @@ class Playlist(models.Model):
         videos_for_today = []
         
         for video in all_videos:
-            if video.id in completed_videos:
+            if video.is_completed:
                 current_duration += video.duration
                 continue
                 
@@ -75,13 +144,13 @@ class Playlist(models.Model):
         
         return videos_for_today
     
-    def get_daily_schedule(self):
+    def get_daily_schedule(self, videos=None):
         """Get a complete schedule of videos across all days"""
-        all_videos = list(self.video_set.all().order_by('position'))
+        all_videos = self._ordered_videos(videos)
         if not all_videos:
             return {}
             
-        total_duration = self.get_total_duration()
+        total_duration = self.get_total_duration(all_videos)
         avg_duration_per_day = total_duration / self.target_completion_days
         
         schedule = {}
@@ -105,29 +174,131 @@ class Playlist(models.Model):
         
         return schedule
 
-class Video(models.Model):
-    """Model to store individual video information from the playlist"""
-    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE)
-    youtube_id = models.CharField(max_length=100)
+class VideoMetadata(models.Model):
+    """Title, thumbnail and duration of a YouTube video, stored once per video id
+    
+    Every playlist position showing the same YouTube video refers to one
+    row, so compilations, overlapping courses and re-imports by other users
+    add no copies. The importer also skips the videos().list duration lookup
+    for ids it finds here. Rows outlive the playlists that used them and
+    serve later imports.
+    """
+    youtube_id = models.CharField(max_length=100, unique=True)
     title = models.CharField(max_length=200)
-    description = models.TextField(blank=True)
     thumbnail_url = models.URLField()
     duration = models.DurationField()
+    
+    def __str__(self):
+        return self.title
+
+class VideoQuerySet(models.QuerySet):
+    def visible(self):
+        """Videos of playlists that haven't been deleted"""
+        return self.filter(playlist__deleted_at__isnull=True)
+    
+    def with_metadata(self):
+        """Join the shared metadata that title, duration and the rest read from"""
+        return self.select_related('metadata')
+    
+    def next_up(self):
+        """The next incomplete video of each playlist, found through next_position"""
+        return self.filter(position=F('playlist__next_position'))
+    
+    def completed_on(self, day):
+        """Videos completed on a date, as a completed_at range that can use an index"""
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        return self.filter(
+            is_completed=True,
+            completed_at__gte=start,
+            completed_at__lt=start + timedelta(days=1),
+        )
+
+class Video(models.Model):
+    """Model to store individual video information from the playlist"""
+    # The composite indexes below lead with playlist, so it needs none of its own
+    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, db_index=False)
+    metadata = models.ForeignKey(VideoMetadata, on_delete=models.PROTECT)
     position = models.IntegerField()  # Position in playlist
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    objects = VideoQuerySet.as_manager()
+    
     class Meta:
         ordering = ['position']
+        indexes = [
+            # Playlist listings and schedules in position order
+            models.Index(fields=['playlist', 'position'], name='video_playlist_position_idx'),
+            # Completed counts and the first unwatched video of a playlist
+            models.Index(fields=['playlist', 'is_completed', 'position'], name='video_playlist_done_pos_idx'),
+            # Completions in a date range (today's count, streaks)
+            models.Index(
+                fields=['playlist', 'completed_at'],
+                name='video_completed_at_idx',
+                condition=Q(is_completed=True),
+            ),
+        ]
     
     def __str__(self):
         return self.title
     
-    def mark_completed(self):
-        """Mark the video as completed"""
+    # Read from the shared metadata; load it with with_metadata()
+    @property
+    def youtube_id(self):
+        return self.metadata.youtube_id
+    
+    @property
+    def title(self):
+        return self.metadata.title
+    
+    @property
+    def thumbnail_url(self):
+        return self.metadata.thumbnail_url
+    
+    @property
+    def duration(self):
+        return self.metadata.duration
+    
+    @property
+    def description(self):
+        """The description from VideoDetails, loaded on first use"""
+        try:
+            return self.metadata.details.description
+        except VideoDetails.DoesNotExist:
+            return ''
+    
+    def mark_completed(self, user=None):
+        """Mark the video as completed
+        
+        Pass the playlist's owner as ``user`` when it is already loaded, e.g.
+        ``request.user``, to save looking it up again.
+        """
         self.is_completed = True
         self.completed_at = timezone.now()
         self.save()
+        self.playlist.video_completed(self.position)
         
         # Update user streak
-        self.playlist.user.update_streak(timezone.now().date())
+        (user or self.playlist.user).update_streak(timezone.now().date())
+    
+    def mark_incomplete(self):
+        """Undo a completion"""
+        self.is_completed = False
+        self.completed_at = None
+        self.save()
+        self.playlist.video_uncompleted(self.position)
+
+class VideoDetails(models.Model):
+    """Rarely read video metadata, kept out of the rows every listing loads
+    
+    Descriptions can run to several KB. Stored inline they left one or two
+    Video rows per database page, so schedules and counts read mostly text
+    they never used.
+    """
+    metadata = models.OneToOneField(
+        VideoMetadata, on_delete=models.CASCADE, primary_key=True, related_name='details'
+    )
+    description = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"Details of {self.metadata_id}"
@@ -0,0 +1,230 @@
+"""
+Full-text search over video titles and descriptions.
+
+Titles live in the shared ``VideoMetadata`` and descriptions in its
+``VideoDetails``. SQLite uses an FTS5 table, ``playlists_video_fts``, with
+one row per playlist video, kept in sync with all three tables by triggers.
+Each row also holds an ``owner`` token (``u<user id>``), so a query only
+walks the searching user's part of the index instead of every matching
+video on the site. PostgreSQL keeps a trigger-maintained ``search_vector``
+tsvector column on ``playlists_videodetails``, once per YouTube video, with
+a GIN index, and joins the user's videos to the matches. Migration 0007
+creates both (0004 and 0006 did for earlier schemas), and they stay
+current on every insert, update and delete. That includes the importer's
+``bulk_create`` and the batched deletes of ``purge_playlist``. Titles weigh
+more than descriptions in the ranking.
+
+SQLite's table rebuilds during ``AlterField`` migrations on ``Video`` drop
+the triggers. ``python manage.py rebuild_search_index`` re-creates them and
+re-indexes every row.
+
+``search_videos()`` returns ranked hits for one user. It reads through the
+database router, so ``replica_reads`` views search the replica. The matched
+terms are wrapped in ``<mark>`` and everything else is HTML-escaped.
+"""
+
+from django.conf import settings
+from django.db import connection, connections, router
+from django.utils.html import escape
+from .models import Video
+import re
+
+# Control characters can't come from YouTube text, so they are safe to
+# mark matches with before escaping
+START, STOP = '\x02', '\x03'
+WORD = re.compile(r'\w+')
+MAX_TERMS = 8
+TITLE_WEIGHT, DESCRIPTION_WEIGHT = 10.0, 1.0  # owner gets 0
+
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS playlists_video_fts USING fts5(
+        title, description, owner,
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_insert AFTER INSERT ON playlists_video BEGIN
+        INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT new.id, m.title, coalesce(d.description, ''), 'u' || p.user_id
+        FROM playlists_videometadata m
+        JOIN playlists_playlist p ON p.id = new.playlist_id
+        LEFT JOIN playlists_videodetails d ON d.metadata_id = m.id
+        WHERE m.id = new.metadata_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_video_fts_delete AFTER DELETE ON playlists_video BEGIN
+        DELETE FROM playlists_video_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videometadata_fts_update AFTER UPDATE OF title ON playlists_videometadata BEGIN
+        UPDATE playlists_video_fts SET title = new.title
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_insert AFTER INSERT ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = new.description
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = new.metadata_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_update AFTER UPDATE OF description ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = new.description
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = new.metadata_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS playlists_videodetails_fts_delete AFTER DELETE ON playlists_videodetails BEGIN
+        UPDATE playlists_video_fts SET description = ''
+        WHERE rowid IN (SELECT id FROM playlists_video WHERE metadata_id = old.metadata_id);
+    END""",
+]
+
+SQLITE_REINDEX = [
+    "DELETE FROM playlists_video_fts",
+    """INSERT INTO playlists_video_fts(rowid, title, description, owner)
+        SELECT v.id, m.title, coalesce(d.description, ''), 'u' || p.user_id
+        FROM playlists_video v
+        JOIN playlists_videometadata m ON m.id = v.metadata_id
+        JOIN playlists_playlist p ON p.id = v.playlist_id
+        LEFT JOIN playlists_videodetails d ON d.metadata_id = m.id""",
+]
+
+# The vector lives with the description, once per YouTube video. A
+# generated column can't read the title from playlists_videometadata, so
+# triggers keep it current when either table changes
+POSTGRES_INDEX = [
+    "ALTER TABLE playlists_videodetails ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION playlists_video_search_vector(title text, description text)
+        RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+            SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                   setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        $$""",
+    """CREATE OR REPLACE FUNCTION playlists_videodetails_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := playlists_video_search_vector(
+                (SELECT title FROM playlists_videometadata WHERE id = NEW.metadata_id), NEW.description
+            );
+            RETURN NEW;
+        END
+        $$""",
+    """CREATE OR REPLACE FUNCTION playlists_videometadata_title_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE playlists_videodetails SET search_vector = playlists_video_search_vector(NEW.title, description)
+            WHERE metadata_id = NEW.id;
+            RETURN NULL;
+        END
+        $$""",
+    "DROP TRIGGER IF EXISTS playlists_videodetails_search ON playlists_videodetails",
+    """CREATE TRIGGER playlists_videodetails_search BEFORE INSERT OR UPDATE OF description ON playlists_videodetails
+        FOR EACH ROW EXECUTE FUNCTION playlists_videodetails_search_trigger()""",
+    "DROP TRIGGER IF EXISTS playlists_videometadata_title_search ON playlists_videometadata",
+    """CREATE TRIGGER playlists_videometadata_title_search AFTER UPDATE OF title ON playlists_videometadata
+        FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+        EXECUTE FUNCTION playlists_videometadata_title_search_trigger()""",
+    "CREATE INDEX IF NOT EXISTS video_search_vector_idx ON playlists_videodetails USING GIN (search_vector)",
+]
+
+POSTGRES_REINDEX = [
+    """UPDATE playlists_videodetails d SET search_vector = playlists_video_search_vector(m.title, d.description)
+        FROM playlists_videometadata m WHERE m.id = d.metadata_id""",
+]
+
+SQLITE_SEARCH = f"""
+    SELECT v.id, v.playlist_id, p.title, v.position, v.is_completed,
+           highlight(playlists_video_fts, 0, %s, %s),
+           snippet(playlists_video_fts, 1, %s, %s, '…', %s),
+           bm25(playlists_video_fts, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}, 0.0) AS rank
+    FROM playlists_video_fts
+    JOIN playlists_video v ON v.id = playlists_video_fts.rowid
+    JOIN playlists_playlist p ON p.id = v.playlist_id
+    WHERE playlists_video_fts MATCH %s AND p.user_id = %s AND p.deleted_at IS NULL
+    ORDER BY rank
+    LIMIT %s
+"""
+
+# Headlines are costly, so they are built for the page of hits only
+POSTGRES_SEARCH = """
+    SELECT hits.id, hits.playlist_id, hits.playlist_title, hits.position, hits.is_completed,
+           ts_headline('english', hits.title, hits.query, %s),
+           ts_headline('english', hits.description, hits.query, %s),
+           hits.rank
+    FROM (
+        SELECT v.id, v.playlist_id, p.title AS playlist_title, v.position, v.is_completed,
+               m.title, d.description, q.query, ts_rank_cd(d.search_vector, q.query) AS rank
+        FROM playlists_videodetails d
+        JOIN playlists_videometadata m ON m.id = d.metadata_id
+        JOIN playlists_video v ON v.metadata_id = d.metadata_id
+        JOIN playlists_playlist p ON p.id = v.playlist_id
+        CROSS JOIN to_tsquery('english', %s) AS q(query)
+        WHERE d.search_vector @@ q.query AND p.user_id = %s AND p.deleted_at IS NULL
+        ORDER BY rank DESC
+        LIMIT %s
+    ) hits
+    ORDER BY hits.rank DESC
+"""
+
+
+def search_terms(query):
+    """Words of a free-text query; punctuation and operators are dropped"""
+    return WORD.findall(query.lower())[:MAX_TERMS]
+
+
+def install_index(using=connection):
+    """Create the text index for the current database if it's missing"""
+    statements = {'sqlite': SQLITE_INDEX, 'postgresql': POSTGRES_INDEX}.get(using.vendor, [])
+    with using.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return bool(statements)
+
+
+def rebuild_index(using=connection):
+    """Re-create the index and re-index every video"""
+    statements = {'sqlite': SQLITE_REINDEX, 'postgresql': POSTGRES_REINDEX}.get(using.vendor, [])
+    if not install_index(using):
+        return False
+    with using.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return True
+
+
+def _marked(text):
+    return escape(text or '').replace(START, '<mark>').replace(STOP, '</mark>')
+
+
+def search_videos(user, query, limit=None):
+    """Ranked hits for ``query`` among the user's videos, best first"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    limit = limit or getattr(settings, 'SEARCH_RESULTS_LIMIT', 50)
+    # Raw SQL skips the router, so ask it which alias to read from
+    using = connections[router.db_for_read(Video)]
+
+    if using.vendor == 'sqlite':
+        # Every term must match; the last one also matches as a prefix so
+        # results appear while the user is still typing
+        words = ' '.join(f'"{term}"' for term in terms) + '*'
+        match = f'owner:u{user.pk} AND {{title description}}:({words})'
+        sql, params = SQLITE_SEARCH, [START, STOP, START, STOP, 24, match, user.pk, limit]
+    elif using.vendor == 'postgresql':
+        tsquery = ' & '.join(terms) + ':*'
+        options = f'StartSel={START}, StopSel={STOP}'
+        sql = POSTGRES_SEARCH
+        params = [
+            options + ', HighlightAll=true',
+            options + ', MaxWords=30, MinWords=12, MaxFragments=1',
+            tsquery, user.pk, limit,
+        ]
+    else:
+        raise NotImplementedError(f'No text index for {using.vendor}')
+
+    with using.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'video_id': video_id,
+            'playlist_id': playlist_id,
+            'playlist': playlist_title,
+            'position': position,
+            'is_completed': bool(is_completed),
+            'title_html': _marked(title),
+            'snippet_html': _marked(snippet),
+            'rank': rank,
+        }
+        for video_id, playlist_id, playlist_title, position, is_completed, title, snippet, rank in rows
+    ]
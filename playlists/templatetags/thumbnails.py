@@ -0,0 +1,23 @@
+from django import template
+from django.utils.html import format_html
+from playlists.thumbnails import local_variant
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail(source_url, width, alt='', css_class=''):
+    """<img> for a YouTube thumbnail shown ``width`` CSS pixels wide
+
+    Uses the cached WebP variants (with a 2x srcset) once they exist and
+    the original URL until then.
+    """
+    extra = format_html(' class="{}"', css_class) if css_class else ''
+    src = local_variant(source_url, width)
+    if src is None:
+        return format_html('<img src="{}" alt="{}"{} loading="lazy">', source_url, alt, extra)
+    src_2x = local_variant(source_url, width * 2) or src
+    return format_html(
+        '<img src="{}" srcset="{} 1x, {} 2x" alt="{}"{} loading="lazy">',
+        src, src, src_2x, alt, extra,
+    )
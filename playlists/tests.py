@@ -1,3 +1,802 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.shortcuts import resolve_url
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from learning_tracker.log import JSONFormatter, QueueListenerHandler, SamplingFilter
+from learning_tracker.startup import measure_boot
+from learning_tracker.testing import CLIENT_TEST_SETTINGS, ViewBudgetTestCase, create_videos
+from rest_framework.throttling import ScopedRateThrottle
+from progress.models import DailyGoal
+from users.models import CustomUser
+from .models import Playlist, Video, VideoDetails, VideoMetadata
+from .deletion import purge_playlist
+from .search import rebuild_index, search_videos
+from .views import format_duration
+from . import youtube as youtube_api
+from .thumbnails import cache_thumbnails, variant_path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import warnings
 
-# Create your tests here.
+
+class HotQueryPlanTests(TestCase):
+    """EXPLAIN the hot Video/DailyGoal queries and fail on sequential scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username='plans', email='plans@example.com', password='pass12345'
+        )
+        cls.playlist = Playlist.objects.create(
+            user=cls.user,
+            youtube_id='PL-plans',
+            title='Plans',
+            thumbnail_url='https://example.com/p.jpg',
+            video_count=50,
+        )
+        create_videos(cls.playlist, [
+            dict(
+                youtube_id=f'plan{i}',
+                title=f'Video {i}',
+                thumbnail_url='https://example.com/v.jpg',
+                duration=timedelta(minutes=5),
+                position=i,
+                is_completed=i % 3 == 0,
+                completed_at=timezone.now() - timedelta(days=i) if i % 3 == 0 else None,
+            )
+            for i in range(50)
+        ])
+
+    def assertNoSequentialScan(self, queryset, *tables):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Tiny test tables make seq scans cheapest; check the indexes are usable
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        for table in tables:
+            if connection.vendor == 'postgresql':
+                pattern = rf'Seq Scan on {table}\b'
+            else:
+                pattern = rf'\bSCAN {table}\b'
+            self.assertIsNone(re.search(pattern, plan), f'Sequential scan on {table}:\n{plan}')
+
+    def test_videos_completed_today(self):
+        today = timezone.now().date()
+        self.assertNoSequentialScan(
+            Video.objects.filter(playlist__user=self.user).completed_on(today),
+            'playlists_video', 'playlists_playlist',
+        )
+
+    def test_recent_completions_for_streak(self):
+        self.assertNoSequentialScan(
+            Video.objects.filter(
+                playlist__user=self.user,
+                is_completed=True,
+                completed_at__gte=timezone.now() - timedelta(days=30),
+            ).order_by('completed_at'),
+            'playlists_video', 'playlists_playlist',
+        )
+
+    def test_completed_videos_for_stats(self):
+        self.assertNoSequentialScan(
+            Video.objects.filter(playlist__user=self.user, is_completed=True),
+            'playlists_video', 'playlists_playlist',
+        )
+
+    def test_playlist_videos_by_completion_and_position(self):
+        self.assertNoSequentialScan(
+            Video.objects.filter(playlist=self.playlist, is_completed=False).order_by('position'),
+            'playlists_video',
+        )
+        self.assertNoSequentialScan(
+            Video.objects.filter(playlist=self.playlist, is_completed=True),
+            'playlists_video',
+        )
+        self.assertNoSequentialScan(
+            self.playlist.video_set.all().order_by('position'),
+            'playlists_video',
+        )
+
+    def test_playlist_lookups_use_the_composite_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, 'playlists_video')
+        self.assertNotIn(['playlist_id'], [info['columns'] for info in constraints.values() if info['index']])
+        # The playlist cascade and the purge look videos up by playlist alone
+        self.assertNoSequentialScan(Video.objects.filter(playlist__in=[self.playlist]), 'playlists_video')
+
+    def test_dashboard_playlist_progress(self):
+        self.assertNoSequentialScan(
+            Playlist.objects.filter(user=self.user).annotate(
+                completed_count=Count('video', filter=Q(video__is_completed=True))
+            ),
+            'playlists_video', 'playlists_playlist',
+        )
+
+    def test_daily_goal_date_range(self):
+        today = timezone.now().date()
+        self.assertNoSequentialScan(
+            DailyGoal.objects.filter(user=self.user, date__gte=today - timedelta(days=30)).order_by('date'),
+            'progress_dailygoal',
+        )
+
+    def test_completed_on_matches_date_lookup(self):
+        for days_ago in (0, 3, 6):
+            day = (timezone.now() - timedelta(days=days_ago)).date()
+            self.assertEqual(
+                set(Video.objects.completed_on(day).values_list('pk', flat=True)),
+                set(Video.objects.filter(is_completed=True, completed_at__date=day).values_list('pk', flat=True)),
+            )
+
+
+class ViewBudgetTests(ViewBudgetTestCase):
+    def test_playlist_list(self):
+        self.assertViewBudget(lambda l: reverse('playlists:playlist_list'), 3)
+
+    def test_add_playlist_form(self):
+        self.assertViewBudget(lambda l: reverse('playlists:add_playlist'), 2)
+
+    def test_playlist_detail(self):
+        self.assertViewBudget(lambda l: reverse('playlists:playlist_detail', args=[l.playlist.pk]), 4)
+
+    def test_playlist_edit(self):
+        url = lambda l: reverse('playlists:playlist_edit', args=[l.playlist.pk])
+        self.assertViewBudget(url, 3)
+        self.assertViewBudget(url, 4, method='post', data={'target_days': 45}, status=302)
+
+    def test_playlist_delete(self):
+        url = lambda l: reverse('playlists:playlist_delete', args=[l.playlist.pk])
+        self.assertViewBudget(url, 3)
+        self.assertViewBudget(url, 4, method='post', status=302)
+
+    def test_update_video_progress(self):
+        self.assertViewBudget(
+            lambda l: reverse('playlists:update_video_progress', args=[l.video.pk]), 10, method='post'
+        )
+
+    def test_user_streak(self):
+        self.assertViewBudget(lambda l: reverse('playlists:get_user_streak'), 3)
+
+    def test_api_playlists(self):
+        self.assertViewBudget(lambda l: reverse('api:playlist-list', kwargs={'version': 'v1'}), 3)
+        self.assertViewBudget(
+            lambda l: reverse('api:playlist-detail', kwargs={'version': 'v1', 'pk': l.playlist.pk}), 3
+        )
+
+    def test_api_videos(self):
+        self.assertViewBudget(
+            lambda l: reverse('api:video-list', kwargs={'version': 'v1', 'playlist_pk': l.playlist.pk}), 3
+        )
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class PlaylistDeletionTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='deleter', email='deleter@example.com', password='pass12345'
+        )
+        self.playlist = self.make_playlist('PL-delete', 10)
+        self.kept = self.make_playlist('PL-keep', 3)
+        self.client.force_login(self.user)
+
+    def make_playlist(self, youtube_id, video_count):
+        playlist = Playlist.objects.create(
+            user=self.user, youtube_id=youtube_id, title=youtube_id,
+            thumbnail_url='https://example.com/p.jpg', video_count=video_count,
+        )
+        create_videos(playlist, [
+            dict(
+                youtube_id=f'{youtube_id}-{i}', title=f'Video {i}', description='Notes',
+                thumbnail_url='https://example.com/v.jpg', duration=timedelta(minutes=5),
+                position=i, is_completed=i < 4, completed_at=timezone.now() if i < 4 else None,
+            )
+            for i in range(video_count)
+        ])
+        return playlist
+
+    def test_delete_hides_now_and_queues_the_purge(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('playlists:playlist_delete', args=[self.playlist.pk]))
+        self.assertRedirects(response, reverse('playlists:playlist_list'))
+        self.assertEqual(len(callbacks), 1)
+
+        self.playlist.refresh_from_db()
+        self.assertIsNotNone(self.playlist.deleted_at)
+        self.assertEqual(Video.objects.filter(playlist=self.playlist).count(), 10)
+        self.assertEqual(list(Playlist.objects.visible().filter(user=self.user)), [self.kept])
+        self.assertEqual(Video.objects.visible().filter(playlist__user=self.user, is_completed=True).count(), 3)
+        response = self.client.get(reverse('playlists:playlist_detail', args=[self.playlist.pk]))
+        self.assertEqual(response.status_code, 404)
+        # The YouTube id is free for a fresh import
+        self.make_playlist('PL-delete', 1)
+
+    def test_purge_deletes_in_batches_and_reports_progress(self):
+        self.playlist.hide()
+        with self.assertLogs('playlists.deletion', 'INFO') as logs, \
+                CaptureQueriesContext(connection) as queries:
+            deleted = purge_playlist(self.playlist.pk, batch_size=4)
+        self.assertEqual(deleted, 10)
+        # One DELETE by id per batch, without loading the videos first; the
+        # playlist's own delete then finds no videos left to cascade to
+        video_deletes = [
+            q['sql'] for q in queries
+            if q['sql'].startswith('DELETE FROM "playlists_video"') and '"playlist_id" IN' not in q['sql']
+        ]
+        self.assertEqual(len(video_deletes), 3)
+        self.assertFalse([q['sql'] for q in queries if q['sql'].startswith('SELECT "playlists_video"."id", ')])
+        events = [record.event for record in logs.records]
+        self.assertEqual(events, ['playlist_purge_progress'] * 3 + ['playlist_purged'])
+        self.assertEqual([r.deleted for r in logs.records[:3]], [4, 8, 10])
+        self.assertFalse(Playlist.objects.filter(pk=self.playlist.pk).exists())
+        self.assertEqual(Video.objects.filter(playlist=self.kept).count(), 3)
+        # Shared metadata stays for other playlists and re-imports
+        self.assertEqual(VideoMetadata.objects.count(), 13)
+
+    def test_visible_playlists_are_never_purged(self):
+        self.assertIsNone(purge_playlist(self.kept.pk))
+        self.assertEqual(Video.objects.filter(playlist=self.kept).count(), 3)
+
+    def test_command_finishes_interrupted_purges(self):
+        self.playlist.hide()
+        out = io.StringIO()
+        with self.assertLogs('playlists.deletion', 'INFO'):
+            call_command('purge_deleted_playlists', stdout=out)
+        self.assertIn('1 playlists purged (10 videos)', out.getvalue())
+        self.assertEqual(list(Playlist.objects.all()), [self.kept])
+
+
+class NextUpTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='nextup', email='nextup@example.com', password='pass12345'
+        )
+        self.playlist = Playlist.objects.create(
+            user=self.user, youtube_id='PL-next', title='Next',
+            thumbnail_url='https://example.com/p.jpg', video_count=5,
+        )
+        create_videos(self.playlist, [
+            dict(
+                youtube_id=f'next-{i}', title=f'Video {i}',
+                thumbnail_url='https://example.com/v.jpg', duration=timedelta(minutes=5), position=i,
+            )
+            for i in range(5)
+        ])
+        self.playlist.refresh_next_position()
+
+    def video(self, position):
+        return Video.objects.get(playlist=self.playlist, position=position)
+
+    def pointer(self):
+        return Playlist.objects.get(pk=self.playlist.pk).next_position
+
+    def test_pointer_skips_videos_completed_out_of_order(self):
+        self.assertEqual(self.pointer(), 0)
+        # Completing a later video leaves the pointer alone, in one statement
+        self.video(2).mark_completed()
+        with self.assertNumQueries(1):
+            self.playlist.video_completed(2)
+        self.assertEqual(self.pointer(), 0)
+
+        self.video(0).mark_completed()
+        self.assertEqual(self.pointer(), 1)
+        self.video(1).mark_completed()
+        self.assertEqual(self.pointer(), 3)
+
+    def test_concurrent_completions_dont_strand_the_pointer(self):
+        # Two tabs load the playlist while video 0 is next up
+        tab_a, tab_b = Playlist.objects.get(pk=self.playlist.pk), Playlist.objects.get(pk=self.playlist.pk)
+        Video.objects.filter(playlist=self.playlist, position=0).update(is_completed=True)
+        tab_a.video_completed(0)
+        self.assertEqual(self.pointer(), 1)
+        # Tab B completed video 1 before it could see tab A's write
+        Video.objects.filter(playlist=self.playlist, position=1).update(is_completed=True)
+        tab_b.video_completed(1)
+        self.assertEqual(self.pointer(), 2)
+        self.assertEqual(tab_b.next_position, 2)
+
+    def test_uncompleting_moves_the_pointer_back(self):
+        for position in range(5):
+            self.video(position).mark_completed()
+        self.assertIsNone(self.pointer())
+        self.video(3).mark_incomplete()
+        self.assertEqual(self.pointer(), 3)
+        self.video(4).mark_incomplete()
+        self.assertEqual(self.pointer(), 3)
+
+    @override_settings(**CLIENT_TEST_SETTINGS)
+    def test_progress_view_can_mark_a_video_incomplete(self):
+        self.client.force_login(self.user)
+        url = lambda position: reverse('playlists:update_video_progress', args=[self.video(position).pk])
+        self.client.post(url(0))
+        self.client.post(url(1))
+        self.assertEqual(self.pointer(), 2)
+
+        response = self.client.post(url(0), {'completed': 'false'})
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['completed_count'], 1)
+        self.assertIsNone(data['completion_date'])
+        self.assertFalse(self.video(0).is_completed)
+        self.assertEqual(self.pointer(), 0)
+
+    def test_next_up_across_playlists_in_one_query(self):
+        other = Playlist.objects.create(
+            user=self.user, youtube_id='PL-next-2', title='Other',
+            thumbnail_url='https://example.com/p.jpg', video_count=1, next_position=0,
+        )
+        create_videos(other, [dict(
+            youtube_id='other-0', title='Other 0',
+            thumbnail_url='https://example.com/v.jpg', duration=timedelta(minutes=5), position=0,
+        )])
+        with self.assertNumQueries(1):
+            titles = list(Video.objects.filter(playlist__user=self.user).next_up().order_by(
+                'playlist_id').values_list('metadata__title', flat=True))
+        self.assertEqual(titles, ['Video 0', 'Other 0'])
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class VideoSearchTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='searcher', email='searcher@example.com', password='pass12345'
+        )
+        self.playlist = self.make_playlist(self.user, 'PL-search', [
+            ('Binary search trees', 'Insertion and <b>deletion</b> in a BST'),
+            ('Graph traversal', 'Breadth-first search and depth-first search on graphs'),
+            ('Dynamic programming', 'Memoisation versus tabulation'),
+        ])
+        other = CustomUser.objects.create_user(
+            username='someone', email='someone@example.com', password='pass12345'
+        )
+        self.make_playlist(other, 'PL-other', [('Searching in the dark', 'Not yours')])
+        self.client.force_login(self.user)
+
+    def make_playlist(self, user, youtube_id, videos):
+        playlist = Playlist.objects.create(
+            user=user, youtube_id=youtube_id, title=youtube_id,
+            thumbnail_url='https://example.com/p.jpg', video_count=len(videos),
+        )
+        # bulk_create like the importer; the index must pick these rows up too
+        create_videos(playlist, [
+            dict(
+                youtube_id=f'{youtube_id}-{i}', title=title, description=description,
+                thumbnail_url='https://example.com/v.jpg', duration=timedelta(minutes=5), position=i,
+            )
+            for i, (title, description) in enumerate(videos)
+        ])
+        return playlist
+
+    def titles(self, query):
+        return [re.sub('</?mark>', '', hit['title_html']) for hit in search_videos(self.user, query)]
+
+    def test_ranks_title_matches_first_and_scopes_to_the_user(self):
+        self.assertEqual(self.titles('search'), ['Binary search trees', 'Graph traversal'])
+        # Stemming, and the last word matches as a prefix
+        self.assertEqual(self.titles('graphs trav'), ['Graph traversal'])
+        self.assertEqual(self.titles('"; DROP TABLE --'), [])
+        self.assertEqual(self.titles(''), [])
+
+    def test_highlights_are_escaped(self):
+        [hit] = search_videos(self.user, 'deletion')
+        self.assertEqual(hit['snippet_html'], 'Insertion and &lt;b&gt;<mark>deletion</mark>&lt;/b&gt; in a BST')
+
+    def test_index_follows_updates_and_deletes(self):
+        metadata = VideoMetadata.objects.get(title='Dynamic programming')
+        metadata.title = 'Greedy algorithms'
+        metadata.save()
+        self.assertEqual(self.titles('greedy'), ['Greedy algorithms'])
+        self.assertEqual(self.titles('dynamic'), [])
+        VideoDetails.objects.filter(metadata=metadata).update(description='Knapsack and coin change')
+        self.assertEqual(self.titles('knapsack'), ['Greedy algorithms'])
+
+        self.playlist.hide()
+        self.assertEqual(self.titles('greedy'), [])
+        with self.assertLogs('playlists.deletion', 'INFO'):
+            purge_playlist(self.playlist.pk)
+        rebuild_index()
+        self.assertEqual(self.titles('search'), [])
+
+    def test_search_page_and_api(self):
+        response = self.client.get(reverse('playlists:search'), {'q': 'binary'})
+        self.assertContains(response, '<mark>Binary</mark> search trees', html=False)
+
+        response = self.client.get(reverse('playlists:search_api'), {'q': 'traversal'})
+        self.assertEqual(response.json()['results'][0]['playlist_id'], self.playlist.pk)
+        self.assertEqual(self.client.get(reverse('playlists:search_api')).status_code, 400)
+
+
+class FakeCall:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self, http=None, num_retries=0):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class FakeYouTube:
+    """Just enough of the YouTube client for the preview and import views"""
+
+    def __init__(self, durations, page_size=50):
+        self.durations = durations
+        self.page_size = page_size
+        self.video_batches = 0
+
+    def playlists(self):
+        return self
+
+    def playlistItems(self):
+        return self
+
+    def videos(self):
+        return mock.Mock(list=self.list_videos)
+
+    def list(self, part, id=None, playlistId=None, maxResults=None, pageToken=None, fields=None):
+        if playlistId is None:
+            return FakeCall({'items': [{
+                'snippet': {
+                    'title': 'Big Course',
+                    'description': 'All of it',
+                    'thumbnails': {'high': {'url': 'https://example.com/p.jpg'}},
+                },
+                'contentDetails': {'itemCount': len(self.durations)},
+            }]})
+        start = int(pageToken or 0)
+        end = start + self.page_size
+        page = {'items': [{
+            'snippet': {'title': f'Video {i}', 'thumbnails': {'high': {'url': f'https://example.com/{i}.jpg'}}},
+            'contentDetails': {'videoId': str(i)},
+        } for i in range(start, min(end, len(self.durations)))]}
+        if end < len(self.durations):
+            page['nextPageToken'] = str(end)
+        return FakeCall(page)
+
+    def list_videos(self, part, id, fields=None):
+        self.video_batches += 1
+        return FakeCall({'items': [
+            {'id': i, 'contentDetails': {'duration': f'PT{self.durations[int(i)]}S'}} for i in id.split(',')
+        ]})
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class PlaylistPreviewTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='preview', email='preview@example.com', password='pass12345'
+        )
+        self.client.force_login(self.user)
+        # Uneven lengths, so extrapolating from the first page would be wrong
+        self.durations = [60] * 50 + [3600] * 70
+        self.youtube = FakeYouTube(self.durations)
+        patcher = mock.patch('playlists.views.get_youtube_service', return_value=self.youtube)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, url):
+        response = self.client.post(
+            url, json.dumps({'url': 'https://www.youtube.com/playlist?list=PL-big'}), content_type='application/json'
+        )
+        with warnings.catch_warnings():
+            # The WSGI test client consumes the async iterator synchronously
+            warnings.simplefilter('ignore')
+            return response, b''.join(response).decode()
+
+    def test_preview_totals_every_page_exactly(self):
+        response, body = self.post(reverse('playlists:fetch_playlist_info'))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(body)
+        self.assertEqual(data['video_count'], 120)
+        self.assertEqual(data['videos_counted'], 120)
+        self.assertEqual(data['total_seconds'], sum(self.durations))
+        self.assertEqual(data['total_duration'], format_duration(timedelta(seconds=sum(self.durations))))
+        self.assertEqual(self.youtube.video_batches, 3)
+
+    def test_stream_reports_running_totals(self):
+        response, body = self.post(reverse('playlists:fetch_playlist_info') + '?stream=1')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        events = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(events[0]['event'], 'playlist')
+        progress = [event['videos_counted'] for event in events if event['event'] == 'progress']
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 120)
+        self.assertEqual(events[-1]['event'], 'done')
+        self.assertEqual(events[-1]['total_seconds'], sum(self.durations))
+
+    def test_quota_error_while_totalling_keeps_its_status(self):
+        error = youtube_api.HttpError(mock.Mock(status=403), b'quota')
+        self.youtube.list_videos = lambda **kwargs: FakeCall(error)
+        with self.assertLogs('playlists.views', 'ERROR'):
+            response, body = self.post(reverse('playlists:fetch_playlist_info'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(json.loads(body), {'error': 'YouTube API quota exceeded'})
+
+        with self.assertLogs('playlists.views', 'ERROR'):
+            response, body = self.post(reverse('playlists:fetch_playlist_info') + '?stream=1')
+        self.assertEqual(json.loads(body.splitlines()[-1])['status'], 429)
+
+    def test_anonymous_preview_redirects_to_login(self):
+        self.client.logout()
+        response, body = self.post(reverse('playlists:fetch_playlist_info'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(resolve_url(settings.LOGIN_URL)))
+
+    def test_missing_playlist_is_404(self):
+        self.youtube.list = lambda **kwargs: FakeCall({'items': []})
+        response = self.client.post(
+            reverse('playlists:fetch_playlist_info'),
+            json.dumps({'url': 'https://www.youtube.com/playlist?list=PL-gone'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class PlaylistImportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username='importer', email='importer@example.com', password='pass12345'
+        )
+        self.client.force_login(self.user)
+        self.youtube = FakeYouTube([60] * 80)
+        patcher = mock.patch('playlists.views.get_youtube_service', return_value=self.youtube)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_known_videos_reuse_metadata_without_a_lookup(self):
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        shared = Playlist.objects.create(
+            user=other, youtube_id='PL-first', title='First', target_completion_days=30,
+            start_date=timezone.now().date(),
+        )
+        create_videos(shared, [
+            {'youtube_id': str(i), 'title': f'Stored {i}', 'thumbnail_url': '', 'duration': timedelta(minutes=5),
+             'position': i}
+            for i in range(50)
+        ])
+
+        response = self.client.post(reverse('playlists:add_playlist'), {
+            'playlist_url': 'https://www.youtube.com/playlist?list=PL-big', 'target_days': 30,
+        })
+
+        self.assertEqual(response.status_code, 302)
+        playlist = Playlist.objects.get(user=self.user)
+        self.assertEqual(playlist.video_set.count(), 80)
+        # Only the second page had ids nobody had imported before
+        self.assertEqual(self.youtube.video_batches, 1)
+        self.assertEqual(VideoMetadata.objects.count(), 80)
+        first = playlist.video_set.with_metadata().get(position=0)
+        self.assertEqual(first.metadata, shared.video_set.get(position=0).metadata)
+        self.assertEqual(first.title, 'Stored 0')
+        self.assertEqual(playlist.video_set.get(position=79).duration, timedelta(minutes=1))
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class PlaylistAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='api', email='api@example.com', password='pass12345')
+        self.client.force_login(self.user)
+        self.playlist = Playlist.objects.create(
+            user=self.user, youtube_id='PL-api', title='API course', description='Long description',
+            video_count=5, start_date=timezone.now().date(),
+        )
+        create_videos(self.playlist, [
+            {'youtube_id': f'api{i}', 'title': f'Lecture {i}', 'thumbnail_url': '', 'duration': timedelta(minutes=10),
+             'position': i, 'is_completed': i < 2, 'description': f'Notes {i}'}
+            for i in range(5)
+        ])
+
+    def get(self, name, query=None, **kwargs):
+        return self.client.get(reverse(f'api:{name}', kwargs={'version': 'v1', **kwargs}), query)
+
+    def test_playlist_annotations(self):
+        [playlist] = self.get('playlist-list').json()['results']
+        self.assertEqual(playlist['completed_count'], 2)
+        self.assertEqual(playlist['progress'], 40.0)
+        self.assertEqual(playlist['total_duration'], 3000)
+        self.assertEqual(playlist['description'], 'Long description')
+
+    def test_sparse_fieldsets(self):
+        [playlist] = self.get('playlist-list', {'fields': 'id,title,progress'}).json()['results']
+        self.assertEqual(set(playlist), {'id', 'title', 'progress'})
+        with CaptureQueriesContext(connection) as queries:
+            videos = self.get(
+                'video-list', {'fields': 'position,is_completed'}, playlist_pk=self.playlist.pk
+            ).json()['results']
+        self.assertEqual(videos[0], {'position': 0, 'is_completed': True})
+        self.assertNotIn('playlists_videometadata', queries[-1]['sql'])
+
+    def test_cursor_pages_through_every_video_in_order(self):
+        page = self.get('video-list', {'page_size': 2}, playlist_pk=self.playlist.pk).json()
+        videos = page['results']
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            videos += page['results']
+        self.assertEqual([video['position'] for video in videos], [0, 1, 2, 3, 4])
+        self.assertEqual(videos[3]['description'], 'Notes 3')
+
+    def test_other_users_playlists_are_hidden(self):
+        other = CustomUser.objects.create_user(username='api2', email='api2@example.com', password='pass12345')
+        self.client.force_login(other)
+        self.assertEqual(self.get('playlist-detail', pk=self.playlist.pk).status_code, 404)
+        self.assertEqual(self.get('video-list', playlist_pk=self.playlist.pk).status_code, 404)
+        self.assertEqual(self.get('video-list', playlist_pk=self.playlist.pk + 100).status_code, 404)
+
+    def test_unknown_version_is_404(self):
+        response = self.client.get(reverse('api:playlist-list', kwargs={'version': 'v9'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_each_endpoint_is_throttled_separately(self):
+        with mock.patch.dict(ScopedRateThrottle.THROTTLE_RATES, {'api-playlists': '2/min'}):
+            self.assertEqual(self.get('playlist-list').status_code, 200)
+            self.assertEqual(self.get('playlist-list').status_code, 200)
+            self.assertEqual(self.get('playlist-list').status_code, 429)
+            self.assertEqual(self.get('video-list', playlist_pk=self.playlist.pk).status_code, 200)
+
+    def test_token_login(self):
+        self.client.logout()
+        url = reverse('api_auth_token', kwargs={'version': 'v1'})
+        self.assertEqual(self.client.post(url, {'email': 'api@example.com', 'password': 'wrong'}).status_code, 400)
+        token = self.client.post(url, {'email': 'api@example.com', 'password': 'pass12345'}).json()['token']
+
+        self.assertEqual(self.get('playlist-list').status_code, 403)
+        response = self.client.get(
+            reverse('api:playlist-list', kwargs={'version': 'v1'}), HTTP_AUTHORIZATION=f'Token {token}',
+        )
+        self.assertEqual([playlist['id'] for playlist in response.json()['results']], [self.playlist.pk])
+
+
+class StructuredLoggingTests(TestCase):
+    def make_record(self, name='playlists.views', level=logging.INFO, **extra):
+        record = logging.makeLogRecord({'name': name, 'levelno': level, 'levelname': logging.getLevelName(level), 'msg': 'Playlist %s', 'args': ('imported',)})
+        record.__dict__.update(extra)
+        return record
+
+    def test_json_lines_include_extra_fields(self):
+        data = json.loads(JSONFormatter().format(self.make_record(event='playlist_imported', videos=2000)))
+        self.assertEqual(data['message'], 'Playlist imported')
+        self.assertEqual(data['logger'], 'playlists.views')
+        self.assertEqual(data['event'], 'playlist_imported')
+        self.assertEqual(data['videos'], 2000)
+        self.assertNotIn('args', data)
+
+    def test_sampling_drops_info_but_keeps_warnings(self):
+        sampler = SamplingFilter({'playlists': 0})
+        self.assertFalse(sampler.filter(self.make_record()))
+        self.assertTrue(sampler.filter(self.make_record(level=logging.WARNING)))
+        self.assertTrue(sampler.filter(self.make_record(name='progress.views')))
+
+    def test_queue_handler_writes_on_listener_thread(self):
+        written = []
+
+        class Recorder(logging.Handler):
+            def emit(self, record):
+                written.append((self.format(record), threading.current_thread()))
+
+        target = Recorder()
+        target.setFormatter(JSONFormatter())
+        handler = QueueListenerHandler([target])
+        self.addCleanup(handler.stop)
+        handler.handle(self.make_record(event='playlist_imported'))
+        handler.flush()
+
+        self.assertEqual(len(written), 1)
+        self.assertEqual(json.loads(written[0][0])['event'], 'playlist_imported')
+        self.assertIsNot(written[0][1], threading.current_thread())
+
+
+class WorkerStartupTests(SimpleTestCase):
+    """Boot the app in a fresh interpreter, as a worker would"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.boot = measure_boot()
+
+    def test_youtube_stack_is_not_imported_at_boot(self):
+        for module in ('googleapiclient.discovery', 'googleapiclient.errors', 'isodate'):
+            self.assertNotIn(module, self.boot['modules'])
+
+    def test_boot_time_budget(self):
+        budget_ms = float(os.getenv('STARTUP_BUDGET_MS', 3000))
+        self.assertLessEqual(self.boot['seconds'] * 1000, budget_ms)
+
+    def test_service_builds_from_bundled_document(self):
+        service = youtube_api.build_service('test-key')
+        request = service.playlists().list(part='snippet', id='PL-x')
+        self.assertIsInstance(request, youtube_api.InstrumentedHttpRequest)
+        self.assertIn('key=test-key', request.uri)
+
+
+class ImageServer:
+    """Serves a 480x360 JPEG at /hq.jpg and 404s everything else"""
+
+    def __init__(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (480, 360), (200, 30, 30)).save(buffer, 'JPEG')
+        body = buffer.getvalue()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/hq.jpg':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class ThumbnailCacheTests(TestCase):
+    def setUp(self):
+        self.images = ImageServer()
+        self.addCleanup(self.images.close)
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(THUMBNAIL_ROOT=root.name, BACKGROUND_TASKS_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.source = f'{self.images.url}/hq.jpg'
+
+    def render(self, url, width):
+        return Template('{% load thumbnails %}{% thumbnail url width "Intro" %}').render(Context({'url': url, 'width': width}))
+
+    def test_variants_are_resized_webp(self):
+        self.assertEqual(cache_thumbnails([self.source, self.source]), (1, 0))
+        for width in (120, 240, 320, 480):
+            with Image.open(variant_path(self.source, width)) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(image.size, (width, width * 3 // 4))
+
+    def test_template_uses_local_variants_once_cached(self):
+        self.assertIn(f'src="{self.source}"', self.render(self.source, 120))
+        cache_thumbnails([self.source])
+        html = self.render(self.source, 120)
+        self.assertIn('-120.webp 1x', html)
+        self.assertIn('-240.webp 2x', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_offline_source_falls_back_to_youtube_url(self):
+        missing = f'{self.images.url}/missing.jpg'
+        unreachable = 'http://127.0.0.1:9/hq.jpg'
+        self.assertEqual(cache_thumbnails([missing, unreachable]), (0, 2))
+        self.assertIn(f'src="{unreachable}"', self.render(unreachable, 120))
+
+    def test_served_with_immutable_cache_headers(self):
+        cache_thumbnails([self.source])
+        name = variant_path(self.source, 120).name
+        response = self.client.get(reverse('thumbnail', args=[name]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(reverse('thumbnail', args=['settings.py'])).status_code, 404)
@@ -0,0 +1,163 @@
+"""
+Local cache of YouTube thumbnails in display-sized WebP variants.
+
+``cache_thumbnails`` downloads each source image once and writes one WebP
+per width in THUMBNAIL_WIDTHS under THUMBNAIL_ROOT. The file names derive
+from a hash of the source URL, so a variant's existence on disk is the only
+state and its URL never changes. ``thumbnail_view`` serves them with a
+one-year immutable Cache-Control. Until a thumbnail has been cached, or when
+YouTube can't be reached, pages keep using the original URL.
+"""
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_GET
+from pathlib import Path
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+MAX_SOURCE_BYTES = 2 * 1024 * 1024
+WEBP_QUALITY = 80
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Stop a batch after this many failed downloads in a row; we're probably offline
+MAX_CONSECUTIVE_FAILURES = 5
+NAME_PATTERN = re.compile(r'^[0-9a-f]{40}-\d+\.webp$')
+
+
+def thumbnail_root():
+    return Path(getattr(settings, 'THUMBNAIL_ROOT', settings.MEDIA_ROOT / 'thumbnails'))
+
+
+def thumbnail_widths():
+    return tuple(getattr(settings, 'THUMBNAIL_WIDTHS', (120, 240, 320, 480)))
+
+
+def variant_name(source_url, width):
+    digest = hashlib.sha1(source_url.encode()).hexdigest()
+    return f'{digest}-{width}.webp'
+
+
+def variant_path(source_url, width):
+    name = variant_name(source_url, width)
+    return thumbnail_root() / name[:2] / name
+
+
+def variant_url(source_url, width):
+    name = variant_name(source_url, width)
+    return f"{settings.THUMBNAIL_URL}{name}"
+
+
+def pick_width(width):
+    """Smallest configured width of at least ``width``, or the largest one"""
+    widths = sorted(thumbnail_widths())
+    return next((w for w in widths if w >= width), widths[-1])
+
+
+def local_variant(source_url, width):
+    """Local URL of the variant for ``width`` pixels, or None until it's cached"""
+    if not source_url:
+        return None
+    width = pick_width(width)
+    if not variant_path(source_url, width).is_file():
+        return None
+    return variant_url(source_url, width)
+
+
+def fetch_source(source_url, timeout=None):
+    """Download the original image; None when it can't be fetched"""
+    timeout = timeout or getattr(settings, 'THUMBNAIL_FETCH_TIMEOUT', 5)
+    try:
+        with urllib.request.urlopen(source_url, timeout=timeout) as response:
+            data = response.read(MAX_SOURCE_BYTES + 1)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        logger.warning(f"Could not fetch thumbnail {source_url}: {str(e)}")
+        return None
+    if len(data) > MAX_SOURCE_BYTES:
+        logger.warning(f"Thumbnail {source_url} is larger than {MAX_SOURCE_BYTES} bytes; skipped")
+        return None
+    return data
+
+
+def write_variants(source_url, data):
+    """Write every configured width of ``data`` as WebP; returns the widths written"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Thumbnail {source_url} is not a readable image: {str(e)}")
+        return []
+    image = image.convert('RGB')
+
+    written = []
+    for width in thumbnail_widths():
+        # Never upscale; the source width stands in for larger variants
+        target = min(width, image.width)
+        height = max(1, round(image.height * target / image.width))
+        variant = image if target == image.width else image.resize((target, height), Image.LANCZOS)
+        path = variant_path(source_url, width)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                variant.save(f, 'WEBP', quality=WEBP_QUALITY, method=4)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        written.append(width)
+    return written
+
+
+def cache_thumbnail(source_url):
+    """Fetch and store one thumbnail unless it's already cached; True if cached afterwards"""
+    if not source_url:
+        return False
+    if all(variant_path(source_url, width).is_file() for width in thumbnail_widths()):
+        return True
+    data = fetch_source(source_url)
+    if data is None:
+        return False
+    return bool(write_variants(source_url, data))
+
+
+def cache_thumbnails(source_urls):
+    """Cache a batch of thumbnails; returns (cached, failed) counts"""
+    source_urls = list(dict.fromkeys(url for url in source_urls if url))
+    cached = failed = streak = 0
+    for index, source_url in enumerate(source_urls):
+        if cache_thumbnail(source_url):
+            cached += 1
+            streak = 0
+            continue
+        failed += 1
+        streak += 1
+        if streak >= MAX_CONSECUTIVE_FAILURES:
+            failed += len(source_urls) - index - 1
+            logger.warning(f"Giving up on {len(source_urls) - index - 1} thumbnails after {streak} failures in a row")
+            break
+    if failed:
+        logger.info(f"{failed} thumbnails could not be cached and keep their YouTube URLs; run fetch_thumbnails to retry")
+    return cached, failed
+
+
+@require_GET
+def thumbnail_view(request, name):
+    """Serve a cached variant with long-lived cache headers"""
+    if not NAME_PATTERN.match(name):
+        raise Http404('Thumbnail not found')
+    path = thumbnail_root() / name[:2] / name
+    if not path.is_file():
+        raise Http404('Thumbnail not found')
+    response = FileResponse(open(path, 'rb'), content_type='image/webp')
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -9,10 +9,12 @@ urlpatterns = [
     path('<int:pk>/', views.playlist_detail, name='playlist_detail'),
     path('<int:pk>/edit/', views.playlist_edit, name='playlist_edit'),
     path('<int:pk>/delete/', views.playlist_delete, name='playlist_delete'),
+    path('search/', views.search, name='search'),
     path('video/<int:video_id>/complete/', views.update_video_progress, name='update_video_progress'),
     path('test-api/', views.test_youtube_api, name='test_youtube_api'),
     
     # API endpoints
     path('api/playlists/fetch-info/', views.fetch_playlist_info, name='fetch_playlist_info'),
     path('api/users/streak/', views.get_user_streak, name='get_user_streak'),
+    path('api/videos/search/', views.search_api, name='search_api'),
 ] 
\ No newline at end of file
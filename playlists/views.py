@@ -1,14 +1,28 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.contrib.auth.views import redirect_to_login
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib import messages
+from django.db.models import Count, Q
 from django.utils import timezone
-from .models import Playlist, Video
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .models import Playlist, Video, VideoDetails, VideoMetadata
+from . import youtube as youtube_api
+from .deletion import purge_playlist
+from .search import search_videos
+from .thumbnails import cache_thumbnails
+from learning_tracker.db.replicas import replica_reads
+from learning_tracker.tasks import run_in_background
 from progress.models import DailyGoal, LearningStreak
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from progress.events import publish_progress
+from users.versions import user_etag, user_last_modified
+import asyncio
+import contextvars
 import os
-import isodate
+import time
 from datetime import timedelta
 import logging
 import json
@@ -21,12 +35,17 @@ def get_youtube_service():
     if not api_key:
         logger.error("YouTube API key not found in environment variables")
         raise ValueError("YouTube API key not configured")
-    return build('youtube', 'v3', developerKey=api_key)
+    return youtube_api.build_service(api_key)
 
 @login_required
 def playlist_list(request):
     """Display user's playlists"""
-    playlists = Playlist.objects.filter(user=request.user)
+    # The list never shows descriptions, and they would widen the GROUP BY
+    playlists = Playlist.objects.visible().filter(user=request.user).defer('description').annotate(
+        completed_count=Count('video', filter=Q(video__is_completed=True))
+    )
+    for playlist in playlists:
+        playlist.progress_percentage = playlist.get_progress_percentage(playlist.completed_count)
     return render(request, 'playlists/playlist_list.html', {'playlists': playlists})
 
 @login_required
@@ -66,9 +85,11 @@ def add_playlist(request):
                 return redirect('playlists:add_playlist')
             
             playlist_id = playlist_url.split('list=')[-1].split('&')[0]
-            logger.info(f"Attempting to fetch playlist ID: {playlist_id}")
+            import_started = time.perf_counter()
+            logger.debug(f"Attempting to fetch playlist ID: {playlist_id}")
             
             # Get playlist details from YouTube API
+            import isodate
             youtube = get_youtube_service()
             
             try:
@@ -84,7 +105,6 @@ def add_playlist(request):
                     return redirect('playlists:add_playlist')
                 
                 playlist_data = playlist_response['items'][0]['snippet']
-                logger.info(f"Successfully fetched playlist: {playlist_data['title']}")
                 
                 # Create playlist
                 playlist = Playlist.objects.create(
@@ -98,9 +118,14 @@ def add_playlist(request):
                 )
                 
                 # Get playlist items with pagination
-                videos = []
+                placements = []  # YouTube id of each imported position
+                metadata = {}  # YouTube id: stored or new VideoMetadata
+                new_descriptions = {}  # YouTube id: description, for metadata to store
                 next_page_token = None
                 total_duration = timedelta()
+                pages = 0
+                lookups = 0
+                skipped = 0
                 
                 while True:
                     try:
@@ -116,63 +141,109 @@ def add_playlist(request):
                             logger.warning(f"No videos found in playlist: {playlist_id}")
                             break
                         
-                        # Get video durations in batches
+                        pages += 1
                         video_ids = [item['contentDetails']['videoId'] for item in playlist_items['items']]
-                        logger.info(f"Fetching details for {len(video_ids)} videos")
                         
-                        video_response = youtube.videos().list(
-                            part='contentDetails',
-                            id=','.join(video_ids)
-                        ).execute()
+                        # Videos already stored by any import need no duration lookup
+                        metadata.update(VideoMetadata.objects.in_bulk(
+                            [video_id for video_id in video_ids if video_id not in metadata],
+                            field_name='youtube_id',
+                        ))
+                        unknown = [video_id for video_id in video_ids if video_id not in metadata]
+                        durations = {}
+                        if unknown:
+                            lookups += 1
+                            video_response = youtube.videos().list(
+                                part='contentDetails',
+                                id=','.join(unknown)
+                            ).execute()
+                            durations = {
+                                video['id']: video['contentDetails']['duration']
+                                for video in video_response.get('items', [])
+                            }
                         
-                        # Create video objects
-                        for item, video_details in zip(playlist_items['items'], video_response['items']):
+                        # Private and deleted videos are left out of the response, so match by id
+                        for item in playlist_items['items']:
                             try:
-                                duration = isodate.parse_duration(video_details['contentDetails']['duration'])
-                                total_duration += duration
-                                
-                                video = Video(
-                                    playlist=playlist,
-                                    youtube_id=item['contentDetails']['videoId'],
-                                    title=item['snippet']['title'],
-                                    description=item['snippet'].get('description', ''),
-                                    thumbnail_url=item['snippet']['thumbnails']['high']['url'],
-                                    duration=duration,
-                                    position=len(videos)
-                                )
-                                videos.append(video)
-                                logger.info(f"Added video: {video.title}")
+                                video_id = item['contentDetails']['videoId']
+                                if video_id not in metadata:
+                                    metadata[video_id] = VideoMetadata(
+                                        youtube_id=video_id,
+                                        title=item['snippet']['title'],
+                                        thumbnail_url=item['snippet']['thumbnails']['high']['url'],
+                                        duration=isodate.parse_duration(durations[video_id]),
+                                    )
+                                    new_descriptions[video_id] = item['snippet'].get('description', '')
+                                total_duration += metadata[video_id].duration
+                                placements.append(video_id)
                             except (KeyError, ValueError) as e:
-                                logger.error(f"Error processing video: {str(e)}")
+                                skipped += 1
+                                logger.debug(f"Error processing video: {str(e)}")
                                 continue
                         
                         next_page_token = playlist_items.get('nextPageToken')
                         if not next_page_token:
                             break
                             
-                    except HttpError as e:
+                    except youtube_api.HttpError as e:
                         logger.error(f"YouTube API error while fetching videos: {str(e)}")
                         if e.resp.status in [403, 429]:
                             messages.warning(request, 'Some videos could not be fetched due to API limits. Please try again later.')
                             break
                         raise
                 
-                if not videos:
+                if not placements:
                     playlist.delete()
                     messages.error(request, 'No valid videos found in the playlist.')
                     return redirect('playlists:add_playlist')
                 
+                # Store first-seen videos. A concurrent import may store the
+                # same ids, so ignore conflicts and read back the rows that won
+                if new_descriptions:
+                    VideoMetadata.objects.bulk_create(
+                        [metadata[video_id] for video_id in new_descriptions], ignore_conflicts=True
+                    )
+                    stored = VideoMetadata.objects.in_bulk(list(new_descriptions), field_name='youtube_id')
+                    VideoDetails.objects.bulk_create([
+                        VideoDetails(metadata=stored[video_id], description=description)
+                        for video_id, description in new_descriptions.items()
+                    ], ignore_conflicts=True)
+                    metadata.update(stored)
+                
                 # Bulk create videos
-                Video.objects.bulk_create(videos)
+                videos = Video.objects.bulk_create([
+                    Video(playlist=playlist, metadata=metadata[video_id], position=position)
+                    for position, video_id in enumerate(placements)
+                ])
+                # Thumbnails of stored videos were cached by an earlier import
+                run_in_background(cache_thumbnails, [playlist.thumbnail_url] + [
+                    metadata[video_id].thumbnail_url for video_id in new_descriptions
+                ])
                 
-                # Update video count and save
+                # Update video count and save; every video starts incomplete
                 playlist.video_count = len(videos)
+                playlist.next_position = videos[0].position
                 playlist.save()
                 
+                logger.info("Playlist imported", extra={
+                    'event': 'playlist_imported',
+                    'playlist': playlist.pk,
+                    'youtube_id': playlist_id,
+                    'videos': len(videos),
+                    'new_videos': len(new_descriptions),
+                    'skipped': skipped,
+                    'pages': pages,
+                    'duration_lookups': lookups,
+                    'total_seconds': int(total_duration.total_seconds()),
+                    'elapsed_ms': round((time.perf_counter() - import_started) * 1000),
+                })
+                if skipped:
+                    logger.warning(f"Skipped {skipped} unreadable videos importing playlist {playlist_id}")
+                
                 messages.success(request, f'Successfully imported {len(videos)} videos from the playlist!')
                 return redirect('playlists:playlist_detail', pk=playlist.pk)
                 
-            except HttpError as e:
+            except youtube_api.HttpError as e:
                 logger.error(f"YouTube API error: {str(e)}")
                 if e.resp.status in [403, 429]:
                     messages.error(request, 'YouTube API quota exceeded. Please try again later.')
@@ -192,27 +263,27 @@ def add_playlist(request):
 @login_required
 def playlist_detail(request, pk):
     """Display playlist details and videos"""
-    playlist = get_object_or_404(Playlist, pk=pk, user=request.user)
+    playlist = get_object_or_404(Playlist.objects.visible(), pk=pk, user=request.user)
     
     try:
-        # Get all videos
-        videos = playlist.video_set.all().order_by('position')
+        # Load the videos once; every figure below is computed from this list
+        videos = list(playlist.video_set.with_metadata().order_by('position'))
+        completed_count = sum(1 for video in videos if video.is_completed)
+        total_count = len(videos)
         
         # Calculate overall progress
-        progress = playlist.get_progress_percentage()
-        completed_videos = videos.filter(is_completed=True)
-        remaining_videos = videos.exclude(is_completed=True)
+        progress = playlist.get_progress_percentage(completed_count)
         
         # Calculate duration-based progress
-        total_duration = playlist.get_total_duration()
-        completed_duration = playlist.get_completed_duration()
+        total_duration = playlist.get_total_duration(videos)
+        completed_duration = playlist.get_completed_duration(videos)
         duration_progress = 0
         if total_duration:
             duration_progress = (completed_duration.total_seconds() / total_duration.total_seconds()) * 100
         
         # Get today's schedule
         today = timezone.now().date()
-        todays_videos = playlist.get_videos_for_day(today)
+        todays_videos = playlist.get_videos_for_day(today, videos)
         
         # Calculate daily target duration
         daily_target_duration = timedelta()
@@ -225,7 +296,7 @@ def playlist_detail(request, pk):
         
         # Calculate estimated completion date
         estimated_completion = None
-        if remaining_videos.exists() and progress > 0:
+        if completed_count < total_count and progress > 0:
             days_elapsed = (timezone.now().date() - playlist.start_date).days
             if days_elapsed > 0:
                 completion_rate = progress / days_elapsed
@@ -234,7 +305,7 @@ def playlist_detail(request, pk):
                     estimated_completion = timezone.now().date() + timedelta(days=days_remaining)
         
         # Get complete schedule
-        daily_schedule = playlist.get_daily_schedule()
+        daily_schedule = playlist.get_daily_schedule(videos)
         
         context = {
             'playlist': playlist,
@@ -244,8 +315,8 @@ def playlist_detail(request, pk):
             'todays_videos': todays_videos,
             'todays_completed': todays_completed,
             'todays_total': todays_total,
-            'completed_count': completed_videos.count(),
-            'total_count': videos.count(),
+            'completed_count': completed_count,
+            'total_count': total_count,
             'total_duration': total_duration,
             'completed_duration': completed_duration,
             'daily_target_duration': daily_target_duration,
@@ -263,7 +334,7 @@ def playlist_detail(request, pk):
 @login_required
 def playlist_edit(request, pk):
     """Edit playlist settings"""
-    playlist = get_object_or_404(Playlist, pk=pk, user=request.user)
+    playlist = get_object_or_404(Playlist.objects.visible(), pk=pk, user=request.user)
     
     if request.method == 'POST':
         target_days = int(request.POST.get('target_days', 30))
@@ -278,15 +349,34 @@ def playlist_edit(request, pk):
 @login_required
 def playlist_delete(request, pk):
     """Delete a playlist"""
-    playlist = get_object_or_404(Playlist, pk=pk, user=request.user)
+    playlist = get_object_or_404(Playlist.objects.visible(), pk=pk, user=request.user)
     
     if request.method == 'POST':
-        playlist.delete()
+        # Hide it now; the videos are deleted in batches in the background
+        playlist.hide()
+        run_in_background(purge_playlist, playlist.pk)
         messages.success(request, 'Playlist deleted successfully!')
         return redirect('playlists:playlist_list')
     
     return render(request, 'playlists/playlist_delete.html', {'playlist': playlist})
 
+@login_required
+@replica_reads
+def search(request):
+    """Search the user's videos by title and description"""
+    query = request.GET.get('q', '').strip()
+    results = search_videos(request.user, query) if query else []
+    return render(request, 'playlists/search.html', {'query': query, 'results': results})
+
+@login_required
+@replica_reads
+def search_api(request):
+    """API endpoint returning ranked, highlighted search results"""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'q is required'}, status=400)
+    return JsonResponse({'query': query, 'results': search_videos(request.user, query)})
+
 @login_required
 def import_playlist(request):
     """API endpoint for importing playlist"""
@@ -302,12 +392,71 @@ def import_playlist(request):
     
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
-@login_required
-def fetch_playlist_info(request):
-    """Fetch playlist information from YouTube API"""
+def format_duration(duration):
+    """Format a timedelta as "Xh Ym" for previews"""
+    seconds = int(duration.total_seconds())
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+
+async def preview_events(youtube, playlist_id, info, context):
+    """Events for a playlist preview, ending with the exact total duration"""
+    yield {'event': 'playlist', **info}
+    counted, total = 0, timedelta()
+    try:
+        async for counted, total in youtube_api.iter_playlist_durations(
+            youtube, playlist_id, settings.YOUTUBE_PREVIEW_CONCURRENCY, context
+        ):
+            yield {'event': 'progress', 'videos_counted': counted, 'total_seconds': int(total.total_seconds())}
+    except youtube_api.HttpError as e:
+        logger.error(f"YouTube API error while totalling playlist {playlist_id}: {str(e)}")
+        quota = e.resp.status in [403, 429]
+        yield {
+            'event': 'error',
+            'error': 'YouTube API quota exceeded' if quota else 'Error accessing YouTube API',
+            'status': 429 if quota else 502,
+        }
+        return
+    except Exception as e:
+        logger.error(f"Error totalling playlist {playlist_id}: {str(e)}")
+        yield {'event': 'error', 'error': 'Internal server error', 'status': 500}
+        return
+    yield {
+        'event': 'done',
+        **info,
+        'videos_counted': counted,
+        'total_seconds': int(total.total_seconds()),
+        'total_duration': format_duration(total) if counted else "Unknown duration",
+    }
+
+async def ndjson_preview(events):
+    async for event in events:
+        yield json.dumps(event) + '\n'
+
+async def last_preview_event(events):
+    """The ``done`` or ``error`` event that ends a preview"""
+    async for event in events:
+        if event['event'] in ('done', 'error'):
+            return event
+
+async def fetch_playlist_info(request):
+    """Fetch playlist information from YouTube API
+    
+    An async view: under ASGI it runs on the event loop, and the blocking
+    YouTube calls go to executor threads only while they are in flight, so
+    no worker thread waits out the whole preview. Totalling the durations
+    takes one request per 50 videos. The JSON response waits for the total,
+    so a quota or API failure along the way still gets its 429/502/500
+    status. Send ``?stream=1`` (or ``Accept: application/x-ndjson``) to
+    receive running totals as NDJSON instead. A failure after the playlist
+    lookup is then an ``error`` event in a 200 stream.
+    """
+    # login_required only wraps sync views before Django 5.0
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return redirect_to_login(request.get_full_path())
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST method is allowed'}, status=405)
     
+    context = contextvars.copy_context()
+    
     try:
         data = json.loads(request.body)
         playlist_url = data.get('url')
@@ -319,57 +468,23 @@ def fetch_playlist_info(request):
         youtube = get_youtube_service()
         
         # Get playlist details
-        playlist_response = youtube.playlists().list(
-            part='snippet',
+        playlist_response = await youtube_api.execute_async(youtube.playlists().list(
+            part='snippet,contentDetails',
             id=playlist_id
-        ).execute()
+        ), asyncio.Semaphore(1), context)
         
         if not playlist_response.get('items'):
             return JsonResponse({'error': 'Playlist not found or is private'}, status=404)
         
-        playlist_data = playlist_response['items'][0]['snippet']
-        
-        # Get first page of videos to count them
-        playlist_items = youtube.playlistItems().list(
-            part='snippet,contentDetails',
-            playlistId=playlist_id,
-            maxResults=50
-        ).execute()
-        
-        video_count = playlist_items['pageInfo']['totalResults']
-        
-        # Get duration of first batch of videos
-        if playlist_items.get('items'):
-            video_ids = [item['contentDetails']['videoId'] for item in playlist_items['items']]
-            video_response = youtube.videos().list(
-                part='contentDetails',
-                id=','.join(video_ids)
-            ).execute()
-            
-            total_duration = timedelta()
-            for video in video_response.get('items', []):
-                duration = isodate.parse_duration(video['contentDetails']['duration'])
-                total_duration += duration
-            
-            # Estimate total duration based on first batch
-            avg_duration = total_duration / len(video_response['items'])
-            estimated_total_duration = avg_duration * video_count
-            
-            hours = int(estimated_total_duration.total_seconds() // 3600)
-            minutes = int((estimated_total_duration.total_seconds() % 3600) // 60)
-            duration_str = f"{hours}h {minutes}m"
-        else:
-            duration_str = "Unknown duration"
-        
-        return JsonResponse({
-            'title': playlist_data['title'],
-            'description': playlist_data['description'],
-            'thumbnail_url': playlist_data['thumbnails']['high']['url'],
-            'video_count': video_count,
-            'total_duration': duration_str
-        })
+        playlist_data = playlist_response['items'][0]
+        info = {
+            'title': playlist_data['snippet']['title'],
+            'description': playlist_data['snippet']['description'],
+            'thumbnail_url': playlist_data['snippet']['thumbnails']['high']['url'],
+            'video_count': playlist_data['contentDetails']['itemCount'],
+        }
         
-    except HttpError as e:
+    except youtube_api.HttpError as e:
         logger.error(f"YouTube API error: {str(e)}")
         if e.resp.status in [403, 429]:
             return JsonResponse({'error': 'YouTube API quota exceeded'}, status=429)
@@ -378,19 +493,36 @@ def fetch_playlist_info(request):
     except Exception as e:
         logger.error(f"Error fetching playlist info: {str(e)}")
         return JsonResponse({'error': 'Internal server error'}, status=500)
+    
+    events = preview_events(youtube, playlist_id, info, context)
+    if request.GET.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        response = StreamingHttpResponse(ndjson_preview(events), content_type='application/x-ndjson')
+        response['X-Accel-Buffering'] = 'no'
+    else:
+        result = await last_preview_event(events)
+        response = JsonResponse(
+            {key: value for key, value in result.items() if key not in ('event', 'status')},
+            status=result.get('status', 200),
+        )
+    response['Cache-Control'] = 'no-store'
+    return response
 
 @login_required
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=user_etag, last_modified_func=user_last_modified)
 def get_user_streak(request):
     """Get user's current learning streak"""
     try:
         # Get user's completed videos in the last 30 days
         thirty_days_ago = timezone.now() - timedelta(days=30)
-        completed_videos = Video.objects.filter(
+        completed_at = list(Video.objects.visible().filter(
             playlist__user=request.user,
+            is_completed=True,
             completed_at__gte=thirty_days_ago
-        ).order_by('completed_at')
+        ).order_by('completed_at').values_list('completed_at', flat=True))
         
-        if not completed_videos:
+        if not completed_at:
             return JsonResponse({
                 'current_streak': 0,
                 'longest_streak': 0,
@@ -404,8 +536,8 @@ def get_user_streak(request):
         
         # Group completed videos by date
         completion_dates = set()
-        for video in completed_videos:
-            completion_dates.add(video.completed_at.date())
+        for timestamp in completed_at:
+            completion_dates.add(timestamp.date())
         
         # Calculate current streak
         while current_date in completion_dates:
@@ -426,7 +558,7 @@ def get_user_streak(request):
         return JsonResponse({
             'current_streak': current_streak,
             'longest_streak': longest_streak,
-            'total_completed': len(completed_videos)
+            'total_completed': len(completed_at)
         })
         
     except Exception as e:
@@ -435,24 +567,25 @@ def get_user_streak(request):
 
 @login_required
 def update_video_progress(request, video_id):
-    """Mark a video as completed"""
+    """Mark a video as completed, or as not completed with ``completed=false``"""
     if request.method == 'POST':
         try:
-            video = get_object_or_404(Video, id=video_id, playlist__user=request.user)
-            video.mark_completed()
+            video = get_object_or_404(
+                Video.objects.visible().select_related('playlist'), id=video_id, playlist__user=request.user
+            )
+            if request.POST.get('completed', 'true').lower() == 'false':
+                video.mark_incomplete()
+            else:
+                video.mark_completed(request.user)
             
             # Calculate new progress
             playlist = video.playlist
-            progress = playlist.get_progress_percentage()
             completed_count = playlist.video_set.filter(is_completed=True).count()
+            progress = playlist.get_progress_percentage(completed_count)
             
             # Get today's completion count
             today = timezone.now().date()
-            videos_completed_today = Video.objects.filter(
-                playlist__user=request.user,
-                is_completed=True,
-                completed_at__date=today
-            ).count()
+            videos_completed_today = Video.objects.visible().filter(playlist__user=request.user).completed_on(today).count()
             
             # Update daily goal
             daily_goal, created = DailyGoal.objects.get_or_create(
@@ -462,13 +595,24 @@ def update_video_progress(request, video_id):
             )
             daily_goal.update_progress(videos_completed_today)
             
+            # Push the new numbers to the user's other open tabs
+            publish_progress(
+                request.user,
+                playlist_id=playlist.pk,
+                video_id=video.pk,
+                progress=progress,
+                completed_count=completed_count,
+                videos_completed_today=videos_completed_today,
+                videos_planned=daily_goal.videos_planned,
+            )
+            
             return JsonResponse({
                 'success': True,
                 'progress': progress,
                 'completed_count': completed_count,
                 'videos_completed_today': videos_completed_today,
                 'videos_planned': daily_goal.videos_planned,
-                'completion_date': video.completed_at.strftime('%Y-%m-%d %H:%M:%S')
+                'completion_date': video.completed_at.strftime('%Y-%m-%d %H:%M:%S') if video.completed_at else None
             })
         except Exception as e:
             logger.error(f"Error updating video progress: {str(e)}")
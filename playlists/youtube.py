@@ -0,0 +1,148 @@
+"""
+YouTube Data API helpers.
+
+The Google client stack and isodate are imported on the first API call
+rather than at module load, so worker boot and management commands don't
+pay for them. Use ``youtube.HttpError`` in except clauses; it resolves the
+real class on first use.
+"""
+
+from learning_tracker.metrics import record_youtube_call
+from datetime import timedelta
+from functools import cache, partial
+import asyncio
+import threading
+import time
+
+PAGE_SIZE = 50
+
+# httplib2.Http objects are not thread-safe; keep one per executor thread
+_local = threading.local()
+
+def __getattr__(name):
+    if name == 'HttpError':
+        from googleapiclient.errors import HttpError
+        return HttpError
+    if name == 'InstrumentedHttpRequest':
+        return instrumented_request_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@cache
+def instrumented_request_class():
+    """HttpRequest subclass that reports each YouTube API call to the request metrics"""
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import HttpRequest
+
+    class InstrumentedHttpRequest(HttpRequest):
+        def execute(self, http=None, num_retries=0):
+            started = time.perf_counter()
+            status = 'ok'
+            try:
+                return super().execute(http=http, num_retries=num_retries)
+            except HttpError as e:
+                status = str(e.resp.status)
+                raise
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                record_youtube_call(self.methodId or 'unknown', status, time.perf_counter() - started)
+
+    return InstrumentedHttpRequest
+
+@cache
+def discovery_document():
+    """The bundled YouTube v3 discovery document, parsed once per process"""
+    from googleapiclient.discovery_cache import get_static_doc
+    return get_static_doc('youtube', 'v3')
+
+def build_service(api_key):
+    """YouTube API client that reports its calls to the request metrics"""
+    from googleapiclient.discovery import build_from_document
+    return build_from_document(
+        discovery_document(), developerKey=api_key, requestBuilder=instrumented_request_class()
+    )
+
+def warm():
+    """Import the client stack and load the discovery document now"""
+    instrumented_request_class()
+    discovery_document()
+    import isodate  # noqa: F401
+
+def _thread_http():
+    if not hasattr(_local, 'http'):
+        from googleapiclient.http import build_http
+        _local.http = build_http()
+    return _local.http
+
+def _execute_in_thread(request):
+    return request.execute(http=_thread_http())
+
+async def execute_async(request, limit, context):
+    """Run a blocking API request on a worker thread, at most ``limit`` at once
+    
+    ``context`` is the request's contextvars snapshot, so the call is still
+    counted against the view that started it.
+    """
+    async with limit:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(context.copy().run, _execute_in_thread, request))
+
+async def iter_playlist_durations(youtube, playlist_id, concurrency, context):
+    """Yield (videos_counted, total_duration) each time a batch of durations arrives
+    
+    playlistItems pages have to be walked in order because each one carries
+    the next page's token, but every page's videos().list lookup is started
+    as soon as its ids are known and runs alongside the rest of the walk.
+    """
+    import isodate
+
+    limit = asyncio.Semaphore(concurrency)
+    pending = set()
+    counted = 0
+    total = timedelta()
+
+    def collect(task):
+        nonlocal counted, total
+        for item in task.result().get('items', []):
+            try:
+                total += isodate.parse_duration(item['contentDetails']['duration'])
+            except (KeyError, ValueError, isodate.ISO8601Error):
+                continue
+            counted += 1
+
+    try:
+        page_token = None
+        while True:
+            page = await execute_async(youtube.playlistItems().list(
+                part='contentDetails',
+                playlistId=playlist_id,
+                maxResults=PAGE_SIZE,
+                pageToken=page_token,
+                fields='nextPageToken,items/contentDetails/videoId',
+            ), limit, context)
+            video_ids = [item['contentDetails']['videoId'] for item in page.get('items', [])]
+            if video_ids:
+                pending.add(asyncio.ensure_future(execute_async(youtube.videos().list(
+                    part='contentDetails',
+                    id=','.join(video_ids),
+                    fields='items/contentDetails/duration',
+                ), limit, context)))
+
+            for task in [task for task in pending if task.done()]:
+                pending.discard(task)
+                collect(task)
+                yield counted, total
+
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                collect(task)
+            yield counted, total
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,38 @@
+from rest_framework import mixins
+from rest_framework.response import Response
+from learning_tracker.api import APIViewSet, SparseFieldsetSerializer
+from .models import DailyGoal, LearningStreak
+
+
+class DailyGoalSerializer(SparseFieldsetSerializer):
+    class Meta:
+        model = DailyGoal
+        fields = ['date', 'videos_planned', 'minutes_planned', 'videos_completed', 'is_completed']
+
+
+class StreakSerializer(SparseFieldsetSerializer):
+    class Meta:
+        model = LearningStreak
+        fields = ['current_streak', 'longest_streak', 'last_activity_date']
+
+
+class DailyGoalViewSet(mixins.ListModelMixin, APIViewSet):
+    """The user's daily goals, latest first"""
+    serializer_class = DailyGoalSerializer
+    throttle_scope = 'api-progress'
+    ordering = ('-date',)
+
+    def get_queryset(self):
+        return DailyGoal.objects.filter(user=self.request.user)
+
+
+class StreakViewSet(APIViewSet):
+    """The user's learning streak, a single object"""
+    serializer_class = StreakSerializer
+    throttle_scope = 'api-progress'
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        # Not get_or_create: safe requests may be reading from the replica
+        streak = LearningStreak.objects.filter(user=request.user).first() or LearningStreak(user=request.user)
+        return Response(self.get_serializer(streak).data)
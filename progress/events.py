@@ -0,0 +1,162 @@
+"""
+Progress events pushed to a user's open tabs.
+
+Streams live in whichever web process accepted them, while the write that
+causes an event may happen in any process. ``publish_progress()`` therefore
+stores the event as a ``ProgressEvent`` row. In each process a relay task on
+the event loop polls for new rows of the users streaming there every
+PROGRESS_POLL_SECONDS and hands them to the in-process ``broker``. Rows are
+deleted after EVENT_RETENTION.
+
+Streams mark their user as listening in the shared cache, so writes by users
+without an open tab store nothing. Delivery is best effort: a slow tab drops
+events, like before.
+"""
+
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+import asyncio
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per connection before the slowest tabs start dropping them
+SUBSCRIBER_QUEUE_SIZE = 32
+LISTENING_KEY = 'progress-listening:{user_id}'
+# Streams refresh the listening mark on every keepalive, well within this
+LISTENING_SECONDS = 60
+# Stored events older than this are never relayed and get deleted
+EVENT_RETENTION = timedelta(minutes=1)
+
+def poll_seconds():
+    return getattr(settings, 'PROGRESS_POLL_SECONDS', 1.0)
+
+class ProgressBroker:
+    """In-process pub/sub fanning progress events out to a user's open connections
+
+    Subscribers are asyncio queues living on the ASGI event loop; publishers
+    may be sync views running in worker threads, so delivery always goes
+    through ``call_soon_threadsafe``. The first subscriber on a loop starts
+    the relay of stored events, and the last one to leave stops it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._relay = None
+
+    def subscribe(self, user_id):
+        """Register a queue for a user's events; must be called on the event loop"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        entry = (loop, queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(entry)
+            if self._relay is None or self._relay.done() or self._relay.get_loop() is not loop:
+                self._relay = loop.create_task(self.relay(timezone.now()))
+        return entry
+
+    def unsubscribe(self, user_id, entry):
+        """Remove a queue registered with subscribe"""
+        with self._lock:
+            entries = self._subscribers.get(user_id)
+            if entries is None:
+                return
+            entries.discard(entry)
+            if not entries:
+                del self._subscribers[user_id]
+            if not self._subscribers and self._relay is not None:
+                self._relay.cancel()
+                self._relay = None
+
+    def publish(self, user_id, event):
+        """Send an event to every open connection of a user in this process; safe from any thread"""
+        with self._lock:
+            entries = list(self._subscribers.get(user_id, ()))
+        for loop, queue in entries:
+            try:
+                loop.call_soon_threadsafe(_deliver, queue, event)
+            except RuntimeError:
+                # Loop already closed; the connection is going away
+                pass
+        return len(entries)
+
+    def has_subscribers(self, user_id):
+        """Whether a user has any open connection in this process"""
+        with self._lock:
+            return user_id in self._subscribers
+
+    def connection_count(self):
+        """Number of open connections across all users"""
+        with self._lock:
+            return sum(len(entries) for entries in self._subscribers.values())
+
+    async def relay(self, since):
+        """Publish the events stored since ``since`` for this process's subscribers, until cancelled"""
+        last_id = 0
+        last_purge = timezone.now()
+        while True:
+            await asyncio.sleep(poll_seconds())
+            with self._lock:
+                user_ids = list(self._subscribers)
+            try:
+                events = await sync_to_async(_stored_events)(user_ids, last_id, since)
+                if timezone.now() - last_purge > EVENT_RETENTION:
+                    last_purge = timezone.now()
+                    await sync_to_async(_purge_events)()
+            except Exception:
+                logger.exception("Could not read stored progress events")
+                continue
+            for pk, user_id, data in events:
+                last_id = pk
+                self.publish(user_id, {'event': 'progress', 'data': data})
+
+def _deliver(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.warning("Dropping progress event for a slow subscriber")
+
+def _stored_events(user_ids, last_id, since):
+    from .models import ProgressEvent
+
+    return list(ProgressEvent.objects.filter(
+        pk__gt=last_id, created_at__gte=since, user_id__in=user_ids,
+    ).order_by('pk').values_list('pk', 'user_id', 'data'))
+
+def _purge_events():
+    from .models import ProgressEvent
+
+    ProgressEvent.objects.filter(created_at__lt=timezone.now() - EVENT_RETENTION).delete()
+
+broker = ProgressBroker()
+
+def mark_listening(user_id):
+    """Note in the shared cache that a user has a stream open; refreshed on keepalives"""
+    cache.set(LISTENING_KEY.format(user_id=user_id), True, LISTENING_SECONDS)
+
+def is_listening(user_id):
+    return cache.get(LISTENING_KEY.format(user_id=user_id)) is not None
+
+def publish_progress(user, **data):
+    """Push a progress update to all of a user's open tabs, in any web process"""
+    from .models import LearningStreak, ProgressEvent
+
+    if not is_listening(user.pk):
+        return False
+    if 'current_streak' not in data:
+        streak = LearningStreak.objects.filter(user=user).values('current_streak', 'longest_streak').first()
+        if streak:
+            data.update(streak)
+    ProgressEvent.objects.create(user=user, data=data)
+    return True
+
+def format_event(event):
+    """Encode an event as a Server-Sent Events frame"""
+    payload = json.dumps(event['data'], default=str)
+    return f"event: {event['event']}\ndata: {payload}\n\n".encode()
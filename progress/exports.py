@@ -0,0 +1,151 @@
+"""
+Streaming exports of learning history as CSV or NDJSON.
+
+``iter_export()`` yields the CSV header before touching the database,
+then reads rows with ``values_list().iterator(chunk_size=EXPORT_CHUNK_SIZE)``
+and encodes one chunk of rows per yielded piece. Memory stays at one chunk
+whatever the size of the history, and no model instances are built. The
+views wrap it in a StreamingHttpResponse; the ``export_history`` command
+writes it to a file, for one user or the whole site.
+
+Under ASGI, Django buffers a sync iterator into a list before sending it, so
+``streaming_body()`` hands ASGI requests an async iterator that pulls each
+chunk from a thread instead.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from playlists.models import Video
+from .models import DailyGoal, LearningSession
+from datetime import date, datetime, timedelta
+import csv
+import io
+import json
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# name: (model, user lookup, extra filters, [(column, field), ...])
+DATASETS = {
+    'completions': (Video, 'playlist__user', {'is_completed': True, 'playlist__deleted_at__isnull': True}, [
+        ('playlist_id', 'playlist__youtube_id'),
+        ('playlist', 'playlist__title'),
+        ('video_id', 'metadata__youtube_id'),
+        ('title', 'metadata__title'),
+        ('position', 'position'),
+        ('duration_seconds', 'metadata__duration'),
+        ('completed_at', 'completed_at'),
+    ]),
+    'goals': (DailyGoal, 'user', {}, [
+        ('date', 'date'),
+        ('videos_planned', 'videos_planned'),
+        ('videos_completed', 'videos_completed'),
+        ('is_completed', 'is_completed'),
+    ]),
+    'sessions': (LearningSession, 'user', {}, [
+        ('date', 'date'),
+        ('start_time', 'start_time'),
+        ('end_time', 'end_time'),
+        ('videos_completed', 'videos_completed'),
+        ('duration_seconds', 'total_duration'),
+    ]),
+}
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_columns(dataset, all_users=False):
+    model, user_lookup, filters, columns = DATASETS[dataset]
+    if all_users:
+        columns = [('user', f'{user_lookup}__email')] + columns
+    return columns
+
+
+def export_rows(dataset, user=None):
+    """Lazy tuples for ``dataset``, for ``user`` or every user when None"""
+    model, user_lookup, filters, columns = DATASETS[dataset]
+    queryset = model.objects.filter(**filters)
+    if user is not None:
+        queryset = queryset.filter(**{user_lookup: user})
+    fields = [field for _, field in export_columns(dataset, all_users=user is None)]
+    # Primary key order walks the table instead of sorting the whole history
+    return queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size())
+
+
+def _plain(value):
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _encode_csv(names, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(names)
+    yield flush()
+    for batch in batches:
+        writer.writerows([_plain(value) for value in row] for row in batch)
+        yield flush()
+
+
+def _encode_ndjson(names, batches):
+    for batch in batches:
+        yield ''.join(
+            json.dumps(dict(zip(names, map(_plain, row)))) + '\n' for row in batch
+        ).encode()
+
+
+def iter_export(dataset, fmt, user=None):
+    """Encoded pieces of the export: the CSV header first, then one per chunk of rows"""
+    if dataset not in DATASETS or fmt not in FORMATS:
+        raise ValueError(f'Unknown export {dataset}.{fmt}')
+    names = [name for name, _ in export_columns(dataset, all_users=user is None)]
+    batches = _batches(export_rows(dataset, user), chunk_size())
+    encode = _encode_csv if fmt == 'csv' else _encode_ndjson
+    return encode(names, batches)
+
+
+async def aiter_export(pieces):
+    """Async iterator over a sync export, fetching each piece in a thread"""
+    next_piece = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            piece = await next_piece(pieces, None)
+            if piece is None:
+                return
+            yield piece
+    finally:
+        # Releases the database cursor if the client went away mid-download
+        await sync_to_async(pieces.close, thread_sensitive=True)()
+
+
+def streaming_body(request, pieces):
+    """What to give StreamingHttpResponse so the export streams under WSGI and ASGI"""
+    if isinstance(request, ASGIRequest):
+        return aiter_export(pieces)
+    return pieces
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from learning_tracker.startup import measure_boot
+
+
+class Command(BaseCommand):
+    help = 'Report what booting a worker imports and how long each module takes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Modules to list')
+        parser.add_argument(
+            '--sort', choices=['cumulative', 'self'], default='cumulative',
+            help='cumulative includes the module\'s own imports',
+        )
+        parser.add_argument('--package', help='Only list modules under this package, e.g. googleapiclient')
+
+    def handle(self, *args, **options):
+        report = measure_boot(importtime=True)
+        imports = report['imports']
+        if options['package']:
+            prefix = options['package']
+            imports = {
+                name: cost for name, cost in imports.items()
+                if name == prefix or name.startswith(prefix + '.')
+            }
+
+        index = 1 if options['sort'] == 'cumulative' else 0
+        rows = sorted(imports.items(), key=lambda item: item[1][index], reverse=True)[:options['top']]
+
+        self.stdout.write(
+            f"Boot took {report['seconds'] * 1000:.0f} ms and loaded {len(report['modules'])} modules"
+            " (-X importtime adds some overhead)"
+        )
+        self.stdout.write(f"{'self ms':>9}{'cumul. ms':>11}  module")
+        for name, (self_us, cumulative_us) in rows:
+            self.stdout.write(f'{self_us / 1000:>9.1f}{cumulative_us / 1000:>11.1f}  {name}')
+
+        for package in ('googleapiclient', 'google.auth', 'isodate'):
+            if package in report['modules']:
+                self.stdout.write(self.style.WARNING(f'{package} is imported at boot; it should load on first use'))
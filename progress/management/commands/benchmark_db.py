@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction, OperationalError
+from learning_tracker.db import SQLITE_ENGINE, SQLITE_PRAGMAS
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+SETUP_SQL = [
+    'CREATE TABLE IF NOT EXISTS bench_goal (user_id INTEGER PRIMARY KEY, videos_completed INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS bench_completion (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, completed_at REAL NOT NULL)',
+]
+TEARDOWN_SQL = ['DROP TABLE IF EXISTS bench_completion', 'DROP TABLE IF EXISTS bench_goal']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent completion writes against stock and tuned database settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200, help='Writes per thread')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument(
+            '--modes', default='sqlite-stock,sqlite-tuned',
+            help='Comma separated: sqlite-stock, sqlite-tuned, default (the configured DATABASE_URL)',
+        )
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Run the default mode in the configured database itself instead of a temporary one',
+        )
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='bench-db-')
+        for mode in options['modes'].split(','):
+            mode = mode.strip()
+            alias = f'bench_{mode.replace("-", "_")}'
+            connections.settings[alias] = connections.configure_settings({
+                'default': connections.settings['default'],
+                alias: self.mode_settings(mode, workdir, options['in_place']),
+            })[alias]
+            # The bench_* tables are created and dropped, so the configured
+            # server only gets a throwaway database unless --in-place is given
+            temporary = mode == 'default' and not options['in_place'] and connections[alias].vendor != 'sqlite'
+            if temporary:
+                old_name = connections[alias].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                result = self.run_mode(alias, options)
+            finally:
+                connections[alias].close()
+                if temporary:
+                    connections[alias].creation.destroy_test_db(old_name, verbosity=0)
+            self.stdout.write(
+                f"{mode:<14} {result['throughput']:>8.1f} writes/s  "
+                f"p50 {result['p50'] * 1000:6.1f}ms  p95 {result['p95'] * 1000:6.1f}ms  "
+                f"locked errors {result['errors']}"
+            )
+
+    def mode_settings(self, mode, workdir, in_place=False):
+        name = os.path.join(workdir, f'{mode}.sqlite3')
+        if mode == 'default':
+            config = dict(connections.settings['default'])
+            if not in_place:
+                if config['ENGINE'] in ('django.db.backends.sqlite3', SQLITE_ENGINE):
+                    config['NAME'] = name
+                else:
+                    config['TEST'] = {'NAME': f"{config['NAME']}_bench"}
+            return config
+        if mode == 'sqlite-stock':
+            return {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name}
+        if mode == 'sqlite-tuned':
+            return {
+                'ENGINE': SQLITE_ENGINE,
+                'NAME': name,
+                'CONN_MAX_AGE': 600,
+                'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE', 'pragmas': dict(SQLITE_PRAGMAS)},
+            }
+        raise ValueError(f'Unknown mode: {mode}')
+
+    def run_mode(self, alias, options):
+        with connections[alias].cursor() as cursor:
+            for sql in TEARDOWN_SQL + SETUP_SQL:
+                cursor.execute(sql)
+            for user_id in range(options['users']):
+                cursor.execute('INSERT INTO bench_goal VALUES (%s, 0)', [user_id])
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(worker_id):
+            local_latencies = []
+            local_errors = 0
+            for i in range(options['writes']):
+                user_id = (worker_id * options['writes'] + i) % options['users']
+                started = time.perf_counter()
+                try:
+                    # Read-then-write, like get_or_create followed by a
+                    # completion; deferred SQLite transactions fail the
+                    # lock upgrade here instead of waiting
+                    with transaction.atomic(using=alias):
+                        with connections[alias].cursor() as cursor:
+                            cursor.execute('SELECT COUNT(*) FROM bench_completion WHERE user_id = %s', [user_id])
+                            count = cursor.fetchone()[0]
+                            cursor.execute(
+                                'INSERT INTO bench_completion (user_id, completed_at) VALUES (%s, %s)',
+                                [user_id, time.time()],
+                            )
+                            cursor.execute(
+                                'UPDATE bench_goal SET videos_completed = %s WHERE user_id = %s', [count + 1, user_id]
+                            )
+                except OperationalError:
+                    local_errors += 1
+                local_latencies.append(time.perf_counter() - started)
+            connections[alias].close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(worker, range(options['threads'])))
+        elapsed = time.perf_counter() - started
+
+        with connections[alias].cursor() as cursor:
+            for sql in TEARDOWN_SQL:
+                cursor.execute(sql)
+
+        latencies.sort()
+        return {
+            'throughput': (len(latencies) - sum(errors)) / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'errors': sum(errors),
+        }
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+from learning_tracker.log import JSONFormatter, QueueListenerHandler
+import logging
+import os
+import tempfile
+import time
+
+PAGE_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = 'Measure how long playlist imports spend logging, per logging setup'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--videos', type=int, default=2000, help='Videos per simulated import')
+        parser.add_argument('--imports', type=int, default=5)
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='bench-log-')
+        modes = [
+            ('per-video, sync handlers', self.per_video, False),
+            ('per-video, queued', self.per_video, True),
+            ('summary, queued', self.summary, True),
+        ]
+        for label, emit, queued in modes:
+            logger, handler, closers = self.make_logger(os.path.join(workdir, f'{len(label)}-{queued}.log'), queued)
+            try:
+                started = time.perf_counter()
+                for _ in range(options['imports']):
+                    emit(logger, options['videos'])
+                elapsed = time.perf_counter() - started
+            finally:
+                for close in closers:
+                    close()
+            per_import = elapsed / options['imports'] * 1000
+            # Records shed by a full queue cost nothing to log, so they are reported next to the time
+            dropped = getattr(handler, 'dropped', 0)
+            self.stdout.write(
+                f'{label:<26} {per_import:8.2f} ms of logging per {options["videos"]}-video import  '
+                f'{dropped} records dropped'
+            )
+
+    def make_logger(self, path, queued):
+        """A logger writing to a file and the null device, directly or through the queue
+
+        Both paths use the JSON formatter and INFO level of the app's LOGGING,
+        so only the handler differs between modes.
+        """
+        file_handler = logging.FileHandler(path)
+        console_handler = logging.StreamHandler(open(os.devnull, 'w'))
+        for handler in (file_handler, console_handler):
+            handler.setFormatter(JSONFormatter())
+
+        logger = logging.getLogger(f'benchmark_logging.{os.path.basename(path)}')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        closers = [file_handler.close, console_handler.close, console_handler.stream.close]
+        if queued:
+            handler = QueueListenerHandler([console_handler, file_handler])
+            logger.addHandler(handler)
+            # Stopping drains the queue; it runs first so the writes finish before the files close
+            closers.insert(0, handler.stop)
+        else:
+            handler = None
+            logger.addHandler(file_handler)
+            logger.addHandler(console_handler)
+        return logger, handler, closers
+
+    def per_video(self, logger, videos):
+        """The importer's logging before: a line per page and per video"""
+        logger.info('Attempting to fetch playlist ID: PL-bench')
+        for position in range(videos):
+            if position % PAGE_SIZE == 0:
+                logger.info(f'Fetching details for {PAGE_SIZE} videos')
+            logger.info(f'Added video: Lecture {position + 1}')
+
+    def summary(self, logger, videos):
+        """The importer's logging now: DEBUG detail (filtered at INFO) and one summary event"""
+        logger.debug('Attempting to fetch playlist ID: PL-bench')
+        logger.info('Playlist imported', extra={
+            'event': 'playlist_imported',
+            'youtube_id': 'PL-bench',
+            'videos': videos,
+            'skipped': 0,
+            'pages': -(-videos // PAGE_SIZE),
+        })
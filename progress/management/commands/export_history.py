@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from progress.exports import DATASETS, FORMATS, iter_export
+import sys
+
+
+class Command(BaseCommand):
+    help = 'Stream learning history to a file as CSV or NDJSON, for one user or the whole site'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(FORMATS), default='csv')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--user', help='Email of the user to export')
+        target.add_argument('--all', action='store_true', help='Every user, with an extra user column')
+        parser.add_argument('--output', default='-', help='File to write; "-" for stdout')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = get_user_model().objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user with email {options['user']}")
+
+        pieces = iter_export(options['dataset'], options['fmt'], user=user)
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for piece in pieces:
+                out.write(piece)
+            out.flush()
+            return
+
+        written = 0
+        with open(options['output'], 'wb') as f:
+            for piece in pieces:
+                f.write(piece)
+                written += len(piece)
+        self.stderr.write(f"Wrote {written} bytes to {options['output']}")
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from playlists.models import Playlist, Video, VideoDetails, VideoMetadata
+from progress.models import DailyGoal, LearningStreak
+import random
+
+DEFAULT_SIZES = '8:0.3,25:0.35,60:0.2,200:0.1,1000:0.05'
+BATCH_SIZE = 2000
+
+
+def parse_sizes(value):
+    """Parse "size:weight,size:weight" into two lists"""
+    sizes, weights = [], []
+    try:
+        for part in value.split(','):
+            size, weight = part.split(':')
+            sizes.append(int(size))
+            weights.append(float(weight))
+    except ValueError:
+        raise CommandError(f'Invalid --playlist-sizes value: {value}')
+    return sizes, weights
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic users, playlists, completion histories and daily goals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--playlists-per-user', type=int, default=4, help='Mean; each user gets 1..2x-1')
+        parser.add_argument(
+            '--playlist-sizes', default=DEFAULT_SIZES,
+            help='Video counts and their weights, e.g. "10:0.5,200:0.4,2000:0.1"',
+        )
+        parser.add_argument('--completion', type=float, default=0.4, help='Mean fraction of each playlist completed')
+        parser.add_argument('--history-days', type=int, default=60)
+        parser.add_argument('--email-prefix', default='loadtest')
+        parser.add_argument('--password', default='loadtest-pass')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes, weights = parse_sizes(options['playlist_sizes'])
+        User = get_user_model()
+        password = make_password(options['password'])
+        prefix = options['email_prefix']
+        today = timezone.now().date()
+        now = timezone.now()
+
+        start = User.objects.filter(email__startswith=f'{prefix}-').count()
+        totals = {'users': 0, 'playlists': 0, 'videos': 0, 'completed': 0, 'goals': 0}
+
+        for n in range(start, start + options['users']):
+            with transaction.atomic():
+                user = User.objects.create(
+                    username=f'{prefix}-{n}',
+                    email=f'{prefix}-{n}@example.com',
+                    password=password,
+                )
+                completions_by_day = {}
+                playlist_count = rng.randint(1, max(1, options['playlists_per_user'] * 2 - 1))
+                for p in range(playlist_count):
+                    video_count = rng.choices(sizes, weights)[0]
+                    target_days = rng.choice([30, 60, 90])
+                    playlist = Playlist.objects.create(
+                        user=user,
+                        youtube_id=f'SYN-{prefix}-{n}-{p}',
+                        title=f'Synthetic course {n}.{p}',
+                        description='Generated for load testing',
+                        thumbnail_url=f'https://i.ytimg.com/vi/syn{n}x{p}/hqdefault.jpg',
+                        video_count=video_count,
+                        target_completion_days=target_days,
+                        start_date=today - timedelta(days=rng.randint(0, options['history_days'])),
+                    )
+                    fraction = min(1.0, max(0.0, rng.gauss(options['completion'], 0.2)))
+                    completed = int(video_count * fraction)
+                    metadata = VideoMetadata.objects.bulk_create([
+                        VideoMetadata(
+                            youtube_id=f'syn{n}x{p}x{position}',
+                            title=f'Lecture {position + 1}',
+                            thumbnail_url=f'https://i.ytimg.com/vi/syn{n}x{p}x{position}/hqdefault.jpg',
+                            duration=timedelta(seconds=rng.randint(120, 3600)),
+                        )
+                        for position in range(video_count)
+                    ], batch_size=BATCH_SIZE)
+                    VideoDetails.objects.bulk_create([
+                        VideoDetails(metadata=row, description='Synthetic lecture description. ' * rng.randint(1, 30))
+                        for row in metadata
+                    ], batch_size=BATCH_SIZE)
+                    videos = []
+                    for position in range(video_count):
+                        completed_at = None
+                        if position < completed:
+                            # Spread completions over the history, oldest first
+                            days_ago = int(options['history_days'] * (1 - position / max(completed, 1)))
+                            completed_at = now - timedelta(days=days_ago, minutes=rng.randint(0, 600))
+                            day = completed_at.date()
+                            completions_by_day[day] = completions_by_day.get(day, 0) + 1
+                        videos.append(Video(
+                            playlist=playlist,
+                            metadata=metadata[position],
+                            position=position,
+                            is_completed=completed_at is not None,
+                            completed_at=completed_at,
+                        ))
+                    Video.objects.bulk_create(videos, batch_size=BATCH_SIZE)
+                    playlist.refresh_next_position()
+                    totals['playlists'] += 1
+                    totals['videos'] += video_count
+                    totals['completed'] += completed
+
+                goals = []
+                for offset in range(options['history_days']):
+                    day = today - timedelta(days=offset)
+                    done = completions_by_day.get(day, 0)
+                    planned = rng.randint(1, 6)
+                    goals.append(DailyGoal(
+                        user=user,
+                        date=day,
+                        videos_planned=planned,
+                        videos_completed=done,
+                        is_completed=done >= planned,
+                    ))
+                DailyGoal.objects.bulk_create(goals, batch_size=BATCH_SIZE)
+                totals['goals'] += len(goals)
+
+                current = 0
+                day = today
+                while completions_by_day.get(day):
+                    current += 1
+                    day -= timedelta(days=1)
+                LearningStreak.objects.create(
+                    user=user,
+                    current_streak=current,
+                    longest_streak=max(current, rng.randint(0, 20)),
+                    last_activity_date=max(completions_by_day) if completions_by_day else None,
+                )
+                totals['users'] += 1
+
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Created {user.email}')
+
+        self.stdout.write(self.style.SUCCESS(
+            'Created {users} users, {playlists} playlists, {videos} videos '
+            '({completed} completed) and {goals} daily goals'.format(**totals)
+        ))
+        self.stdout.write(f"Log in as {prefix}-<n>@example.com with password '{options['password']}'")
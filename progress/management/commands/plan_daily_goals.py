@@ -0,0 +1,28 @@
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from progress.planning import plan_daily_goals
+
+
+class Command(BaseCommand):
+    help = "Plan every user's daily goal for the coming day and rebalance overdue playlists"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Plan this ISO date instead of tomorrow')
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'GOAL_PLANNING_WORKERS', 1),
+            help='Processes planning batches of users in parallel',
+        )
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError as error:
+                raise CommandError(f'Invalid --date: {error}')
+        totals = plan_daily_goals(day, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['users']} goals planned: {totals['videos_planned']} videos, "
+            f"{totals['minutes_planned']} minutes; {totals['rebalanced']} playlists rebalanced"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailygoal',
+            name='minutes_planned',
+            field=models.IntegerField(default=0),
+        ),
+    ]
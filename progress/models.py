@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -57,6 +58,8 @@ class DailyGoal(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     date = models.DateField()
     videos_planned = models.IntegerField(default=0)
+    # Length of the planned videos, set with videos_planned by progress.planning
+    minutes_planned = models.IntegerField(default=0)
     videos_completed = models.IntegerField(default=0)
     is_completed = models.BooleanField(default=False)
     
@@ -69,9 +72,18 @@ class DailyGoal(models.Model):
     
     def update_progress(self, completed_count):
         """Update progress towards daily goal"""
+        is_completed = self.videos_planned > 0 and completed_count >= self.videos_planned
+        if self.pk and completed_count == self.videos_completed and is_completed == self.is_completed:
+            return
         self.videos_completed = completed_count
-        if self.videos_planned > 0:
-            self.is_completed = self.videos_completed >= self.videos_planned
-        else:
-            self.is_completed = False
+        self.is_completed = is_completed
         self.save()
+
+class ProgressEvent(models.Model):
+    """A progress event on its way to the user's open streams in every web process
+
+    Rows are only kept for a minute or so; see progress.events.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
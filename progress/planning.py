@@ -0,0 +1,188 @@
+"""
+Nightly planning of each user's daily goal.
+
+``plan_daily_goals()`` runs once per day boundary, before midnight in
+TIME_ZONE, and plans the coming day for every user with an unfinished
+playlist. It reproduces ``Playlist.get_videos_for_day`` for all of a
+user's playlists at once and stores the number of videos and minutes
+planned in ``DailyGoal``. Dashboards and reminders then only have to read
+the goal.
+
+Users are handled in batches of GOAL_PLANNING_BATCH_SIZE. Each batch costs
+two reads, its playlists and then all their videos streamed in position
+order, and one bulk upsert of the goals. The work is linear in the number
+of videos, and batches are independent, so ``workers`` > 1 spreads them
+over worker processes. Those are spawned, not forked, and set Django up
+again, so they don't inherit the parent's connections or threads, such as
+the logging queue listener.
+
+The bulk writes send no post_save signals, so once every batch is done the
+cached progress data of each planned user is dropped, as a save would.
+
+There is one day boundary for everybody, midnight in TIME_ZONE, since users
+have no time zone of their own.
+
+A playlist that fell behind its schedule, or is unfinished past its target
+date, would get all the arrears dumped on the next day. Instead, arrears
+beyond CATCH_UP_DAYS of the daily pace are rebalanced by moving the
+playlist's ``start_date`` forward. The rest keeps the original pace and the
+deadline moves back by the days it fell behind.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import groupby, repeat
+from operator import itemgetter
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+import django
+import logging
+import math
+import multiprocessing
+import time
+
+logger = logging.getLogger(__name__)
+
+TOTALS = ('users', 'playlists', 'rebalanced', 'videos_planned', 'minutes_planned')
+# Video rows fetched per round trip while streaming a batch
+CHUNK_SIZE = 2000
+# Days of arrears a plan may include on top of the day's own share
+CATCH_UP_DAYS = 1
+
+
+def batch_size():
+    return getattr(settings, 'GOAL_PLANNING_BATCH_SIZE', 200)
+
+
+def plan_playlist(videos, start_date, target_days, day):
+    """(videos, seconds, start_date) planned on ``day`` for one playlist
+
+    ``videos`` holds (seconds, is_completed) pairs in position order. The
+    returned start_date differs from the given one when the playlist was
+    rebalanced.
+    """
+    total = sum(seconds for seconds, _ in videos)
+    done = sum(seconds for seconds, is_completed in videos if is_completed)
+    days_in = (day - start_date).days
+    if days_in < 0 or done >= total:
+        return 0, 0, start_date
+
+    pace = total / max(target_days, 1)
+    # Whole days of schedule left undone by the end of the day before
+    behind = int(days_in - done / pace) - CATCH_UP_DAYS
+    if behind > 0:
+        start_date += timedelta(days=behind)
+        days_in -= behind
+
+    # The walk of Playlist.get_videos_for_day
+    target = pace * (days_in + 1)
+    current = planned = planned_seconds = 0
+    for seconds, is_completed in videos:
+        if is_completed:
+            current += seconds
+        elif current < target:
+            planned += 1
+            planned_seconds += seconds
+            current += seconds
+        else:
+            break
+    return planned, planned_seconds, start_date
+
+
+def plan_users(user_ids, day):
+    """Plan ``day`` for a batch of users and upsert their goals; returns counts"""
+    from playlists.models import Playlist, Video
+    from .models import DailyGoal
+
+    playlists = {
+        pk: (user_id, start_date, target_days)
+        for pk, user_id, start_date, target_days in Playlist.objects.visible().filter(
+            user_id__in=user_ids, next_position__isnull=False,
+        ).values_list('pk', 'user_id', 'start_date', 'target_completion_days')
+    }
+    rows = Video.objects.filter(playlist_id__in=list(playlists)).order_by('playlist_id', 'position').values_list(
+        'playlist_id', 'metadata__duration', 'is_completed',
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    planned = defaultdict(lambda: [0, 0])
+    rebalanced = []
+    for playlist_id, videos in groupby(rows, itemgetter(0)):
+        user_id, start_date, target_days = playlists[playlist_id]
+        count, seconds, new_start = plan_playlist(
+            [(duration.total_seconds(), is_completed) for _, duration, is_completed in videos],
+            start_date, target_days, day,
+        )
+        planned[user_id][0] += count
+        planned[user_id][1] += seconds
+        if new_start != start_date:
+            rebalanced.append(Playlist(pk=playlist_id, start_date=new_start))
+
+    goals = [
+        DailyGoal(
+            user_id=user_id, date=day,
+            videos_planned=planned[user_id][0], minutes_planned=math.ceil(planned[user_id][1] / 60),
+        )
+        for user_id in user_ids
+    ]
+    with transaction.atomic():
+        DailyGoal.objects.bulk_create(
+            goals, update_conflicts=True, unique_fields=['user', 'date'],
+            update_fields=['videos_planned', 'minutes_planned'],
+        )
+        Playlist.objects.bulk_update(rebalanced, ['start_date'])
+    return {
+        'users': len(user_ids),
+        'playlists': len(playlists),
+        'rebalanced': len(rebalanced),
+        'videos_planned': sum(goal.videos_planned for goal in goals),
+        'minutes_planned': sum(goal.minutes_planned for goal in goals),
+    }
+
+
+def _setup_worker():
+    django.setup()
+
+
+def users_to_plan():
+    """Ids of active users with at least one unfinished playlist"""
+    from playlists.models import Playlist
+    from users.models import CustomUser
+
+    unfinished = Playlist.objects.visible().filter(user=OuterRef('pk'), next_position__isnull=False)
+    return CustomUser.objects.filter(Exists(unfinished), is_active=True).order_by('pk').values_list('pk', flat=True)
+
+
+def plan_daily_goals(day=None, workers=1):
+    """Plan ``day`` (default tomorrow) for every user; returns the summed counts"""
+    day = day or timezone.localdate() + timedelta(days=1)
+    user_ids = list(users_to_plan())
+    size = batch_size()
+    batches = [user_ids[i:i + size] for i in range(0, len(user_ids), size)]
+
+    started = time.perf_counter()
+    if workers > 1 and len(batches) > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=_setup_worker,
+        )
+        with pool:
+            results = list(pool.map(plan_users, batches, repeat(day)))
+    else:
+        results = [plan_users(batch, day) for batch in batches]
+
+    from users.signals import user_progress_changed
+    for user_id in user_ids:
+        user_progress_changed(user_id)
+
+    totals = {name: sum(result[name] for result in results) for name in TOTALS}
+    logger.info("Daily goals planned", extra={
+        'event': 'daily_goals_planned',
+        'date': day.isoformat(),
+        'batches': len(batches),
+        'workers': workers,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        **totals,
+    })
+    return totals
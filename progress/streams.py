@@ -0,0 +1,108 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from http.cookies import SimpleCookie
+from importlib import import_module
+from users.auth import get_user
+from .events import broker, format_event, mark_listening
+import asyncio
+
+EVENTS_PATH = '/progress/api/events/'
+
+# Comment frames keep idle connections open through proxies
+KEEPALIVE_SECONDS = 20
+
+class _SessionRequest:
+    """Just enough of a request for users.auth.get_user"""
+    def __init__(self, session):
+        self.session = session
+
+def _authenticate(session_key):
+    try:
+        engine = import_module(settings.SESSION_ENGINE)
+        user = get_user(_SessionRequest(engine.SessionStore(session_key)))
+        return user.pk if user.is_authenticated else None
+    finally:
+        close_old_connections()
+
+def _session_key(scope):
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookie = SimpleCookie(value.decode('latin-1'))
+            morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+            return morsel.value if morsel else None
+    return None
+
+async def _send_status(send, status, message):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': message.encode()})
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+async def progress_events_app(scope, receive, send):
+    """ASGI app streaming a user's progress events as Server-Sent Events
+
+    Each idle connection costs one coroutine and a small queue, so a single
+    process can keep thousands of tabs open. Events written in any process
+    reach it through the broker's relay (see progress.events). Served outside Django's request
+    handler so that client disconnects are noticed straight away.
+    """
+    if scope['method'] != 'GET':
+        await _send_status(send, 405, 'Only GET method is allowed')
+        return
+
+    session_key = _session_key(scope)
+    user_id = None
+    if session_key:
+        user_id = await sync_to_async(_authenticate)(session_key)
+    if user_id is None:
+        await _send_status(send, 403, 'Authentication required')
+        return
+
+    await sync_to_async(mark_listening)(user_id)
+    entry = broker.subscribe(user_id)
+    queue = entry[1]
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    next_event = None
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(queue.get())
+            done, pending = await asyncio.wait(
+                {next_event, disconnected},
+                timeout=KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                break
+            if next_event in done:
+                chunk = format_event(next_event.result())
+                next_event = None
+            else:
+                chunk = b': keepalive\n\n'
+                await sync_to_async(mark_listening)(user_id)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        broker.unsubscribe(user_id, entry)
+        disconnected.cancel()
+        if next_event is not None:
+            next_event.cancel()
@@ -8,4 +8,5 @@ urlpatterns = [
     path('stats/', views.progress_stats, name='progress_stats'),
     path('api/streak/', views.update_streak, name='update_streak'),
     path('api/daily-goal/', views.update_daily_goal, name='update_daily_goal'),
+    path('export/<slug:dataset>.<slug:fmt>', views.export_history, name='export_history'),
 ] 
\ No newline at end of file
@@ -1,17 +1,24 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Sum
 from django.utils import timezone
+from learning_tracker.db.replicas import replica_reads
 from .models import LearningSession, LearningStreak, DailyGoal
+from .events import publish_progress
+from .exports import FORMATS, iter_export, streaming_body
 from datetime import timedelta
 
+RECENT_SESSIONS = 20
+
 # Create your views here.
 
 @login_required
+@replica_reads
 def progress_overview(request):
     """Display user's learning progress overview"""
     # Get user's learning sessions
-    sessions = LearningSession.objects.filter(user=request.user)
+    sessions = LearningSession.objects.filter(user=request.user)[:RECENT_SESSIONS]
     
     # Get streak information
     streak, created = LearningStreak.objects.get_or_create(user=request.user)
@@ -42,19 +49,17 @@ def progress_overview(request):
     return render(request, 'progress/overview.html', context)
 
 @login_required
+@replica_reads
 def progress_stats(request):
     """Display detailed learning statistics"""
     from playlists.models import Video  # Import moved here
     
     # Get total learning time
-    total_duration = timedelta()
-    completed_videos = Video.objects.filter(
+    totals = Video.objects.visible().filter(
         playlist__user=request.user,
         is_completed=True
-    )
-    
-    for video in completed_videos:
-        total_duration += video.duration
+    ).aggregate(total_duration=Sum('metadata__duration'), videos_completed=Count('id'))
+    total_duration = totals['total_duration'] or timedelta()
     
     # Get daily completion rates for the past 30 days
     today = timezone.now().date()
@@ -74,14 +79,19 @@ def progress_stats(request):
         })
     
     # Get streak information
-    streak = LearningStreak.objects.get(user=request.user)
+    streak, created = LearningStreak.objects.get_or_create(user=request.user)
     
     context = {
         'total_duration': total_duration,
-        'videos_completed': completed_videos.count(),
+        'videos_completed': totals['videos_completed'],
         'completion_data': completion_data,
         'current_streak': streak.current_streak,
         'longest_streak': streak.longest_streak,
+        'export_datasets': [
+            ('completions', 'Completed videos'),
+            ('goals', 'Daily goals'),
+            ('sessions', 'Learning sessions'),
+        ],
     }
     return render(request, 'progress/stats.html', context)
 
@@ -89,8 +99,13 @@ def progress_stats(request):
 def update_streak(request):
     """API endpoint for updating learning streak"""
     if request.method == 'POST':
-        streak = LearningStreak.objects.get(user=request.user)
+        streak, created = LearningStreak.objects.get_or_create(user=request.user)
         streak.update_streak(timezone.now().date())
+        publish_progress(
+            request.user,
+            current_streak=streak.current_streak,
+            longest_streak=streak.longest_streak,
+        )
         
         return JsonResponse({
             'success': True,
@@ -117,6 +132,13 @@ def update_daily_goal(request):
             goal.videos_planned = videos_planned
             goal.save()
         
+        if str(goal.date) == str(timezone.now().date()):
+            publish_progress(
+                request.user,
+                videos_completed_today=goal.videos_completed,
+                videos_planned=goal.videos_planned,
+            )
+        
         return JsonResponse({
             'success': True,
             'videos_planned': goal.videos_planned,
@@ -124,3 +146,17 @@ def update_daily_goal(request):
         })
     
     return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+@login_required
+def export_history(request, dataset, fmt):
+    """Stream the user's history as CSV or NDJSON without loading it into memory"""
+    try:
+        pieces = iter_export(dataset, fmt, user=request.user)
+    except ValueError:
+        raise Http404('Unknown export')
+    response = StreamingHttpResponse(streaming_body(request, pieces), content_type=FORMATS[fmt])
+    filename = f"{dataset}-{timezone.now().date().isoformat()}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+Load test for the web tier.
+
+Drives the real URL patterns (dashboard, playlist detail, video completion,
+streak API, progress stats) with concurrent virtual users. At the end it
+reports throughput and p50/p95/p99 latency for each endpoint. Only the
+standard library is used, so the script can run from any machine.
+
+Seed accounts first, then point the script at a running server:
+
+    python manage.py generate_synthetic_data --users 50
+    python scripts/load_test.py --base-url http://127.0.0.1:8000 --users 20 --duration 60
+
+Pass --json to write machine-readable results for comparing releases.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Relative weights of each action in a virtual user's loop
+ACTIONS = {
+    'dashboard': 30,
+    'playlist_detail': 25,
+    'streak': 25,
+    'complete_video': 10,
+    'progress_stats': 10,
+}
+
+
+class VirtualUser:
+    def __init__(self, base_url, email, password, results, rng):
+        self.base_url = base_url.rstrip('/')
+        self.email = email
+        self.password = password
+        self.results = results
+        self.rng = rng
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self.playlist_ids = []
+        self.video_ids = []
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, name, path, data=None, headers=None):
+        url = self.base_url + path
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(url, data=body, headers=headers or {})
+        if body is not None:
+            request.add_header('X-CSRFToken', self.csrf_token())
+            request.add_header('Referer', url)
+        started = time.perf_counter()
+        status = None
+        content = b''
+        try:
+            with self.opener.open(request, timeout=30) as response:
+                status = response.status
+                content = response.read()
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        if name:
+            self.results.record(name, time.perf_counter() - started, status)
+        return status, content.decode('utf-8', 'replace')
+
+    def login(self):
+        self.request(None, '/accounts/login/')
+        status, _ = self.request(None, '/accounts/login/', {
+            'login': self.email,
+            'password': self.password,
+            'csrfmiddlewaretoken': self.csrf_token(),
+        })
+        return any(cookie.name == 'sessionid' for cookie in self.cookies)
+
+    def dashboard(self):
+        status, html = self.request('dashboard', '/dashboard/')
+        found = re.findall(r'data-playlist-id="(\d+)"', html)
+        if found:
+            self.playlist_ids = sorted(set(found))
+
+    def playlist_detail(self):
+        if not self.playlist_ids:
+            return self.dashboard()
+        pk = self.rng.choice(self.playlist_ids)
+        status, html = self.request('playlist_detail', f'/playlists/{pk}/')
+        found = re.findall(r'class="btn btn-sm btn-success mark-complete" data-video-id="(\d+)"', html)
+        if found:
+            self.video_ids = sorted(set(found))
+
+    def streak(self):
+        self.request('streak', '/api/users/streak/')
+
+    def complete_video(self):
+        if not self.video_ids:
+            return self.playlist_detail()
+        video_id = self.video_ids.pop(self.rng.randrange(len(self.video_ids)))
+        self.request('complete_video', f'/playlists/video/{video_id}/complete/', {})
+
+    def progress_stats(self):
+        self.request('progress_stats', '/progress/stats/')
+
+    def run(self, deadline, think_time):
+        names = list(ACTIONS)
+        weights = [ACTIONS[name] for name in names]
+        while time.monotonic() < deadline:
+            getattr(self, self.rng.choices(names, weights)[0])()
+            if think_time:
+                time.sleep(self.rng.uniform(0, think_time))
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, name, seconds, status):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if not status or status >= 400:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed):
+        rows = {}
+        everything = []
+        for name, values in sorted(self.latencies.items()):
+            everything.extend(values)
+            rows[name] = summarize(values, elapsed, self.errors.get(name, 0))
+        rows['all'] = summarize(everything, elapsed, sum(self.errors.values()))
+        return rows
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(values, elapsed, errors):
+    values = sorted(values)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput': len(values) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p95_ms': percentile(values, 0.95) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'mean_ms': statistics.fmean(values) * 1000 if values else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Max random pause between actions')
+    parser.add_argument('--email-prefix', default='loadtest')
+    parser.add_argument('--accounts', type=int, default=None, help='Seeded accounts to spread users over')
+    parser.add_argument('--password', default='loadtest-pass')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results = Results()
+    accounts = args.accounts or args.users
+    virtual_users = []
+    for i in range(args.users):
+        user = VirtualUser(
+            args.base_url, f'{args.email_prefix}-{i % accounts}@example.com',
+            args.password, results, random.Random(rng.random()),
+        )
+        if not user.login():
+            print(f'Could not log in as {user.email}; seed accounts with generate_synthetic_data', file=sys.stderr)
+            return 1
+        virtual_users.append(user)
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=user.run, args=(deadline, args.think_time)) for user in virtual_users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    rows = results.summary(elapsed)
+    print(f"{'endpoint':<18}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, row in rows.items():
+        print(
+            f"{name:<18}{row['requests']:>10}{row['errors']:>8}{row['throughput']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                'base_url': args.base_url,
+                'users': args.users,
+                'duration': elapsed,
+                'endpoints': rows,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
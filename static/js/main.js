@@ -11,6 +11,76 @@ class ProgressTracker {
         this.initializeNotifications();
         this.initializeProgressCircles();
         this.checkLearningTime();
+        this.connectProgressEvents();
+    }
+
+    // Subscribe to live progress updates pushed by the server
+    connectProgressEvents() {
+        const hasLiveElements = this.streakCounter || document.querySelector('[data-playlist-id]');
+        if (!hasLiveElements) return;
+
+        if (!window.EventSource) {
+            this.loadStreak();
+            return;
+        }
+
+        this.eventSource = new EventSource('/progress/api/events/');
+        this.eventSource.addEventListener('progress', event => {
+            this.applyProgressEvent(JSON.parse(event.data));
+        });
+        this.eventSource.onerror = () => {
+            // The browser reconnects on its own unless the stream was refused
+            // (e.g. the app is served over WSGI); fetch the streak once instead
+            if (this.eventSource.readyState === EventSource.CLOSED) {
+                this.loadStreak();
+            }
+        };
+    }
+
+    // Update the page from a pushed progress event
+    applyProgressEvent(data) {
+        if (this.streakCounter && data.current_streak !== undefined) {
+            this.streakCounter.textContent = data.current_streak;
+        }
+        const longestStreak = document.getElementById('longest-streak');
+        if (longestStreak && data.longest_streak !== undefined) {
+            longestStreak.textContent = data.longest_streak;
+        }
+
+        if (data.videos_completed_today !== undefined) {
+            const completedToday = document.getElementById('videos-completed-today');
+            if (completedToday) {
+                completedToday.textContent = data.videos_completed_today;
+            }
+            const goalBar = document.getElementById('daily-goal-progress');
+            const goalText = document.getElementById('daily-goal-text');
+            const planned = data.videos_planned || 0;
+            if (goalBar && planned > 0) {
+                goalBar.style.width = `${Math.min(100, data.videos_completed_today / planned * 100)}%`;
+                goalBar.setAttribute('aria-valuenow', data.videos_completed_today);
+            }
+            if (goalText && planned > 0) {
+                goalText.textContent = `Completed ${data.videos_completed_today} of ${planned} videos today`;
+            }
+        }
+
+        if (data.playlist_id !== undefined) {
+            document.querySelectorAll(`[data-playlist-id="${data.playlist_id}"]`).forEach(element => {
+                const bar = element.querySelector('.playlist-progress');
+                if (bar) {
+                    bar.style.width = `${data.progress}%`;
+                    bar.setAttribute('aria-valuenow', data.progress);
+                }
+                const text = element.querySelector('.playlist-progress-text');
+                if (text) {
+                    text.textContent = `${data.progress.toFixed(1)}%`;
+                }
+                const count = element.querySelector('.completed-count');
+                if (count) {
+                    count.textContent = data.completed_count;
+                }
+            });
+        }
     }
 
     // Initialize notification system
@@ -60,9 +130,8 @@ class ProgressTracker {
         if (!this.streakCounter) return;
 
         try {
-            const response = await fetch('/api/users/streak/');
-            if (response.ok) {
-                const data = await response.json();
+            const data = await this.fetchJSONConditional('/api/users/streak/');
+            if (data) {
                 this.streakCounter.textContent = data.current_streak;
                 
                 if (data.streak_at_risk) {
@@ -78,6 +147,37 @@ class ProgressTracker {
         }
     }
 
+    // Fetch JSON, revalidating a copy kept in sessionStorage with If-None-Match
+    async fetchJSONConditional(url) {
+        const cacheKey = `etag:${url}`;
+        let cached = null;
+        try {
+            cached = JSON.parse(sessionStorage.getItem(cacheKey));
+        } catch (error) {
+            cached = null;
+        }
+
+        const headers = {};
+        if (cached && cached.etag) {
+            headers['If-None-Match'] = cached.etag;
+        }
+
+        const response = await fetch(url, { headers, cache: 'no-store' });
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+        if (!response.ok) {
+            return null;
+        }
+
+        const data = await response.json();
+        const etag = response.headers.get('ETag');
+        if (etag) {
+            sessionStorage.setItem(cacheKey, JSON.stringify({ etag, data }));
+        }
+        return data;
+    }
+
     // Check learning time and send reminder
     checkLearningTime() {
         if (!this.learningTime) return;
@@ -0,0 +1,89 @@
+"""
+Cached request users.
+
+``CachedAuthenticationMiddleware`` replaces Django's AuthenticationMiddleware
+and loads ``request.user`` from the cache. With the ``cached_db`` session
+engine, an ordinary page view then runs no queries for auth.
+
+Each cached user is stored with the user's version stamp. Saving or deleting
+the user moves the stamp on (see users.signals), which invalidates the
+cached copy. Queryset ``update()`` calls send no signals, so code updating
+users that way calls ``bump_cached_user()`` itself. A request that read the row just before a save can't put the
+old copy back: it is stored under the old stamp and ignored. Session
+checks are unchanged. The session's backend must still be configured, and
+its password hash must match the cached user, so changing a password still
+ends the other sessions.
+
+The cache must be shared (the ``file`` or ``db`` backend), since users are
+also saved by other processes, such as the reminder scheduler. A save there
+would otherwise leave the web process's copy stale for up to
+AUTH_USER_CACHE_TIMEOUT. Without a shared cache the timeout defaults to 0,
+which turns the user cache off, and users.checks refuses a higher one.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from learning_tracker.metrics import record_cache_lookup
+import time
+
+USER_KEY = 'auth-user:{user_id}'
+VERSION_KEY = 'auth-user-version:{user_id}'
+
+
+def _new_version():
+    # Nanosecond stamps never repeat, so a stamp lost to eviction can't come back
+    return format(time.time_ns(), 'x')
+
+
+def bump_cached_user(user_id):
+    """Invalidate the cached copy of a user, e.g. after the profile was saved"""
+    cache.set(VERSION_KEY.format(user_id=user_id), _new_version(), None)
+
+
+def bump_cached_users(user_ids):
+    """``bump_cached_user()`` for many users in one cache call"""
+    version = _new_version()
+    cache.set_many({VERSION_KEY.format(user_id=user_id): version for user_id in user_ids}, None)
+
+
+def get_user(request):
+    """``django.contrib.auth.get_user`` served from the cache when possible"""
+    timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+    user_id = request.session.get(auth.SESSION_KEY)
+    backend = request.session.get(auth.BACKEND_SESSION_KEY)
+    if timeout <= 0 or user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    user_key, version_key = USER_KEY.format(user_id=user_id), VERSION_KEY.format(user_id=user_id)
+    found = cache.get_many([user_key, version_key])
+    version = found.get(version_key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key) or version
+    cached = found.get(user_key)
+    if cached is not None and cached[0] == version:
+        user = cached[1]
+        session_hash = request.session.get(auth.HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(session_hash, user.get_session_auth_hash()):
+            record_cache_lookup('auth_user', True)
+            user.backend = backend
+            return user
+
+    record_cache_lookup('auth_user', False)
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(user_key, (version, user), timeout)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware with ``request.user`` read through the cache"""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
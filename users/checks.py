@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """Cached sessions and request users go stale in a per-process cache"""
+    if getattr(settings, 'SHARED_CACHE', False):
+        return []
+    errors = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        errors.append(Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE} needs a shared cache.',
+            hint='Set CACHE_BACKEND to file or db, or use django.contrib.sessions.backends.db.',
+            id='users.E001',
+        ))
+    if getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0) > 0:
+        errors.append(Error(
+            'AUTH_USER_CACHE_TIMEOUT needs a shared cache.',
+            hint='Set CACHE_BACKEND to file or db, or AUTH_USER_CACHE_TIMEOUT to 0.',
+            id='users.E002',
+        ))
+    return errors
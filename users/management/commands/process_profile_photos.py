@@ -0,0 +1,35 @@
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from users.auth import bump_cached_user
+from users.models import CustomUser
+from users.photos import process_profile_photo, stage_upload
+
+
+class Command(BaseCommand):
+    help = 'Build size variants for profile photos that were uploaded but never processed'
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        # Raw uploads from before staging still sit in MEDIA; move them out of reach first
+        legacy = CustomUser.objects.exclude(profile_photo='').exclude(profile_photo__isnull=True).filter(
+            profile_photo_variants={}, profile_photo_upload='',
+        ).values_list('pk', 'profile_photo')
+        for user_id, name in legacy.iterator():
+            try:
+                with default_storage.open(name, 'rb') as f:
+                    staged = stage_upload(user_id, File(f))
+            except OSError:
+                failed += 1
+                continue
+            CustomUser.objects.filter(pk=user_id).update(profile_photo=None, profile_photo_upload=staged)
+            bump_cached_user(user_id)
+            default_storage.delete(name)
+
+        pending = CustomUser.objects.exclude(profile_photo_upload='').values_list('pk', 'profile_photo_upload')
+        for user_id, upload_name in pending.iterator():
+            if process_profile_photo(user_id, upload_name):
+                processed += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f'{processed} photos processed, {failed} failed'))
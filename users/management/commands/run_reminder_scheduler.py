@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from users.reminders import minutes_between, send_due_reminders
+import time
+
+# After a longer stall, reminders for older minutes are too late to be useful
+MAX_CATCH_UP = timedelta(hours=1)
+
+
+class Command(BaseCommand):
+    help = 'Send learning reminders every minute to the users whose learning time it is'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send the current minute and exit')
+        parser.add_argument('--at', help='With --once, send the minute of this ISO date and time instead')
+
+    def handle(self, *args, **options):
+        if options['at'] and not options['once']:
+            raise CommandError('--at only works with --once')
+        if options['once']:
+            moment = timezone.localtime()
+            if options['at']:
+                try:
+                    moment = timezone.make_aware(datetime.fromisoformat(options['at']))
+                except ValueError as error:
+                    raise CommandError(f'Invalid --at: {error}')
+            run = send_due_reminders(moment)
+            self.stdout.write(self.style.SUCCESS(f'{run.sent} reminders sent for {moment:%Y-%m-%d %H:%M}'))
+            if run.failed:
+                self.stderr.write(f'{run.failed} reminders failed')
+            return
+
+        last = timezone.localtime() - timedelta(minutes=1)
+        # Minutes with reminders that failed, run again on each tick until they go through
+        retry = []
+        while True:
+            now = timezone.localtime()
+            due = [moment for moment in retry if moment > now - MAX_CATCH_UP]
+            due += minutes_between(max(last, now - MAX_CATCH_UP), now)
+            retry = [moment for moment in due if send_due_reminders(moment).failed]
+            last = now
+            close_old_connections()
+            time.sleep(60 - timezone.localtime().second + 0.5)
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_customuser_profile_photo_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='last_reminder_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('notification_enabled', True)), fields=['preferred_learning_time'], name='user_reminder_time_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_customuser_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_photo_upload',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
 class CustomUser(AbstractUser):
@@ -9,9 +10,25 @@ class CustomUser(AbstractUser):
     streak_count = models.IntegerField(default=0)
     last_learning_date = models.DateField(null=True, blank=True)
     profile_photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
+    # {size: storage name} of the processed square WebP variants; see users.photos
+    profile_photo_variants = models.JSONField(default=dict, blank=True)
+    # Raw upload waiting to be processed, in the private upload storage
+    profile_photo_upload = models.CharField(max_length=255, blank=True, default='')
+    # Day of the last reminder sent by users.reminders, so a user gets one a day
+    last_reminder_date = models.DateField(null=True, blank=True)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # The reminder scheduler reads one minute of learning times at a time
+            models.Index(
+                fields=['preferred_learning_time'],
+                name='user_reminder_time_idx',
+                condition=Q(notification_enabled=True),
+            ),
+        ]
     
     def __str__(self):
         return self.email
@@ -29,4 +46,4 @@ class CustomUser(AbstractUser):
             self.streak_count = 1
             
         self.last_learning_date = current_date
-        self.save()
+        self.save(update_fields=['streak_count', 'last_learning_date'])
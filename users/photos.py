@@ -0,0 +1,157 @@
+"""
+Profile photo processing.
+
+The request only checks that the upload is an image of a sane size and
+stages it as is in PROFILE_PHOTO_UPLOAD_ROOT, outside MEDIA_ROOT, so the
+raw file with its EXIF (including GPS) data is never served.
+``profile_photo_upload`` names the staged file. A background task then
+applies the EXIF orientation, crops it square and writes one WebP per size
+in PROFILE_PHOTO_SIZES to the public storage. Re-encoding drops the EXIF
+data. The files are named after a hash of their content under a per-user
+prefix, so users who upload the same image don't share files and replacing
+one user's photo never deletes another's. The task then
+points ``profile_photo`` at the largest variant and deletes the staged
+upload, also when processing fails. Templates pick the smallest variant
+that covers the displayed size through ``{% avatar %}``.
+"""
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from .auth import bump_cached_user
+import hashlib
+import io
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'MPO'}
+WEBP_QUALITY = 85
+
+
+class InvalidPhoto(ValueError):
+    pass
+
+
+def photo_sizes():
+    return tuple(sorted(getattr(settings, 'PROFILE_PHOTO_SIZES', (48, 128, 256))))
+
+
+def upload_storage():
+    """Private storage for raw uploads waiting to be processed"""
+    return FileSystemStorage(location=getattr(settings, 'PROFILE_PHOTO_UPLOAD_ROOT', settings.BASE_DIR / 'uploads'))
+
+
+def stage_upload(user_id, upload):
+    """Store an upload in the private storage; returns its name there"""
+    return upload_storage().save(f'{user_id}/{uuid.uuid4().hex}', upload)
+
+
+def validate_photo(upload):
+    """Cheap checks done in the request; raises InvalidPhoto"""
+    from PIL import Image, UnidentifiedImageError
+
+    max_bytes = getattr(settings, 'PROFILE_PHOTO_MAX_BYTES', 15 * 1024 * 1024)
+    if upload.size > max_bytes:
+        raise InvalidPhoto(f'Photos can be at most {max_bytes // (1024 * 1024)} MB.')
+    try:
+        # Only the header is read here; decoding happens in the background
+        with Image.open(upload) as image:
+            image_format = image.format
+            width, height = image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidPhoto('The file is not an image we can read.')
+    finally:
+        upload.seek(0)
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidPhoto('Upload a JPEG, PNG, WebP or GIF image.')
+    if width * height > getattr(settings, 'PROFILE_PHOTO_MAX_PIXELS', 40_000_000):
+        raise InvalidPhoto('The image dimensions are too large.')
+
+
+def render_variants(data):
+    """{size: WebP bytes} for each configured size, square-cropped and without metadata"""
+    from PIL import Image, ImageOps
+
+    sizes = photo_sizes()
+    with Image.open(io.BytesIO(data)) as image:
+        # Let JPEG decode at a reduced scale instead of full resolution
+        image.draft('RGB', (sizes[-1] * 2, sizes[-1] * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+
+    variants = {}
+    for size in sizes:
+        variant = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+        variants[size] = buffer.getvalue()
+    return variants
+
+
+def variant_prefix(user_id):
+    return f'profile_photos/{user_id}/'
+
+
+def store_variants(user_id, variants):
+    """Save a user's variant bytes under content-hashed names; returns {size: storage name}"""
+    names = {}
+    for size, content in variants.items():
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        name = f'{variant_prefix(user_id)}{digest}-{size}.webp'
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        names[str(size)] = name
+    return names
+
+
+def process_profile_photo(user_id, upload_name):
+    """Background task: build the variants for the staged ``upload_name`` and swap them in"""
+    from .models import CustomUser
+
+    storage = upload_storage()
+    pending = CustomUser.objects.filter(pk=user_id, profile_photo_upload=upload_name)
+    user = pending.first()
+    if user is None:
+        # The user was deleted or has uploaded another photo since
+        storage.delete(upload_name)
+        return False
+
+    try:
+        with storage.open(upload_name, 'rb') as f:
+            data = f.read()
+        variants = render_variants(data)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not process profile photo {upload_name}: {str(e)}")
+        pending.update(profile_photo_upload='')
+        bump_cached_user(user_id)
+        storage.delete(upload_name)
+        return False
+
+    names = store_variants(user_id, variants)
+    previous = set((user.profile_photo_variants or {}).values())
+    updated = pending.update(
+        profile_photo=names[str(photo_sizes()[-1])],
+        profile_photo_variants=names,
+        profile_photo_upload='',
+    )
+    bump_cached_user(user_id)
+    storage.delete(upload_name)
+    if not updated:
+        # A newer upload replaced this one while we worked; its own task takes over
+        return False
+    for name in previous - set(names.values()):
+        # Variants stored before the per-user prefix may be shared; leave them
+        if name.startswith(variant_prefix(user_id)):
+            default_storage.delete(name)
+    return True
+
+
+def pick_variant(variants, size):
+    """Storage name of the smallest variant at least ``size`` px, else the largest"""
+    if not variants:
+        return None
+    available = sorted(int(s) for s in variants)
+    chosen = next((s for s in available if s >= size), available[-1])
+    return variants[str(chosen)]
@@ -0,0 +1,224 @@
+"""
+Daily learning reminders sent from the server.
+
+Users are bucketed by the minute of their ``preferred_learning_time``. A
+partial index on that column, covering only users with notifications
+enabled, lets ``due_reminders()`` read one minute's bucket directly instead
+of scanning the user table. ``send_due_reminders()`` skips anyone who has
+already completed today's goal or been reminded today. It hands the rest to
+the REMINDER_BACKEND in batches of REMINDER_BATCH_SIZE.
+
+Before a batch is sent, its users are claimed by setting ``last_reminder_date``
+with a conditional UPDATE, so two scheduler processes never remind the same
+user. Claims of reminders the backend failed to deliver are handed back, and
+the ``run_reminder_scheduler`` command runs their minute again on its next
+ticks. It calls ``send_due_reminders()`` once a minute and catches up on any
+minutes it missed while busy.
+
+Learning times have no time zone of their own and are read in TIME_ZONE.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.core import mail
+from django.db import transaction
+from django.db.models import Exists, IntegerField, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .auth import bump_cached_users
+import logging
+import smtplib
+
+logger = logging.getLogger(__name__)
+
+Reminder = namedtuple('Reminder', 'user_id email username videos_planned videos_completed')
+ReminderRun = namedtuple('ReminderRun', 'sent failed')
+
+
+class BaseReminderBackend:
+    """Delivers a batch of reminders; returns those that failed and should be retried
+
+    Raising fails the whole batch.
+    """
+
+    def send(self, reminders):
+        raise NotImplementedError
+
+
+class EmailBackend(BaseReminderBackend):
+    """One email per reminder over a single connection of EMAIL_BACKEND"""
+
+    subject = 'Time to learn!'
+
+    def message(self, reminder):
+        if reminder.videos_planned:
+            return (
+                f"Hi {reminder.username}, it's your learning time. "
+                f"You've watched {reminder.videos_completed} of {reminder.videos_planned} videos planned for today."
+            )
+        return f"Hi {reminder.username}, it's your learning time. Ready to continue your progress?"
+
+    def send(self, reminders):
+        with mail.get_connection() as connection:
+            for index, reminder in enumerate(reminders):
+                message = mail.EmailMessage(
+                    self.subject, self.message(reminder), settings.DEFAULT_FROM_EMAIL, [reminder.email],
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except smtplib.SMTPRecipientsRefused:
+                    # A bad address fails only its own reminder, and would fail again on a retry
+                    logger.warning(f"Reminder refused for user {reminder.user_id}")
+                except Exception:
+                    # The connection is gone; this and the rest of the batch are retried
+                    logger.exception(f"Reminder email failed for user {reminder.user_id}")
+                    return reminders[index:]
+        return []
+
+
+class LocMemBackend(BaseReminderBackend):
+    """Keeps reminders in ``outbox`` instead of delivering them; for tests and development"""
+
+    outbox = []
+
+    def send(self, reminders):
+        LocMemBackend.outbox.extend(reminders)
+        return []
+
+
+def get_backend():
+    return import_string(getattr(settings, 'REMINDER_BACKEND', 'users.reminders.EmailBackend'))()
+
+
+def batch_size():
+    return getattr(settings, 'REMINDER_BATCH_SIZE', 500)
+
+
+def minute_bucket(moment):
+    """(start, end) learning times of the minute ``moment`` falls in; end is None at midnight"""
+    start = moment.replace(second=0, microsecond=0)
+    end = start + timedelta(minutes=1)
+    return start.time(), (end.time() if end.date() == start.date() else None)
+
+
+def due_users(moment):
+    """Rows of the users whose reminder falls in the minute of ``moment``"""
+    from progress.models import DailyGoal
+    from .models import CustomUser
+
+    today = moment.date()
+    start, end = minute_bucket(moment)
+    users = CustomUser.objects.filter(
+        notification_enabled=True, is_active=True, preferred_learning_time__gte=start,
+    )
+    if end is not None:
+        users = users.filter(preferred_learning_time__lt=end)
+
+    goals = DailyGoal.objects.filter(user=OuterRef('pk'), date=today)
+    return users.filter(
+        Q(last_reminder_date__isnull=True) | Q(last_reminder_date__lt=today),
+    ).exclude(
+        Exists(goals.filter(is_completed=True)),
+    ).annotate(
+        videos_planned=Subquery(goals.values('videos_planned')[:1], output_field=IntegerField()),
+        videos_completed=Subquery(goals.values('videos_completed')[:1], output_field=IntegerField()),
+    ).order_by('pk').values_list('pk', 'email', 'username', 'videos_planned', 'videos_completed')
+
+
+def due_reminders(moment):
+    """Reminders due in the minute of ``moment``, read lazily"""
+    return (
+        Reminder(pk, email, username, planned or 0, completed or 0)
+        for pk, email, username, planned, completed in due_users(moment).iterator(chunk_size=batch_size())
+    )
+
+
+def _batches(reminders, size):
+    batch = []
+    for reminder in reminders:
+        batch.append(reminder)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def claim(user_ids, today):
+    """Mark the users not yet reminded on ``today`` as reminded; returns {id: previous last_reminder_date}
+
+    Users claimed by another scheduler process in the meantime are left out.
+    """
+    from .models import CustomUser
+
+    with transaction.atomic(savepoint=False):
+        unclaimed = CustomUser.objects.filter(
+            Q(last_reminder_date__isnull=True) | Q(last_reminder_date__lt=today), pk__in=user_ids,
+        )
+        previous = dict(unclaimed.select_for_update(skip_locked=True).values_list('pk', 'last_reminder_date'))
+        if previous:
+            unclaimed.filter(pk__in=previous).update(last_reminder_date=today)
+    bump_cached_users(previous)
+    return previous
+
+
+def release(previous, today):
+    """Hand claims back, so the users are reminded on a later try"""
+    from .models import CustomUser
+
+    by_date = {}
+    for user_id, last_date in previous.items():
+        by_date.setdefault(last_date, []).append(user_id)
+    for last_date, user_ids in by_date.items():
+        CustomUser.objects.filter(pk__in=user_ids, last_reminder_date=today).update(last_reminder_date=last_date)
+    bump_cached_users(previous)
+
+
+def send_due_reminders(moment=None, backend=None):
+    """Send the reminders due in the minute of ``moment`` (default now)
+
+    Returns a ReminderRun with the number sent (refused addresses included,
+    since they aren't retried) and the number that failed and are due again.
+    """
+    moment = timezone.localtime(moment)
+    today = moment.date()
+    backend = backend or get_backend()
+    # Read the whole bucket before claiming anyone, so the updates below
+    # don't change what the open cursor returns
+    batches = list(_batches(due_reminders(moment), batch_size()))
+    sent = failed = 0
+    for batch in batches:
+        previous = claim([reminder.user_id for reminder in batch], today)
+        batch = [reminder for reminder in batch if reminder.user_id in previous]
+        if not batch:
+            continue
+        try:
+            undelivered = backend.send(batch)
+        except Exception:
+            logger.exception(f"Reminder backend failed for a batch of {len(batch)}")
+            undelivered = batch
+        if undelivered:
+            release({reminder.user_id: previous[reminder.user_id] for reminder in undelivered}, today)
+        sent += len(batch) - len(undelivered)
+        failed += len(undelivered)
+    if sent or failed:
+        logger.info("Reminders sent", extra={
+            'event': 'reminders_sent',
+            'minute': moment.strftime('%H:%M'),
+            'sent': sent,
+            'failed': failed,
+            'batches': len(batches),
+        })
+    return ReminderRun(sent, failed)
+
+
+def minutes_between(last, now):
+    """Each minute after ``last`` up to and including ``now``, so a slow tick skips no bucket"""
+    last = last.replace(second=0, microsecond=0)
+    now = now.replace(second=0, microsecond=0)
+    moment = last + timedelta(minutes=1)
+    while moment <= now:
+        yield moment
+        moment += timedelta(minutes=1)
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from playlists.models import Playlist, Video
+from progress.models import LearningStreak, DailyGoal
+from .auth import bump_cached_user
+from .models import CustomUser
+from .summary import invalidate_dashboard_summary
+from .versions import bump_user_version
+
+def _is_empty(instance):
+    if isinstance(instance, DailyGoal):
+        return not (instance.videos_planned or instance.videos_completed)
+    return not (instance.current_streak or instance.longest_streak)
+
+def user_progress_changed(user_id):
+    """Drop cached progress data for a user and move their version stamp on"""
+    invalidate_dashboard_summary(user_id)
+    bump_user_version(user_id)
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    """Profile, password, streak or last login saved"""
+    bump_cached_user(instance.pk)
+
+@receiver([post_save, post_delete], sender=Playlist)
+def playlist_changed(sender, instance, **kwargs):
+    """Playlist imported, edited or deleted"""
+    user_progress_changed(instance.user_id)
+
+@receiver(post_save, sender=Video)
+def video_changed(sender, instance, **kwargs):
+    """Video completion state changed"""
+    if Video.playlist.is_cached(instance):
+        user_id = instance.playlist.user_id
+    else:
+        # Only the owner is needed, not the whole playlist row
+        user_id = Playlist.objects.filter(pk=instance.playlist_id).values_list('user_id', flat=True).first()
+    user_progress_changed(user_id)
+
+@receiver([post_save, post_delete], sender=LearningStreak)
+@receiver([post_save, post_delete], sender=DailyGoal)
+def progress_changed(sender, instance, created=False, **kwargs):
+    """Streak or daily goal changed"""
+    # Rows created empty by get_or_create read the same as missing ones
+    if created and _is_empty(instance):
+        return
+    user_progress_changed(instance.user_id)
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from learning_tracker.db.replicas import reading_from_replica
+from learning_tracker.metrics import record_cache_lookup
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_KEY = 'dashboard-summary:{user_id}'
+
+_stats_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'rebuild_seconds_total': 0.0,
+    'rebuild_seconds_max': 0.0,
+}
+
+def summary_cache_key(user_id):
+    """Cache key holding the dashboard summary for a user"""
+    return SUMMARY_KEY.format(user_id=user_id)
+
+def build_dashboard_summary(user):
+    """Run the dashboard aggregates for a user and return them as plain data"""
+    from playlists.models import Playlist, Video
+    from progress.models import LearningStreak, DailyGoal
+
+    today = timezone.now().date()
+
+    # One query for every playlist with its completed video count
+    playlists = []
+    for playlist in Playlist.objects.visible().filter(user=user).only(
+        'title', 'thumbnail_url', 'video_count',
+    ).annotate(
+        completed_count=Count('video', filter=Q(video__is_completed=True))
+    ).order_by('pk'):
+        progress = 0
+        if playlist.video_count:
+            progress = (playlist.completed_count / playlist.video_count) * 100
+        playlists.append({
+            'pk': playlist.pk,
+            'title': playlist.title,
+            'thumbnail_url': playlist.thumbnail_url,
+            'video_count': playlist.video_count,
+            'completed_count': playlist.completed_count,
+            'progress_percentage': progress,
+        })
+
+    # One query for the next-up video of every playlist, via next_position
+    continue_learning = list(
+        Video.objects.visible().filter(playlist__user=user).next_up().order_by('playlist_id').values(
+            'pk', 'position', 'playlist_id', 'playlist__title',
+            title=F('metadata__title'),
+            youtube_id=F('metadata__youtube_id'),
+            thumbnail_url=F('metadata__thumbnail_url'),
+            duration=F('metadata__duration'),
+        )
+    )
+
+    # Read only: this also runs on the replica, whose counts may lag, so
+    # missing rows are not created and the stored goal is not updated here
+    streak = LearningStreak.objects.filter(user=user).values(
+        'current_streak', 'longest_streak', 'last_activity_date',
+    ).first() or {'current_streak': 0, 'longest_streak': 0, 'last_activity_date': None}
+
+    goal = DailyGoal.objects.filter(user=user, date=today).values(
+        'videos_planned', 'minutes_planned',
+    ).first() or {'videos_planned': 0, 'minutes_planned': 0}
+    videos_completed_today = Video.objects.visible().filter(playlist__user=user).completed_on(today).count()
+
+    return {
+        'date': today,
+        'playlists': playlists,
+        'continue_learning': continue_learning,
+        'streak': streak,
+        'daily_goal': {
+            'videos_planned': goal['videos_planned'],
+            'minutes_planned': goal['minutes_planned'],
+            'videos_completed': videos_completed_today,
+            'is_completed': goal['videos_planned'] > 0 and videos_completed_today >= goal['videos_planned'],
+        },
+        'videos_completed_today': videos_completed_today,
+    }
+
+def get_dashboard_summary(user):
+    """Return the cached dashboard summary, rebuilding it on a miss or a new day"""
+    key = summary_cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is not None and summary['date'] == timezone.now().date():
+        _record('hits')
+        record_cache_lookup('dashboard_summary', True)
+        return summary
+
+    _record('misses')
+    record_cache_lookup('dashboard_summary', False)
+    # A summary read from a lagging replica would be served to the primary-only
+    # dashboard too, so only summaries built from the primary are cached
+    from_replica = reading_from_replica()
+    started = time.perf_counter()
+    summary = build_dashboard_summary(user)
+    elapsed = time.perf_counter() - started
+    _record_rebuild(elapsed)
+    logger.debug(f"Rebuilt dashboard summary for user {user.pk} in {elapsed * 1000:.1f}ms")
+
+    if not from_replica:
+        cache.set(key, summary, settings.DASHBOARD_SUMMARY_TIMEOUT)
+    return summary
+
+def invalidate_dashboard_summary(user_id):
+    """Drop the cached dashboard summary for a user"""
+    cache.delete(summary_cache_key(user_id))
+
+def get_summary_stats():
+    """Return hit/miss counters and rebuild latency for the summary cache"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    stats['rebuild_seconds_avg'] = stats['rebuild_seconds_total'] / stats['misses'] if stats['misses'] else 0.0
+    return stats
+
+def reset_summary_stats():
+    """Zero the summary cache counters"""
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0 if name in ('hits', 'misses') else 0.0
+
+def _record(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+def _record_rebuild(elapsed):
+    with _stats_lock:
+        _stats['rebuild_seconds_total'] += elapsed
+        _stats['rebuild_seconds_max'] = max(_stats['rebuild_seconds_max'], elapsed)
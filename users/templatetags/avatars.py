@@ -0,0 +1,26 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+from users.photos import pick_variant
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(user, size, css_class='', style=''):
+    """<img> for a profile photo shown ``size`` CSS pixels wide, or '' until processed
+
+    Picks the smallest stored variant that covers ``size``, plus a 2x srcset.
+    """
+    variants = getattr(user, 'profile_photo_variants', None)
+    if not variants:
+        return ''
+    src = default_storage.url(pick_variant(variants, size))
+    src_2x = default_storage.url(pick_variant(variants, size * 2))
+    extra = format_html(' class="{}"', css_class) if css_class else ''
+    if style:
+        extra = format_html('{} style="{}"', extra, style)
+    return format_html(
+        '<img src="{}" srcset="{} 1x, {} 2x" width="{}" height="{}" alt="Profile Photo"{}>',
+        src, src, src_2x, size, size, extra,
+    )
@@ -1,3 +1,539 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from learning_tracker.testing import CLIENT_TEST_SETTINGS, ViewBudgetTestCase, create_videos
+from learning_tracker.metrics import reset_metrics
+from learning_tracker.profiling import load_profiles
+from playlists.models import Playlist, Video
+from progress.models import DailyGoal
+from .auth import USER_KEY, VERSION_KEY
+from .checks import shared_cache_check
+from .models import CustomUser
+from .photos import process_profile_photo, stage_upload
+from PIL import Image
+from .reminders import LocMemBackend, due_reminders, due_users, minutes_between, send_due_reminders
+from .summary import get_summary_stats, reset_summary_stats, summary_cache_key
+import io
+import re
+import smtplib
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class DashboardSummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_summary_stats()
+        self.user = CustomUser.objects.create_user(
+            username='learner', email='learner@example.com', password='pass12345'
+        )
+        self.client.force_login(self.user)
+        self.playlist = Playlist.objects.create(
+            user=self.user,
+            youtube_id='PL-summary',
+            title='Summary Course',
+            thumbnail_url='https://example.com/p.jpg',
+            video_count=2,
+        )
+        self.videos = create_videos(self.playlist, [
+            dict(
+                youtube_id=f'vid{i}',
+                title=f'Video {i}',
+                thumbnail_url='https://example.com/v.jpg',
+                duration=timedelta(minutes=10),
+                position=i,
+            )
+            for i in range(2)
+        ])
+        cache.clear()
+
+    def test_second_load_is_served_from_cache(self):
+        self.client.get(reverse('users:dashboard'))
+        with self.assertNumQueries(0):  # signed-cookie session, cached user
+            response = self.client.get(reverse('users:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        stats = get_summary_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_video_completion_invalidates_summary(self):
+        self.client.get(reverse('users:dashboard'))
+        self.assertIsNotNone(cache.get(summary_cache_key(self.user.pk)))
+
+        self.videos[0].mark_completed()
+        self.assertIsNone(cache.get(summary_cache_key(self.user.pk)))
+
+        response = self.client.get(reverse('users:dashboard'))
+        self.assertEqual(response.context['playlists'][0]['progress_percentage'], 50)
+        self.assertEqual(response.context['daily_goal']['videos_completed'], 1)
+
+    def test_video_save_reads_only_the_playlist_owner(self):
+        self.client.get(reverse('users:dashboard'))
+        video = Video.objects.get(pk=self.videos[0].pk)
+        with CaptureQueriesContext(connection) as queries:
+            video.save(update_fields=['is_completed'])
+        [lookup] = [query['sql'] for query in queries if 'playlists_playlist' in query['sql']]
+        self.assertNotIn('"title"', lookup)
+        self.assertIsNone(cache.get(summary_cache_key(self.user.pk)))
+
+    def test_playlist_edit_and_delete_invalidate_summary(self):
+        self.client.get(reverse('users:dashboard'))
+        self.playlist.target_completion_days = 10
+        self.playlist.save()
+        self.assertIsNone(cache.get(summary_cache_key(self.user.pk)))
+
+        self.client.get(reverse('users:dashboard'))
+        self.playlist.delete()
+        response = self.client.get(reverse('users:dashboard'))
+        self.assertEqual(response.context['playlists'], [])
+
+    def test_streak_api_reads_summary(self):
+        self.client.get(reverse('users:dashboard'))
+        response = self.client.get(reverse('users:get_user_streak'))
+        self.assertEqual(response.json()['videos_completed_today'], 0)
+        self.assertEqual(get_summary_stats()['hits'], 1)
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class StreakConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='etag', email='etag@example.com', password='pass12345'
+        )
+        self.client.force_login(self.user)
+        playlist = Playlist.objects.create(
+            user=self.user,
+            youtube_id='PL-etag',
+            title='ETag Course',
+            thumbnail_url='https://example.com/p.jpg',
+            video_count=1,
+        )
+        [self.video] = create_videos(playlist, [dict(
+            youtube_id='etag-vid',
+            title='Video',
+            thumbnail_url='https://example.com/v.jpg',
+            duration=timedelta(minutes=5),
+            position=0,
+        )])
+
+    def test_matching_etag_returns_304_without_progress_queries(self):
+        response = self.client.get(reverse('users:get_user_streak'))
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):  # signed-cookie session, cached user
+            response = self.client.get(reverse('users:get_user_streak'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_completion_changes_etag(self):
+        etag = self.client.get(reverse('users:get_user_streak'))['ETag']
+        self.video.mark_completed()
+        response = self.client.get(reverse('users:get_user_streak'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['videos_completed_today'], 1)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_no_etag_without_a_shared_cache(self):
+        response = self.client.get(reverse('users:get_user_streak'))
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+
+@override_settings(
+    SHARED_CACHE=True, AUTH_USER_CACHE_TIMEOUT=300, SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    **CLIENT_TEST_SETTINGS,
+)
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='cached', email='cached@example.com', password='pass12345'
+        )
+        self.client.force_login(self.user)
+
+    def request_user(self):
+        return self.client.get(reverse('users:account_settings')).wsgi_request.user
+
+    def test_user_is_cached_until_saved(self):
+        self.request_user()
+        CustomUser.objects.filter(pk=self.user.pk).update(first_name='Unsaved')
+        self.assertEqual(self.request_user().first_name, '')
+
+        self.user.first_name = 'Saved'
+        self.user.save()
+        self.assertEqual(self.request_user().first_name, 'Saved')
+
+    def test_copy_read_before_a_save_is_not_served(self):
+        version = cache.get(VERSION_KEY.format(user_id=self.user.pk))
+        stale = CustomUser.objects.get(pk=self.user.pk)
+        self.user.first_name = 'Saved'
+        self.user.save()
+        # A slow request putting back the row it read before the save
+        cache.set(USER_KEY.format(user_id=self.user.pk), (version, stale))
+        self.assertEqual(self.request_user().first_name, 'Saved')
+
+    def test_password_change_still_ends_other_sessions(self):
+        self.request_user()
+        self.user.set_password('new-pass12345')
+        self.user.save()
+        self.assertFalse(self.request_user().is_authenticated)
+
+    def test_repeat_request_runs_no_auth_queries(self):
+        self.request_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.request_user(), self.user)
+
+    def test_reminder_claims_invalidate_the_cached_user(self):
+        self.user.preferred_learning_time = time(8, 30)
+        self.user.save()
+        self.request_user()
+        send_due_reminders(timezone.make_aware(datetime(2026, 3, 2, 8, 30)), backend=LocMemBackend())
+        self.assertEqual(self.request_user().last_reminder_date, date(2026, 3, 2))
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_timeout_zero_turns_the_cache_off(self):
+        self.request_user()
+        CustomUser.objects.filter(pk=self.user.pk).update(first_name='Unsaved')
+        self.assertEqual(self.request_user().first_name, 'Unsaved')
+
+    def test_cached_sessions_and_users_need_a_shared_cache(self):
+        self.assertEqual(shared_cache_check(None), [])
+        with self.settings(SHARED_CACHE=False):
+            self.assertEqual([error.id for error in shared_cache_check(None)], ['users.E001', 'users.E002'])
+        with self.settings(
+            SHARED_CACHE=False, AUTH_USER_CACHE_TIMEOUT=0, SESSION_ENGINE='django.contrib.sessions.backends.db',
+        ):
+            self.assertEqual(shared_cache_check(None), [])
+
+
+@override_settings(METRICS_TOKEN='scrape-token', **CLIENT_TEST_SETTINGS)
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        self.user = CustomUser.objects.create_user(
+            username='metrics', email='metrics@example.com', password='pass12345'
+        )
+
+    def test_metrics_require_staff_or_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    def test_dashboard_request_is_recorded_per_view(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('users:dashboard'))
+        self.client.get(reverse('users:dashboard'))
+
+        body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').content.decode()
+        self.assertIn('http_requests_total{view="users:dashboard",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{view="users:dashboard",method="GET"} 2', body)
+        self.assertIn('db_queries_per_request_count{view="users:dashboard"} 2', body)
+        self.assertIn('cache_requests_total{view="users:dashboard",cache="dashboard_summary",result="hit"} 1', body)
+        self.assertIn('cache_requests_total{view="users:dashboard",cache="dashboard_summary",result="miss"} 1', body)
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(PROFILING_DIR=Path(self.tmp.name), PROFILING_SAMPLE_RATE=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.staff = CustomUser.objects.create_user(
+            username='staff', email='staff@example.com', password='pass12345', is_staff=True
+        )
+
+    def test_staff_header_profiles_request(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('users:dashboard'), HTTP_X_PROFILE='1')
+
+        profiles = load_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['view'], 'users:dashboard')
+        self.assertGreater(profiles[0]['query_count'], 0)
+        self.assertNotIn('params', profiles[0]['queries'][0])
+        self.assertTrue((Path(self.tmp.name) / f"{profiles[0]['id']}.prof").exists())
+
+        response = self.client.get(reverse('profile_list'))
+        self.assertContains(response, 'users:dashboard')
+        response = self.client.get(reverse('profile_detail', kwargs={'profile_id': profiles[0]['id']}))
+        self.assertContains(response, 'cumulative')
+
+    def test_flag_is_ignored_for_non_staff(self):
+        user = CustomUser.objects.create_user(
+            username='plain', email='plain@example.com', password='pass12345'
+        )
+        self.client.force_login(user)
+        self.client.get(reverse('users:dashboard') + '?_profile=1')
+        self.assertEqual(load_profiles(), [])
+        self.assertEqual(self.client.get(reverse('profile_list')).status_code, 302)
+
+    def test_rotation_caps_directory_size(self):
+        self.client.force_login(self.staff)
+        with override_settings(PROFILING_MAX_BYTES=1):
+            self.client.get(reverse('users:dashboard'), HTTP_X_PROFILE='1')
+        self.assertEqual(list(Path(self.tmp.name).iterdir()), [])
+
+
+
+@override_settings(**CLIENT_TEST_SETTINGS)
+class ProfilePhotoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.uploads = tempfile.TemporaryDirectory()
+        self.addCleanup(self.uploads.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=Path(self.tmp.name), PROFILE_PHOTO_UPLOAD_ROOT=Path(self.uploads.name), BACKGROUND_TASKS_EAGER=True,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = CustomUser.objects.create_user(
+            username='photo', email='photo@example.com', password='pass12345'
+        )
+        self.client.force_login(self.user)
+
+    def upload(self, content, name='phone.jpg'):
+        return self.client.post(reverse('users:profile'), {
+            'username': 'photo',
+            'email': 'photo@example.com',
+            'profile_photo': SimpleUploadedFile(name, content, content_type='image/jpeg'),
+        })
+
+    def phone_photo(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees
+        buffer = io.BytesIO()
+        Image.new('RGB', (1600, 1200), (20, 120, 200)).save(buffer, 'JPEG', exif=exif)
+        return buffer.getvalue()
+
+    def test_upload_is_replaced_by_square_variants_without_exif(self):
+        self.upload(self.phone_photo())
+        self.user.refresh_from_db()
+
+        self.assertEqual(sorted(self.user.profile_photo_variants), ['128', '256', '48'])
+        self.assertEqual(self.user.profile_photo.name, self.user.profile_photo_variants['256'])
+        for size, name in self.user.profile_photo_variants.items():
+            self.assertRegex(name, rf'^profile_photos/{self.user.pk}/[0-9a-f]{{16}}-{size}\.webp$')
+            with Image.open(Path(self.tmp.name) / name) as image:
+                self.assertEqual(image.size, (int(size), int(size)))
+                self.assertEqual(dict(image.getexif()), {})
+        # Only the processed variants remain; the original upload is gone
+        self.assertEqual(len(list((Path(self.tmp.name) / 'profile_photos' / str(self.user.pk)).iterdir())), 3)
+        self.assertEqual(self.user.profile_photo_upload, '')
+        self.assertEqual([path for path in Path(self.uploads.name).rglob('*') if path.is_file()], [])
+
+    def test_changing_a_photo_keeps_another_users_identical_one(self):
+        photo = self.phone_photo()
+        self.upload(photo)
+        other = CustomUser.objects.create_user(username='twin', email='twin@example.com', password='pass12345')
+        other.profile_photo_upload = stage_upload(other.pk, SimpleUploadedFile('same.jpg', photo))
+        other.save()
+        self.assertTrue(process_profile_photo(other.pk, other.profile_photo_upload))
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 300), (200, 40, 40)).save(buffer, 'JPEG')
+        self.upload(buffer.getvalue())
+
+        other.refresh_from_db()
+        for name in other.profile_photo_variants.values():
+            self.assertTrue(Path(self.tmp.name, name).exists(), name)
+        self.user.refresh_from_db()
+        self.assertEqual(len(list(Path(self.tmp.name, 'profile_photos', str(self.user.pk)).iterdir())), 3)
+
+    def test_raw_upload_is_never_under_media(self):
+        with mock.patch('users.views.run_in_background') as queued:
+            self.upload(self.phone_photo())
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.profile_photo)
+        self.assertFalse(Path(self.tmp.name, 'profile_photos').exists())
+        self.assertTrue(Path(self.uploads.name, self.user.profile_photo_upload).exists())
+
+        self.assertTrue(process_profile_photo(*queued.call_args.args[1:]))
+        self.user.refresh_from_db()
+        self.assertEqual(sorted(self.user.profile_photo_variants), ['128', '256', '48'])
+        self.assertFalse(Path(self.uploads.name, queued.call_args.args[2]).exists())
+
+    def test_templates_pick_the_smallest_variant_that_fits(self):
+        self.upload(self.phone_photo())
+        self.user.refresh_from_db()
+        html = self.client.get(reverse('users:dashboard')).content.decode()
+        # 32px navbar avatar: 48px variant, 128px for 2x screens
+        self.assertIn(f'srcset="/media/{self.user.profile_photo_variants["48"]} 1x, '
+                      f'/media/{self.user.profile_photo_variants["128"]} 2x"', html)
+
+    def test_non_image_upload_is_rejected(self):
+        response = self.upload(b'not an image', name='notes.jpg')
+        self.assertRedirects(response, reverse('users:profile'), fetch_redirect_response=False)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.profile_photo)
+        self.assertFalse(self.user.profile_photo_upload)
+        self.assertFalse((Path(self.tmp.name) / 'profile_photos').exists())
+
+@override_settings(REMINDER_BACKEND='users.reminders.LocMemBackend', REMINDER_BATCH_SIZE=2)
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        LocMemBackend.outbox = []
+        self.moment = timezone.make_aware(datetime(2026, 3, 2, 8, 30, 40))
+
+    def learner(self, name, at=time(8, 30), **fields):
+        return CustomUser.objects.create_user(
+            username=name, email=f'{name}@example.com', password='pass12345',
+            preferred_learning_time=at, **fields,
+        )
+
+    def reminded(self):
+        return sorted(reminder.username for reminder in LocMemBackend.outbox)
+
+    def test_sends_only_the_current_minute(self):
+        self.learner('early', at=time(8, 29, 59))
+        self.learner('on_time', at=time(8, 30))
+        self.learner('late_in_minute', at=time(8, 30, 59))
+        self.learner('next', at=time(8, 31))
+        self.learner('muted', notification_enabled=False)
+        self.learner('inactive', is_active=False)
+        self.learner('unset', at=None)
+
+        self.assertEqual(send_due_reminders(self.moment).sent, 2)
+        self.assertEqual(self.reminded(), ['late_in_minute', 'on_time'])
+
+    def test_skips_users_who_met_todays_goal(self):
+        done = self.learner('done')
+        behind = self.learner('behind')
+        today = self.moment.date()
+        DailyGoal.objects.create(user=done, date=today, videos_planned=2, videos_completed=2, is_completed=True)
+        DailyGoal.objects.create(user=behind, date=today, videos_planned=3, videos_completed=1)
+        DailyGoal.objects.create(user=done, date=today - timedelta(days=1), videos_planned=2)
+
+        send_due_reminders(self.moment)
+        self.assertEqual(self.reminded(), ['behind'])
+        self.assertEqual(LocMemBackend.outbox[0][3:], (3, 1))
+
+    def test_sends_once_a_day_in_batches(self):
+        for n in range(5):
+            self.learner(f'learner{n}')
+
+        with self.assertNumQueries(7):  # one read, a claim and its update per batch of two
+            self.assertEqual(send_due_reminders(self.moment), (5, 0))
+        self.assertEqual(send_due_reminders(self.moment + timedelta(seconds=10)), (0, 0))
+        self.assertEqual(send_due_reminders(self.moment + timedelta(days=1)), (5, 0))
+        self.assertEqual(len(LocMemBackend.outbox), 10)
+
+    def test_failed_batch_is_retried_next_time(self):
+        retry = self.learner('retry', last_reminder_date=self.moment.date() - timedelta(days=3))
+        with mock.patch.object(LocMemBackend, 'send', side_effect=ConnectionError), \
+                self.assertLogs('users.reminders', 'ERROR'):
+            self.assertEqual(send_due_reminders(self.moment), (0, 1))
+        retry.refresh_from_db()
+        self.assertEqual(retry.last_reminder_date, self.moment.date() - timedelta(days=3))
+        self.assertEqual(send_due_reminders(self.moment), (1, 0))
+
+    def test_users_claimed_elsewhere_are_skipped(self):
+        self.learner('mine')
+        self.learner('theirs')
+        due = list(due_reminders(self.moment))
+        # Another scheduler process claims a user between our read and our send
+        CustomUser.objects.filter(username='theirs').update(last_reminder_date=self.moment.date())
+        with mock.patch('users.reminders.due_reminders', return_value=iter(due)):
+            self.assertEqual(send_due_reminders(self.moment), (1, 0))
+        self.assertEqual(self.reminded(), ['mine'])
+
+    @override_settings(REMINDER_BACKEND='users.reminders.EmailBackend')
+    def test_a_refused_address_fails_only_its_own_email(self):
+        self.learner('bad')
+        self.learner('good')
+        self.learner('later')
+        send = mail.EmailMessage.send
+
+        def refuse(message, *args, **kwargs):
+            if message.to == ['bad@example.com']:
+                raise smtplib.SMTPRecipientsRefused({'bad@example.com': (550, b'No such user')})
+            return send(message, *args, **kwargs)
+
+        with mock.patch.object(mail.EmailMessage, 'send', refuse), self.assertLogs('users.reminders', 'WARNING'):
+            self.assertEqual(send_due_reminders(self.moment), (3, 0))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['good@example.com', 'later@example.com'])
+
+    @override_settings(REMINDER_BACKEND='users.reminders.EmailBackend')
+    def test_a_dropped_connection_retries_the_rest_of_the_batch(self):
+        for name in ('first', 'second'):
+            self.learner(name)
+        send = mail.EmailMessage.send
+
+        def drop(message, *args, **kwargs):
+            if message.to == ['second@example.com']:
+                raise smtplib.SMTPServerDisconnected
+            return send(message, *args, **kwargs)
+
+        with mock.patch.object(mail.EmailMessage, 'send', drop), self.assertLogs('users.reminders', 'ERROR'):
+            self.assertEqual(send_due_reminders(self.moment), (1, 1))
+        self.assertEqual(send_due_reminders(self.moment), (1, 0))
+        self.assertEqual([message.to[0] for message in mail.outbox], ['first@example.com', 'second@example.com'])
+
+    def test_last_minute_of_the_day(self):
+        self.learner('night', at=time(23, 59, 30))
+        send_due_reminders(self.moment.replace(hour=23, minute=59))
+        self.assertEqual(self.reminded(), ['night'])
+
+    def test_catch_up_covers_every_missed_minute(self):
+        last = self.moment
+        minutes = list(minutes_between(last, last + timedelta(minutes=3, seconds=5)))
+        self.assertEqual([moment.minute for moment in minutes], [31, 32, 33])
+
+    @override_settings(REMINDER_BACKEND='users.reminders.EmailBackend')
+    def test_email_backend_and_command(self):
+        self.learner('mailed')
+        call_command('run_reminder_scheduler', '--once', '--at', '2026-03-02T08:30', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['mailed@example.com'])
+
+    def test_bucket_is_read_from_the_index(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('Plan check needs SQLite or PostgreSQL')
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Tiny test tables make seq scans cheapest; check the index is usable
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = due_users(self.moment).explain()
+        pattern = r'Seq Scan on users_customuser\b' if connection.vendor == 'postgresql' else r'\bSCAN users_customuser\b'
+        self.assertIsNone(re.search(pattern, plan), plan)
+        self.assertIn('user_reminder_time_idx', plan)
+
+
+class ViewBudgetTests(ViewBudgetTestCase):
+    def test_dashboard(self):
+        self.assertViewBudget(lambda l: reverse('users:dashboard'), 8)
+
+    def test_user_streak(self):
+        self.assertViewBudget(lambda l: reverse('users:get_user_streak'), 8)
+
+    def test_account_settings(self):
+        url = lambda l: reverse('users:account_settings')
+        self.assertViewBudget(url, 2)
+        self.assertViewBudget(
+            url, 3, method='post', data={'notification_time': '07:30', 'notifications_enabled': 'on'}, status=302
+        )
+
+    def test_profile(self):
+        self.assertViewBudget(lambda l: reverse('users:profile'), 2)
@@ -0,0 +1,58 @@
+"""
+Per-user version stamps behind the ETags of the streak endpoints.
+
+Every write to a user's progress data bumps the stamp, from whichever process
+made it: web workers, the reminder scheduler, the nightly planner and
+management commands. The stamps never expire, so a bump that a serving
+process can't see would answer 304 for stale data indefinitely. ETags are
+therefore only sent when the cache is shared between processes
+(SHARED_CACHE): with the default ``db`` backend or ``file``, not with
+``locmem``.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from learning_tracker.metrics import record_cache_lookup
+import time
+
+VERSION_KEY = 'user-version:{user_id}'
+
+def _new_stamp():
+    # Nanosecond stamps never repeat, so a stamp lost to cache eviction can't
+    # be re-issued for different content
+    now = time.time_ns()
+    return {'version': format(now, 'x'), 'modified': now // 1_000_000_000}
+
+def get_user_version(user_id):
+    """Return the current version stamp for a user's progress data"""
+    key = VERSION_KEY.format(user_id=user_id)
+    stamp = cache.get(key)
+    record_cache_lookup('user_version', stamp is not None)
+    if stamp is None:
+        stamp = _new_stamp()
+        if not cache.add(key, stamp, None):
+            stamp = cache.get(key) or stamp
+    return stamp
+
+def bump_user_version(user_id):
+    """Mark a user's progress data as changed"""
+    cache.set(VERSION_KEY.format(user_id=user_id), _new_stamp(), None)
+
+def user_etag(request, *args, **kwargs):
+    """Strong ETag for per-user JSON that depends on progress data and the date"""
+    if not request.user.is_authenticated or not getattr(settings, 'SHARED_CACHE', False):
+        return None
+    stamp = get_user_version(request.user.pk)
+    return f'"{request.user.pk}-{stamp["version"]}-{timezone.now().date():%Y%m%d}"'
+
+def user_last_modified(request, *args, **kwargs):
+    """Last-Modified time matching user_etag"""
+    if not request.user.is_authenticated or not getattr(settings, 'SHARED_CACHE', False):
+        return None
+    stamp = get_user_version(request.user.pk)
+    modified = datetime.fromtimestamp(stamp['modified'], tz=dt_timezone.utc)
+    # "Today" counters reset at midnight even when nothing was written
+    midnight = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(modified, midnight)
@@ -2,8 +2,14 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from learning_tracker.db.replicas import replica_reads
+from learning_tracker.tasks import run_in_background
 from .models import CustomUser
+from .photos import InvalidPhoto, process_profile_photo, stage_upload, validate_photo
+from .summary import get_dashboard_summary
+from .versions import user_etag, user_last_modified
 
 def home(request):
     """Home page view"""
@@ -14,37 +20,13 @@ def home(request):
 @login_required
 def dashboard(request):
     """User dashboard view"""
-    from playlists.models import Playlist, Video
-    from progress.models import LearningStreak, DailyGoal
-    
-    # Get user's playlists
-    playlists = Playlist.objects.filter(user=request.user)
-    
-    # Get learning streak
-    streak, created = LearningStreak.objects.get_or_create(user=request.user)
-    
-    # Get today's goal and completed videos
-    today = timezone.now().date()
-    daily_goal, created = DailyGoal.objects.get_or_create(
-        user=request.user,
-        date=today,
-        defaults={'videos_planned': 0}
-    )
-    
-    # Count videos completed today across all playlists
-    videos_completed_today = Video.objects.filter(
-        playlist__user=request.user,
-        is_completed=True,
-        completed_at__date=today
-    ).count()
-    
-    # Update daily goal with completed videos
-    daily_goal.update_progress(videos_completed_today)
+    summary = get_dashboard_summary(request.user)
     
     context = {
-        'playlists': playlists,
-        'streak': streak,
-        'daily_goal': daily_goal,
+        'playlists': summary['playlists'],
+        'continue_learning': summary['continue_learning'],
+        'streak': summary['streak'],
+        'daily_goal': summary['daily_goal'],
     }
     return render(request, 'users/dashboard.html', context)
 
@@ -58,7 +40,7 @@ def account_settings(request):
         
         request.user.preferred_learning_time = notification_time
         request.user.notification_enabled = notifications_enabled
-        request.user.save()
+        request.user.save(update_fields=['preferred_learning_time', 'notification_enabled'])
         
         messages.success(request, 'Settings updated successfully!')
         return redirect('users:dashboard')
@@ -75,34 +57,39 @@ def profile(request):
         user.preferred_learning_time = request.POST.get('preferred_learning_time')
         user.notification_enabled = request.POST.get('notification_enabled') == 'on'
         
-        if request.FILES.get('profile_photo'):
-            user.profile_photo = request.FILES['profile_photo']
+        fields = ['username', 'email', 'preferred_learning_time', 'notification_enabled']
+        photo = request.FILES.get('profile_photo')
+        if photo:
+            try:
+                validate_photo(photo)
+            except InvalidPhoto as e:
+                messages.error(request, str(e))
+                return redirect('users:profile')
+            # Kept out of MEDIA until the EXIF data is stripped
+            user.profile_photo_upload = stage_upload(user.pk, photo)
+            fields.append('profile_photo_upload')
         
-        user.save()
+        user.save(update_fields=fields)
+        if photo:
+            # Resizing and EXIF stripping happen off the request thread
+            run_in_background(process_profile_photo, user.pk, user.profile_photo_upload)
         messages.success(request, 'Profile updated successfully!')
         return redirect('users:profile')
         
     return render(request, 'users/profile.html')
 
 @login_required
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=user_etag, last_modified_func=user_last_modified)
 def get_user_streak(request):
     """API endpoint to get user's current streak"""
-    from playlists.models import Video
-    from progress.models import LearningStreak
-    
-    streak, created = LearningStreak.objects.get_or_create(user=request.user)
-    
-    # Get today's completion count
-    today = timezone.now().date()
-    videos_completed_today = Video.objects.filter(
-        playlist__user=request.user,
-        is_completed=True,
-        completed_at__date=today
-    ).count()
+    summary = get_dashboard_summary(request.user)
+    streak = summary['streak']
     
     return JsonResponse({
-        'current_streak': streak.current_streak,
-        'longest_streak': streak.longest_streak,
-        'last_activity_date': streak.last_activity_date.strftime('%Y-%m-%d') if streak.last_activity_date else None,
-        'videos_completed_today': videos_completed_today,
+        'current_streak': streak['current_streak'],
+        'longest_streak': streak['longest_streak'],
+        'last_activity_date': streak['last_activity_date'].strftime('%Y-%m-%d') if streak['last_activity_date'] else None,
+        'videos_completed_today': summary['videos_completed_today'],
     })